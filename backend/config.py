@@ -1,4 +1,5 @@
 """Global settings and configurations for the application."""
+import hashlib
 import os
 from dotenv import load_dotenv
 
@@ -8,22 +9,110 @@ load_dotenv()
 # Project root — always correct regardless of where Streamlit runs from
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
+# Where indexes, caches and spools live (benchmarks point this at a temp dir)
+DATA_DIR = os.path.abspath(os.getenv("PRIA_DATA_DIR", PROJECT_ROOT))
+
 # LLM model configurations
-FAISS_DB_PATH = os.path.join(PROJECT_ROOT, "faiss_index")
+FAISS_DB_PATH = os.path.join(DATA_DIR, "faiss_index")
+# Single-resume vectors: "flat" (exact), "sq8" (8-bit scalar quantization, 4x smaller) or "pq" (product
+# quantization; needs INDEX_PQ_MIN_VECTORS chunks, otherwise sq8 is used). The file is memory-mapped on load.
+INDEX_QUANTIZATION = os.getenv("INDEX_QUANTIZATION", "flat")
+INDEX_PQ_SUBQUANTIZERS = 48  # Must divide the embedding dimension (384 for MiniLM)
+INDEX_PQ_MIN_VECTORS = 1000
+# Rebuilds are published as numbered generations (faiss_index/gen-000007/); the newest few stay on disk
+# so queries (and other processes) still reading the previous one can finish
+INDEX_KEEP_GENERATIONS = 2
+INGEST_PROGRESS_BATCH = 64  # Chunks embedded between progress updates
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 LLM_MODEL = "llama-3.1-8b-instant" # Latest Groq lightning fast model
 EMBEDDING_MODEL = "all-MiniLM-L6-v2" # Free local lightweight model
 
+# Offline stand-ins for benchmarks and load tests: LLM_BACKEND=stub, EMBEDDING_BACKEND=hashing
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "huggingface")
+STUB_LLM_TTFT_MS = float(os.getenv("STUB_LLM_TTFT_MS", "200"))
+STUB_LLM_TOKEN_MS = float(os.getenv("STUB_LLM_TOKEN_MS", "5"))
+
+# EMBEDDING_BACKEND=onnx: the same MiniLM, int8-quantized, on ONNX Runtime (no PyTorch; see utils/onnx_embeddings.py)
+ONNX_MODEL_REPO = os.getenv("ONNX_MODEL_REPO", f"sentence-transformers/{EMBEDDING_MODEL}")
+ONNX_MODEL_FILE = os.getenv("ONNX_MODEL_FILE", "onnx/model_quint8_avx2.onnx")  # onnx/model_qint8_arm64.onnx on ARM
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "")  # Local folder with the .onnx file + tokenizer.json (no Hub download)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))  # 0 = runtime default (all cores)
+EMBEDDING_MAX_TOKENS = 256  # MiniLM's max_seq_length in sentence-transformers
+
+# LLM client: one pooled keep-alive HTTP client (OpenAI-compatible Groq API) with deadlines, retries and hedging
+GROQ_API_BASE = os.getenv("GROQ_API_BASE", "https://api.groq.com/openai/v1")
+LLM_POOL_SIZE = 16  # Keep-alive connections shared by all sessions
+LLM_CONNECT_TIMEOUT = 5.0
+LLM_DEADLINE_SECONDS = 60.0  # Whole answer, retries included
+LLM_MAX_RETRIES = 3  # On 429 / 5xx / connection errors, only before the first token
+LLM_RETRY_BASE_DELAY = 0.5  # Full-jitter exponential backoff (Retry-After wins when sent)
+LLM_RETRY_MAX_DELAY = 8.0
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "false").lower() == "true"  # Costs an extra call on slow answers
+LLM_HEDGE_DEFAULT_DELAY = 2.0  # Until LLM_HEDGE_MIN_SAMPLES answers have been seen; then the observed p95 TTFT
+LLM_HEDGE_MIN_DELAY = 0.3
+LLM_HEDGE_MIN_SAMPLES = 20
+# API quota (Groq free tier for llama-3.1-8b-instant); batch questions are scheduled to stay under it. 0 = no limit
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "6000"))
+
+# Cold start: import phases before the first paint must fit in this budget (logged + counted when exceeded).
+# The embedding model, index and LLM client are then loaded by a background warm-up thread.
+COLD_START_BUDGET_SECONDS = float(os.getenv("COLD_START_BUDGET_SECONDS", "1.0"))
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+
 # Security
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "owner_secret_key5120")
 
 # RAG tuning parameters
 CHUNK_SIZE = 600
 CHUNK_OVERLAP = 100
+# Chunks never cross a resume heading and are tagged with their section (Education, Skills...);
+# questions with a clear section intent then search only those chunks (see SectionRouter)
+SECTION_CHUNKING_ENABLED = os.getenv("SECTION_CHUNKING_ENABLED", "true").lower() == "true"
+SECTION_ROUTING_ENABLED = os.getenv("SECTION_ROUTING_ENABLED", "true").lower() == "true"
+SECTION_RETRIEVAL_K = 2  # Chunks sent for a section-routed question (the section is already the filter)
 RETRIEVAL_K = 4
 LLM_NUM_PREDICT = 120
+
+# Hybrid retrieval: BM25 keyword ranking fused with FAISS similarity (reciprocal rank fusion)
+HYBRID_SEARCH_ENABLED = True
+HYBRID_RETRIEVAL_K = 3  # Chunks sent to the LLM when fusing; exact keyword hits make a smaller k safe
+HYBRID_CANDIDATES = 10  # Depth of each ranking fed into the fusion
+RRF_K = 60
+
+# Context packing: overlapping/adjacent chunks are merged, text already in the start-of-resume block is
+# dropped, and the rest is packed by relevance into this many (estimated) prompt tokens
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "800"))
+CONTEXT_CHARS_PER_TOKEN = 4.0  # English text averages ~4 characters per Llama/GPT token
+CONTEXT_MIN_OVERLAP = 20  # Shortest shared prefix/suffix (characters) treated as chunk overlap
 LLM_TEMPERATURE = 0.0
 
+# Sidebar FAQ questions (also precomputed after each upload)
+FAQ_LIST = [
+    "What is the candidate's full name?",
+    "What is the candidate's email address?",
+    "What is the candidate's phone number?",
+    "Summarize the professional summary.",
+    "What are the candidate's core skills?",
+    "What is the candidate's total years of experience?",
+    "What is the candidate's current or most recent job title?",
+    "What are the candidate's educational qualifications?",
+    "What major projects has the candidate worked on?",
+    "Does the candidate have experience with Python?",
+    "Does the candidate have experience with React?",
+    "What certifications does the candidate hold?",
+    "What languages can the candidate speak?",
+    "What is the candidate's LinkedIn profile?",
+    "Where is the candidate located?",
+    "Does the candidate have leadership or management experience?",
+    "Which databases is the candidate familiar with?",
+    "What is the candidate's highest degree earned?",
+    "What cloud platforms (AWS, Azure, GCP) does the candidate know?",
+    "Can you list the candidate's soft skills?"
+]
+
 # Base system prompt for the AI assistant 
 HR_SYSTEM_PROMPT = """You are a helpful HR assistant.
 Your job is to answer questions based strictly on the resume text provided below.
@@ -39,3 +128,77 @@ Instructions:
 3. For skills, experience, and other queries, look into "[Relevant Matches]".
 4. If the answer cannot be found in the text, reply exactly with: "This information is not mentioned in the resume."
 5. Do not guess, assume, or use outside knowledge. Do not apologize."""
+
+# Fingerprint of prompt + model. Part of every cache key, so editing the prompt never serves stale answers
+PROMPT_VERSION = hashlib.sha256(f"{LLM_MODEL}|{LLM_TEMPERATURE}|{HR_SYSTEM_PROMPT}".encode("utf-8")).hexdigest()[:12]
+
+# Response cache (in-memory LRU backed by SQLite)
+CACHE_DB_PATH = os.path.join(DATA_DIR, "query_cache.db")
+CACHE_L1_SIZE = 256  # Entries kept in memory per process
+CACHE_MAX_ENTRIES = 5000  # Entries kept on disk before LRU eviction
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# Semantic cache: serves paraphrased questions from previously answered ones
+SEMANTIC_CACHE_ENABLED = True
+SEMANTIC_CACHE_THRESHOLD = 0.90  # Cosine similarity needed to reuse an answer
+SEMANTIC_CACHE_MAX_ENTRIES = 500  # Per resume
+
+# Retrieval caches (memory only): repeated questions skip the encoder and the index search,
+# even when the prompt or LLM settings change. Retrieval entries are keyed by index generation.
+QUERY_EMBEDDING_CACHE_SIZE = 2048  # Question -> query vector
+RETRIEVAL_CACHE_SIZE = 2048  # (generation, question, k) -> ranked chunk ids + scores
+
+# FAQ precomputation after ingest
+FAQ_PRECOMPUTE_WORKERS = 2  # Parallel LLM calls; keep low to stay under Groq rate limits
+
+# Multi-resume corpus mode (thousands of candidates in one index)
+CORPUS_MODE = os.getenv("CORPUS_MODE", "false").lower() == "true"
+CORPUS_DB_PATH = os.path.join(DATA_DIR, "corpus_index")
+CORPUS_INDEX_TYPE = "ivf"  # "ivf" (true deletes) or "hnsw" (deletes are tombstoned until compaction)
+CORPUS_IVF_NLIST = 256
+CORPUS_IVF_NPROBE = 16  # Lists scanned per query: higher = better recall, slower
+CORPUS_HNSW_M = 32
+CORPUS_HNSW_EF_SEARCH = 64  # Candidate list size per query: higher = better recall, slower
+CORPUS_CANDIDATE_CACHE = 256  # Per-candidate vector blocks kept in memory for filtered search
+
+# Bulk ingestion CLI (python -m backend.core.bulk_ingest)
+BULK_PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+BULK_EMBED_BATCH = 512  # Chunks per embedding call
+
+# Content-addressed embedding cache (re-indexing only embeds changed chunks)
+EMBEDDING_CACHE_PATH = os.path.join(DATA_DIR, "embedding_cache.db")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "50000"))  # Vectors kept before LRU eviction
+
+# Document extraction limits (keep time and memory bounded for huge portfolios)
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+MAX_PDF_PAGES = 60
+MAX_TEXT_CHARS = 200_000
+PDF_PAGE_WORKERS = int(os.getenv("PDF_PAGE_WORKERS", "1"))  # >1 extracts pages in worker processes
+PDF_PAGE_TIMEOUT = 10  # Seconds per page; enforced when PDF_PAGE_WORKERS > 1
+
+# Query logging (background writer; Supabase with a local SQLite spool)
+QUERY_LOG_QUEUE_SIZE = 1000  # Logs beyond this are dropped instead of blocking viewers
+QUERY_LOG_BATCH_SIZE = 50
+QUERY_LOG_FLUSH_SECONDS = 2.0
+QUERY_LOG_SLOW_SECONDS = 3.0  # A slower insert pauses remote writes (spool only) for QUERY_LOG_BACKOFF_SECONDS
+QUERY_LOG_BACKOFF_SECONDS = 60.0
+QUERY_LOG_SPOOL_PATH = os.path.join(DATA_DIR, "query_log_spool.db")
+QUERY_LOG_SPOOL_MAX_ROWS = 5000  # Oldest spooled logs are dropped beyond this (e.g. Supabase never configured)
+
+# Async query service (python -m backend.server); the Streamlit app becomes a thin client when QUERY_SERVICE_URL is set
+SERVICE_HOST = os.getenv("SERVICE_HOST", "127.0.0.1")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8600"))
+SERVICE_MAX_CONCURRENT = int(os.getenv("SERVICE_MAX_CONCURRENT", "8"))  # Live answers generated at once
+SERVICE_MAX_PENDING = int(os.getenv("SERVICE_MAX_PENDING", "64"))  # Distinct questions waiting for a slot; beyond this → 503
+SERVICE_QUEUE_TIMEOUT = 30.0  # Seconds a question may wait for a slot
+QUERY_SERVICE_URL = os.getenv("QUERY_SERVICE_URL", "")
+
+# Batch questions (checklists): python -m backend.core.batch, or the checklist box in the app
+BATCH_MAX_CONCURRENT = int(os.getenv("BATCH_MAX_CONCURRENT", "8"))  # LLM calls in flight per batch
+BATCH_MAX_QUESTIONS = 50
+
+# Chat UI: streamed answers are redrawn at most every STREAM_RENDER_INTERVAL_SECONDS (or once
+# STREAM_RENDER_MAX_CHARS new characters are waiting); only the last CHAT_HISTORY_WINDOW messages are kept
+STREAM_RENDER_INTERVAL_SECONDS = 0.1
+STREAM_RENDER_MAX_CHARS = 200
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "40"))
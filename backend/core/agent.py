@@ -1,47 +1,356 @@
 """RAG Pipeline module for querying the vector database."""
-import os
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
 
-from backend.config import LLM_MODEL, RETRIEVAL_K, HR_SYSTEM_PROMPT, LLM_TEMPERATURE, GROQ_API_KEY, PROJECT_ROOT
+from backend.config import (
+    RETRIEVAL_K, HR_SYSTEM_PROMPT, SEMANTIC_CACHE_ENABLED, CORPUS_MODE,
+    HYBRID_SEARCH_ENABLED, HYBRID_RETRIEVAL_K, HYBRID_CANDIDATES, RRF_K,
+    SECTION_ROUTING_ENABLED, SECTION_RETRIEVAL_K
+)
 from backend.core.database import VectorDBManager
+from backend.core.corpus import CandidateCorpus
+from backend.core.registry import IndexRegistry
+from backend.core.router import ProfileRouter, SectionRouter
+from backend.utils.cache_manager import (
+    ResponseCache, SemanticCache, CacheEntry, QueryEmbeddingCache, RetrievalCache
+)
+from backend.utils.metrics import Metrics
+from backend.utils.llm_client import LLMClient
+from backend.utils.lexical_index import reciprocal_rank_fusion
+from backend.utils.context_builder import build_context
+from backend.utils.profile_extractor import HEADER_SECTION
 
-RESUME_START_FILE = os.path.join(PROJECT_ROOT, "resume_start.txt")
+# Built once; only the context and question change per request
+PROMPT = ChatPromptTemplate.from_messages([
+    ("system", HR_SYSTEM_PROMPT),
+    ("human", "{question}")
+])
+_ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+# Cache and registry counters are read only when metrics are exported
+Metrics.register_collector("pria_response_cache", ResponseCache.stats)
+Metrics.register_collector("pria_semantic_cache", SemanticCache.stats)
+Metrics.register_collector("pria_query_embedding_cache", QueryEmbeddingCache.stats)
+Metrics.register_collector("pria_retrieval_cache", RetrievalCache.stats)
+Metrics.register_collector("pria_index_registry", IndexRegistry.stats)
+Metrics.register_collector("pria_llm_client", lambda: LLMClient.shared().stats())
 
 class RAGPipeline:
     """Main RAG logic wrapper."""
 
     @staticmethod
-    def answer_query(user_query: str):
-        """Queries the LLM and returns a text stream + the retrieved documents."""
-        vector_db = VectorDBManager.load_db()
-        if not vector_db:
-            return None, "Error: No resume index found."
+    def get_llm():
+        """The shared, pooled LLM client (see backend/utils/llm_client.py)."""
+        return LLMClient.shared()
+
+    @staticmethod
+    def build_messages(context_texts: str, user_query: str):
+        """Fills the prompt template into chat messages for the LLM client."""
+        return [
+            {"role": _ROLES[message.type], "content": message.content}
+            for message in PROMPT.format_messages(context=context_texts, question=user_query)
+        ]
+
+    @staticmethod
+    def embed_query(user_query: str):
+        """Encodes a question with the resident embedding model (repeated questions come from memory)."""
+        vector = QueryEmbeddingCache.get(user_query)
+        if vector is not None:
+            return vector
+        embeddings = IndexRegistry.get_embeddings()
+        with Metrics.span("query_embedding"):
+            vector = embeddings.embed_query(user_query)
+        QueryEmbeddingCache.set(user_query, vector)
+        return vector
+
+    @staticmethod
+    def embed_queries(user_queries):
+        """embed_query() for many questions: cache hits first, then one batched call for the rest."""
+        vectors = [QueryEmbeddingCache.get(query) for query in user_queries]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embeddings = IndexRegistry.get_embeddings()
+            with Metrics.span("query_embedding_batch"):
+                computed = embeddings.embed_documents([user_queries[i] for i in missing])
+            for i, vector in zip(missing, computed):
+                vectors[i] = vector
+                QueryEmbeddingCache.set(user_queries[i], vector)
+        return vectors
+
+    @staticmethod
+    def lookup_cache(user_query: str, fingerprint: str = "", candidate_id: str = None):
+        """
+        Checks the structured profile (contact questions), the exact-match cache, then the semantic cache.
+        Returns (CacheEntry or None, source label, query vector or None). The vector is
+        handed back so answer_query doesn't encode the same question twice on a miss.
+        """
+        with Metrics.span("profile_route"):
+            routed = RAGPipeline.answer_from_profile(user_query, candidate_id)
+        if routed:
+            Metrics.inc("pria_cache_lookups_total", result="profile")
+            return routed, "profile", None
 
+        with Metrics.span("cache_lookup"):
+            cached = ResponseCache.get(user_query, fingerprint)
+        if cached:
+            Metrics.inc("pria_cache_lookups_total", result="cache")
+            return cached, "cache", None
 
-        retriever = vector_db.as_retriever(search_kwargs={"k": RETRIEVAL_K})
-        docs = retriever.invoke(user_query)
-        context_texts = "\n\n".join([doc.page_content for doc in docs])
+        if not SEMANTIC_CACHE_ENABLED:
+            Metrics.inc("pria_cache_lookups_total", result="live")
+            return None, "live", None
 
-        try:
-            with open(RESUME_START_FILE, "r", encoding="utf-8") as f:
-                start_text = f.read()
-            context_texts = f"[Start of Resume]\n{start_text}\n[End of Start]\n\n[Relevant Matches]\n{context_texts}"
-        except Exception:
-            pass
+        query_vector = RAGPipeline.embed_query(user_query)
+        with Metrics.span("semantic_cache_lookup"):
+            match = SemanticCache.get(query_vector, fingerprint)
+        if match:
+            Metrics.inc("pria_cache_lookups_total", result="semantic-cache")
+            return match[0], "semantic-cache", query_vector
+        Metrics.inc("pria_cache_lookups_total", result="live")
+        return None, "live", query_vector
 
-        if not docs or not context_texts.strip():
-            return None, "This information is not mentioned in the resume."
+    @staticmethod
+    def answer_from_profile(user_query: str, candidate_id: str = None):
+        """CacheEntry answered from the ingest-time profile (no retrieval, no LLM), or None."""
+        if CORPUS_MODE and not candidate_id:
+            return None
+        answer = ProfileRouter.route(user_query, VectorDBManager.get_profile(candidate_id))
+        if answer is None:
+            return None
+        return CacheEntry(answer, "Answered from the structured profile extracted from the resume ⚡")
+
+    @staticmethod
+    def remember_answer(user_query: str, answer: str, fingerprint: str = "", evidence=None, query_vector=None):
+        """
+        Saves a live answer to the exact-match cache and (if enabled) the semantic cache.
+        evidence is an evidence_ref(): chunk ids are stored rather than the chunk text.
+        """
+        text, chunks = (evidence or {}).get("text", ""), (evidence or {}).get("chunks")
+        ResponseCache.set(user_query, answer, fingerprint, evidence=text, chunks=chunks)
+        if SEMANTIC_CACHE_ENABLED:
+            if query_vector is None:
+                query_vector = RAGPipeline.embed_query(user_query)
+            SemanticCache.set(user_query, query_vector, answer, fingerprint, evidence=text, chunks=chunks)
 
-        llm = ChatGroq(model_name=LLM_MODEL, temperature=LLM_TEMPERATURE, groq_api_key=GROQ_API_KEY)
+    @staticmethod
+    def format_evidence(docs):
+        """Joins retrieved chunks into the evidence text shown under an answer."""
+        def label(doc):
+            candidate_id = doc.metadata.get("candidate_id")
+            return f"Chunk ({candidate_id}):" if candidate_id else "Chunk:"
+        return "\n\n---\n\n".join([f"{label(doc)}\n{doc.page_content}" for doc in docs])
+
+    @staticmethod
+    def evidence_ref(docs, fingerprint: str):
+        """
+        What the chat history keeps for an answer's evidence: the chunk ids, resolved by
+        resolve_evidence() only when the evidence is opened. Corpus chunks are kept as text.
+        """
+        if not docs:
+            return None
+        chunks = [doc.metadata.get("chunk") for doc in docs]
+        if CORPUS_MODE or None in chunks:
+            return {"text": RAGPipeline.format_evidence(docs)}
+        return {"fingerprint": fingerprint, "chunks": chunks}
+
+    @staticmethod
+    def cached_evidence(entry, fingerprint: str):
+        """evidence_ref() for a cached answer (cache hits are scoped to the fingerprint), or None."""
+        if entry.chunks:
+            return {"fingerprint": fingerprint, "chunks": entry.chunks}
+        return {"text": entry.evidence} if entry.evidence else None
+
+    @staticmethod
+    def cached_evidence_text(entry, fingerprint: str):
+        """Evidence text of a cached answer, looked up from the index when only chunk ids were stored."""
+        ref = RAGPipeline.cached_evidence(entry, fingerprint)
+        return (RAGPipeline.resolve_evidence(ref) or "") if ref else ""
+
+    @staticmethod
+    def resolve_evidence(ref):
+        """Evidence text for an evidence_ref(), or None once that resume is no longer the live index."""
+        if "text" in ref:
+            return ref["text"]
+        loaded = VectorDBManager.load_active()
+        if not loaded or loaded.fingerprint != ref["fingerprint"]:
+            return None
+        return RAGPipeline.format_evidence(loaded.vector_db.get_chunks(ref["chunks"]))
+
+    @staticmethod
+    def retrieve(loaded, user_query: str, query_vector=None):
+        """
+        Top chunks for the question. With a BM25 index, keyword and vector rankings are fused (RRF)
+        and HYBRID_RETRIEVAL_K chunks are returned; otherwise plain FAISS top RETRIEVAL_K.
+        The ranking is cached per index generation: a repeated question is neither embedded
+        (query_vector may be None) nor searched again.
+        """
+        k = RAGPipeline.retrieval_k(loaded)
+        ranking = RetrievalCache.get(loaded.generation, loaded.fingerprint, user_query, k)
+        if ranking is None:
+            if query_vector is None:
+                query_vector = RAGPipeline.embed_query(user_query)
+            ranking = RAGPipeline.rank_chunks(loaded, user_query, query_vector)
+            RetrievalCache.set(loaded.generation, loaded.fingerprint, user_query, k, ranking)
+        with Metrics.span("chunk_fetch"):
+            return loaded.vector_db.get_chunks([chunk for chunk, _ in ranking])
+
+    @staticmethod
+    def rank_chunks(loaded, user_query: str, query_vector, vector_hits=None, k: int = None):
+        """
+        Ranked (chunk id, score) pairs: FAISS L2 distances, or RRF scores when fused with BM25.
+        A section-routed question only searches (and returns) chunks from its sections.
+        vector_hits: FAISS (chunk id, distance) hits already fetched by a batched search.
+        k: pairs to return (default: the chunks sent to the LLM for this kind of question).
+        """
+        sections = RAGPipeline.route_sections(loaded, user_query)
+        allowed = loaded.vector_db.section_ids(sections) if sections else None
+        Metrics.inc("pria_section_routes_total", section=sections[0] if sections else "none")
+        if vector_hits is None:
+            with Metrics.span("faiss_search"):
+                vector_hits = loaded.vector_db.search_ids([query_vector], k=RAGPipeline.retrieval_depth(loaded),
+                                                          ids=allowed)[0]
+        if k is None:
+            k = SECTION_RETRIEVAL_K if sections else RETRIEVAL_K
+            if HYBRID_SEARCH_ENABLED and loaded.lexical is not None:
+                k = min(k, HYBRID_RETRIEVAL_K)
+        if not HYBRID_SEARCH_ENABLED or loaded.lexical is None:
+            return vector_hits[:k]
+
+        with Metrics.span("bm25_search"):
+            lexical_hits = loaded.lexical.search(user_query, HYBRID_CANDIDATES,
+                                                 allowed=set(allowed) if sections else None)
+        vector_ids = [chunk for chunk, _ in vector_hits]
+        fused = reciprocal_rank_fusion([vector_ids, [doc_id for doc_id, _ in lexical_hits]], k=RRF_K,
+                                       with_scores=True)[:k]
+        # Keyword-only hits are fetched from the chunk store by position like any other
+        Metrics.inc("pria_hybrid_keyword_only_hits_total", sum(1 for chunk, _ in fused if chunk not in vector_ids))
+        return fused
+
+    @staticmethod
+    def route_sections(loaded, user_query: str):
+        """
+        Sections of this index the question should be searched in (see SectionRouter), or None
+        for the whole resume: routing is off, the question has no section intent, or the index has
+        none of those sections (e.g. it was built before section tagging).
+        """
+        if not SECTION_ROUTING_ENABLED:
+            return None
+        wanted = SectionRouter.route(user_query)
+        if not wanted:
+            return None
+        available = loaded.vector_db.sections()
+        return tuple(section for section in wanted if section in available) or None
+
+    @staticmethod
+    def start_text_for(loaded, user_query: str):
+        """The start-of-resume block for the prompt; left out when the question is routed away from the header."""
+        sections = RAGPipeline.route_sections(loaded, user_query)
+        return loaded.start_text if not sections or HEADER_SECTION in sections else ""
+
+    @staticmethod
+    def retrieval_depth(loaded):
+        """FAISS hits rank_chunks() needs per question for this index."""
+        return HYBRID_CANDIDATES if HYBRID_SEARCH_ENABLED and loaded.lexical is not None else RETRIEVAL_K
+
+    @staticmethod
+    def retrieval_k(loaded):
+        """Chunks retrieve() returns for this index."""
+        return HYBRID_RETRIEVAL_K if HYBRID_SEARCH_ENABLED and loaded.lexical is not None else RETRIEVAL_K
+
+    @staticmethod
+    def retrieve_batch(user_queries, query_vectors, candidate_id: str = None):
+        """
+        retrieve() for many questions with one FAISS search call per section routing.
+        Returns (docs per question, start-of-resume text per question), or None when there is no index.
+        """
+        if CORPUS_MODE:
+            if not CandidateCorpus.exists():
+                return None
+            with Metrics.span("faiss_search"):
+                docs = [CandidateCorpus.search(vector, RETRIEVAL_K, [candidate_id] if candidate_id else None)
+                        for vector in query_vectors]
+            candidate = CandidateCorpus.get_candidate(candidate_id) if candidate_id else None
+            return docs, [candidate["start_text"] if candidate else ""] * len(docs)
+
+        with Metrics.span("index_load"):
+            loaded = VectorDBManager.load_active()
+        if not loaded:
+            return None
+        k = RAGPipeline.retrieval_k(loaded)
+        rankings = [RetrievalCache.get(loaded.generation, loaded.fingerprint, query, k) for query in user_queries]
+        # Uncached questions are grouped by the sections they search, one FAISS call per group
+        groups = {}
+        for i, ranking in enumerate(rankings):
+            if ranking is None:
+                groups.setdefault(RAGPipeline.route_sections(loaded, user_queries[i]), []).append(i)
+        for sections, missing in groups.items():
+            with Metrics.span("faiss_search_batch"):
+                hits = loaded.vector_db.search_ids([query_vectors[i] for i in missing],
+                                                   k=RAGPipeline.retrieval_depth(loaded),
+                                                   ids=loaded.vector_db.section_ids(sections) if sections else None)
+            for i, vector_hits in zip(missing, hits):
+                rankings[i] = RAGPipeline.rank_chunks(loaded, user_queries[i], query_vectors[i], vector_hits)
+                RetrievalCache.set(loaded.generation, loaded.fingerprint, user_queries[i], k, rankings[i])
+        with Metrics.span("chunk_fetch"):
+            docs = [loaded.vector_db.get_chunks([chunk for chunk, _ in ranking]) for ranking in rankings]
+        return docs, [RAGPipeline.start_text_for(loaded, query) for query in user_queries]
+
+    @staticmethod
+    def assemble_prompt(user_query: str, docs, start_text: str = ""):
+        """(chat messages, "") for the LLM, or (None, reason) when the resume has nothing relevant."""
+        with Metrics.span("prompt_assembly"):
+            if not docs:
+                Metrics.inc("pria_questions_total", outcome="no_context")
+                return None, "This information is not mentioned in the resume."
+
+            # Overlapping chunks merged, start-block duplicates dropped, packed to CONTEXT_TOKEN_BUDGET
+            context_texts, context_stats = build_context(docs, start_text)
+            if not context_texts.strip():
+                Metrics.inc("pria_questions_total", outcome="no_context")
+                return None, "This information is not mentioned in the resume."
+
+            messages = RAGPipeline.build_messages(context_texts, user_query)
+        RAGPipeline.report_context(context_stats)
+        return messages, ""
+
+    @staticmethod
+    def report_context(stats):
+        """Counts the prompt tokens a question used and saved by context packing."""
+        Metrics.inc("pria_context_tokens_total", stats["tokens_sent"], kind="sent")
+        Metrics.inc("pria_context_tokens_total", stats["tokens_saved"], kind="saved")
+        Metrics.inc("pria_context_chunks_total", stats["merged"], outcome="merged")
+        Metrics.inc("pria_context_chunks_total", stats["covered_by_start"], outcome="covered_by_start")
+        Metrics.inc("pria_context_chunks_total", stats["over_budget"], outcome="over_budget")
+
+    @staticmethod
+    def answer_query(user_query: str, query_vector=None, candidate_id: str = None):
+        """
+        Queries the LLM and returns a text stream + the retrieved documents.
+        In CORPUS_MODE, candidate_id limits retrieval to one candidate's chunks.
+        """
+        if CORPUS_MODE:
+            if not CandidateCorpus.exists():
+                return None, "Error: No resume index found."
+            if query_vector is None:
+                query_vector = RAGPipeline.embed_query(user_query)
+            with Metrics.span("faiss_search"):
+                docs = CandidateCorpus.search(query_vector, RETRIEVAL_K, [candidate_id] if candidate_id else None)
+            with Metrics.span("start_text"):
+                candidate = CandidateCorpus.get_candidate(candidate_id) if candidate_id else None
+                start_text = candidate["start_text"] if candidate else ""
+        else:
+            with Metrics.span("index_load"):
+                loaded = VectorDBManager.load_active()
+            if not loaded:
+                return None, "Error: No resume index found."
 
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", HR_SYSTEM_PROMPT),
-            ("human", "{question}")
-        ])
+            # Embeds the question only if its ranking isn't cached for this index generation
+            docs = RAGPipeline.retrieve(loaded, user_query, query_vector)
+            start_text = RAGPipeline.start_text_for(loaded, user_query)
 
-        chain = prompt | llm | StrOutputParser()
-        
+        messages, reason = RAGPipeline.assemble_prompt(user_query, docs, start_text)
+        if messages is None:
+            return None, reason
 
-        return chain.stream({"context": context_texts, "question": user_query}), docs
+        Metrics.inc("pria_questions_total", outcome="answered")
+        # The Groq request starts when the caller begins iterating; TTFT is timed from there
+        return Metrics.timed_stream(RAGPipeline.get_llm().stream(messages)), docs
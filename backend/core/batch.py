@@ -0,0 +1,180 @@
+"""
+Answers a checklist of questions about one resume in a single pass.
+
+Usage:
+    python -m backend.core.batch checklist.txt --output report.csv
+    python -m backend.core.batch checklist.txt --candidate jane-doe --output report.json   # corpus mode
+
+Profile and cached answers come back first. The rest are embedded in one call and searched with one
+FAISS call, then their LLM calls fan out concurrently; LLMClient keeps them (and any live chat)
+under the shared requests/tokens-per-minute budget (LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE). Results are yielded as each question finishes,
+so wall time approaches the slowest single answer rather than the sum.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Allow `python backend/core/batch.py` as well as `python -m backend.core.batch`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.config import BATCH_MAX_CONCURRENT, BATCH_MAX_QUESTIONS, SEMANTIC_CACHE_ENABLED
+from backend.core.agent import RAGPipeline
+from backend.core.database import VectorDBManager
+from backend.utils.cache_manager import ResponseCache, SemanticCache
+from backend.utils.metrics import Metrics
+from backend.utils.query_logger import QueryLogger
+
+REPORT_FIELDS = ["index", "question", "answer", "source", "evidence", "seconds", "error"]
+
+
+
+def parse_checklist(text: str):
+    """One question per line; blank lines, bullets and numbering are ignored."""
+    questions = []
+    for line in text.splitlines():
+        line = line.strip().lstrip("-*•").strip()
+        head, _, rest = line.partition(" ")
+        if rest and head.rstrip(".)").isdigit():
+            line = rest.strip()
+        if line:
+            questions.append(line)
+    return questions
+
+
+class BatchAnswerer:
+    """Runs a list of questions through RAGPipeline with batched retrieval and scheduled LLM calls."""
+
+    def __init__(self, max_concurrent: int = BATCH_MAX_CONCURRENT, llm=None):
+        self.max_concurrent = max(1, max_concurrent)
+        self.llm = llm or RAGPipeline.get_llm()
+
+    def run(self, questions, candidate_id: str = None):
+        """
+        Yields one result dict per question (see REPORT_FIELDS) as soon as it is answered:
+        instant answers first, then live answers in completion order.
+        """
+        questions = [q.strip() for q in questions if q and q.strip()][:BATCH_MAX_QUESTIONS]
+        started = time.perf_counter()
+        fingerprint = VectorDBManager.current_fingerprint(candidate_id)
+
+        def result(index, question, answer="", source="", evidence="", error=""):
+            Metrics.inc("pria_batch_questions_total", source=source or "error")
+            if answer:
+                QueryLogger.log(question, answer, source=f"batch/{source}")
+            return {"index": index, "question": question, "answer": answer, "source": source,
+                    "evidence": evidence, "seconds": round(time.perf_counter() - started, 3), "error": error}
+
+        pending = []
+        for index, question in enumerate(questions):
+            entry, source = RAGPipeline.answer_from_profile(question, candidate_id), "profile"
+            if entry is None:
+                entry, source = ResponseCache.get(question, fingerprint), "cache"
+            if entry is not None:
+                yield result(index, question, entry.answer, source, RAGPipeline.cached_evidence_text(entry, fingerprint))
+            else:
+                pending.append((index, question))
+        if not pending:
+            return
+
+        # One embedding call for every remaining question not seen before
+        vectors = RAGPipeline.embed_queries([q for _, q in pending])
+        live = []
+        for (index, question), vector in zip(pending, vectors):
+            match = SemanticCache.get(vector, fingerprint) if SEMANTIC_CACHE_ENABLED else None
+            if match:
+                yield result(index, question, match[0].answer, "semantic-cache",
+                             RAGPipeline.cached_evidence_text(match[0], fingerprint))
+            else:
+                live.append((index, question, vector))
+        if not live:
+            return
+
+        retrieved = RAGPipeline.retrieve_batch([q for _, q, _ in live], [v for _, _, v in live], candidate_id)
+        if retrieved is None:
+            for index, question, _ in live:
+                yield result(index, question, error="No resume index found.")
+            return
+        docs_per_question, start_texts = retrieved
+
+        calls = []
+        for (index, question, vector), docs, start_text in zip(live, docs_per_question, start_texts):
+            messages, reason = RAGPipeline.assemble_prompt(question, docs, start_text)
+            if messages is None:
+                yield result(index, question, reason, "no-context")
+            else:
+                calls.append((index, question, vector, docs, messages))
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="batch-llm") as pool:
+            # Submitted in checklist order, so the LLM client's rate-limit reservations follow that order too
+            futures = [pool.submit(self._generate, call, fingerprint) for call in calls]
+            for future in as_completed(futures):
+                index, question, answer, evidence, error = future.result()
+                yield result(index, question, answer, "live" if answer else "", evidence, error)
+
+    def _generate(self, call, fingerprint):
+        """Worker: streams one answer (the LLM client waits for rate-limit budget), caches it. Never raises."""
+        index, question, vector, docs, messages = call
+        try:
+            answer = "".join(Metrics.timed_stream(self.llm.stream(messages))).strip()
+            evidence = RAGPipeline.format_evidence(docs)
+            if answer:
+                RAGPipeline.remember_answer(question, answer, fingerprint,
+                                            evidence=RAGPipeline.evidence_ref(docs, fingerprint), query_vector=vector)
+            return index, question, answer, evidence, "" if answer else "Empty answer from the LLM."
+        except Exception as e:
+            print(f"[BATCH] Failed on '{question}': {e}")
+            return index, question, "", "", str(e)
+
+
+def format_report(results, fmt: str = "csv"):
+    """Results as CSV or JSON text, sorted back into checklist order."""
+    rows = sorted(results, key=lambda r: r["index"])
+    if fmt == "json":
+        return json.dumps(rows, indent=2, ensure_ascii=False)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPORT_FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def write_report(results, path: str):
+    """Writes the report as CSV or JSON, picked by the file extension."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(format_report(results, "json" if path.lower().endswith(".json") else "csv"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a checklist of questions about the indexed resume.")
+    parser.add_argument("checklist", help="Text file with one question per line ('-' for stdin)")
+    parser.add_argument("--candidate", help="Corpus mode: candidate id to ask about")
+    parser.add_argument("--output", default="batch_report.csv", help="Report file (.csv or .json)")
+    parser.add_argument("--concurrency", type=int, default=BATCH_MAX_CONCURRENT, help="LLM calls in flight")
+    args = parser.parse_args(argv)
+
+    if args.checklist == "-":
+        questions = parse_checklist(sys.stdin.read())
+    else:
+        with open(args.checklist, "r", encoding="utf-8") as f:
+            questions = parse_checklist(f.read())
+
+    started = time.perf_counter()
+    results = []
+    for item in BatchAnswerer(args.concurrency).run(questions, args.candidate):
+        results.append(item)
+        status = item["source"] or f"error: {item['error']}"
+        print(f"[BATCH] {item['seconds']:7.2f}s  #{item['index'] + 1} ({status}) {item['question'][:60]}")
+    write_report(results, args.output)
+    failed = sum(1 for r in results if r["error"])
+    print(f"[BATCH] {len(results)} questions in {time.perf_counter() - started:.2f}s "
+          f"({failed} failed) -> {args.output}")
+    return 0 if results and not failed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
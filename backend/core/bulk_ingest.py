@@ -0,0 +1,186 @@
+"""
+Headless bulk ingestion of resume folders into the multi-resume corpus.
+
+Usage:
+    python -m backend.core.bulk_ingest resumes/ "archive/**/*.pdf" --report failures.jsonl
+
+Parsing runs in a process pool, chunks are embedded in large batches, and each batch is
+appended to the corpus index incrementally. Failures are streamed to the report file
+instead of aborting the run.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Allow `python backend/core/bulk_ingest.py` as well as `python -m backend.core.bulk_ingest`
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from backend.config import BULK_PARSE_WORKERS, BULK_EMBED_BATCH
+from backend.utils.parsers import extract_text_from_pdf, extract_text_from_docx
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx")
+
+
+def collect_paths(targets):
+    """Expands directories (recursively) and glob patterns into a sorted list of resume files."""
+    paths = set()
+    for target in targets:
+        if os.path.isdir(target):
+            for root, _, files in os.walk(target):
+                paths.update(os.path.join(root, f) for f in files if f.lower().endswith(SUPPORTED_EXTENSIONS))
+        else:
+            matches = glob.glob(target, recursive=True) or [target]
+            paths.update(p for p in matches if p.lower().endswith(SUPPORTED_EXTENSIONS))
+    return sorted(paths)
+
+
+def parse_file(path):
+    """Process-pool worker: returns (path, text, error, seconds). Never raises."""
+    start = time.perf_counter()
+    try:
+        if path.lower().endswith(".pdf"):
+            # Files are already parsed in parallel processes; pages stay serial within one
+            text = extract_text_from_pdf(path, workers=1)
+        else:
+            text = extract_text_from_docx(path)
+        error = None if text.strip() else "Empty resume or unreadable scanned image."
+    except Exception as e:
+        text, error = "", f"{type(e).__name__}: {e}"
+    return path, text, error, time.perf_counter() - start
+
+
+class BulkIngestor:
+    """Buffers parsed resumes and flushes them to the corpus one embedding batch at a time."""
+
+    def __init__(self, embed_batch: int = BULK_EMBED_BATCH, report=None):
+        from backend.core.database import VectorDBManager
+        from backend.core.registry import IndexRegistry
+
+        self._split = VectorDBManager.split_text
+        self._embeddings = IndexRegistry.get_ingest_embeddings()
+        self.embed_batch = embed_batch
+        self.report = report
+        self.pending = []
+        self.pending_chunks = 0
+        self.timings = {"parse_cpu": 0.0, "chunk": 0.0, "embed": 0.0, "index": 0.0}
+        self.counts = {"docs": 0, "chunks": 0, "failed": 0, "embeddings_reused": 0, "embeddings_computed": 0}
+
+    def add(self, path, text):
+        start = time.perf_counter()
+        chunks = self._split(text)
+        self.timings["chunk"] += time.perf_counter() - start
+        self.pending.append((path, text, chunks))
+        self.pending_chunks += len(chunks)
+        if self.pending_chunks >= self.embed_batch:
+            self.flush()
+
+    def fail(self, path, stage, error):
+        self.counts["failed"] += 1
+        if self.report:
+            self.report.write(json.dumps({"path": path, "stage": stage, "error": error}) + "\n")
+            self.report.flush()
+
+    def flush(self):
+        from backend.core.corpus import CandidateCorpus
+
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_chunks = self.pending, [], 0
+        try:
+            start = time.perf_counter()
+            vectors, reused, computed = self._embeddings.embed_documents_with_stats(
+                [c for _, _, chunks in batch for c in chunks]
+            )
+            self.timings["embed"] += time.perf_counter() - start
+
+            records, offset = [], 0
+            for path, text, chunks in batch:
+                records.append((text, chunks, vectors[offset:offset + len(chunks)], os.path.basename(path), None))
+                offset += len(chunks)
+
+            start = time.perf_counter()
+            CandidateCorpus.add_candidates(records)
+            self.timings["index"] += time.perf_counter() - start
+        except Exception as e:
+            for path, _, _ in batch:
+                self.fail(path, "embed/index", f"{type(e).__name__}: {e}")
+            return
+
+        self.counts["docs"] += len(batch)
+        self.counts["embeddings_reused"] += reused
+        self.counts["embeddings_computed"] += computed
+        self.counts["chunks"] += sum(len(chunks) for _, _, chunks in batch)
+
+
+def run(targets, workers: int = BULK_PARSE_WORKERS, embed_batch: int = BULK_EMBED_BATCH, report_path: str = None):
+    """Ingests every resume under targets and returns a summary dict."""
+    paths = collect_paths(targets)
+    report = open(report_path, "a", encoding="utf-8") if report_path else None
+    started = time.perf_counter()
+    try:
+        ingestor = BulkIngestor(embed_batch, report)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Bounded in-flight work keeps parsed text for at most a few batches in memory
+            futures, next_path = set(), iter(paths)
+            for path in next_path:
+                futures.add(pool.submit(parse_file, path))
+                if len(futures) >= workers * 4:
+                    break
+            while futures:
+                done = next(as_completed(futures))
+                futures.remove(done)
+                path, text, error, seconds = done.result()
+                ingestor.timings["parse_cpu"] += seconds
+                if error:
+                    ingestor.fail(path, "parse", error)
+                else:
+                    ingestor.add(path, text)
+                for path in next_path:
+                    futures.add(pool.submit(parse_file, path))
+                    break
+        ingestor.flush()
+    finally:
+        if report:
+            report.close()
+
+    wall = time.perf_counter() - started
+    counts, timings = ingestor.counts, ingestor.timings
+    return {
+        "files": len(paths),
+        "docs": counts["docs"],
+        "chunks": counts["chunks"],
+        "failed": counts["failed"],
+        "embeddings_reused": counts["embeddings_reused"],
+        "embeddings_computed": counts["embeddings_computed"],
+        "wall_seconds": round(wall, 3),
+        "docs_per_sec": round(counts["docs"] / wall, 2) if wall else 0.0,
+        "chunks_per_sec": round(counts["chunks"] / wall, 2) if wall else 0.0,
+        "stage_seconds": {name: round(value, 3) for name, value in timings.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-ingest PDF/DOCX resumes into the candidate corpus.")
+    parser.add_argument("targets", nargs="+", help="Directories or glob patterns of resumes")
+    parser.add_argument("--workers", type=int, default=BULK_PARSE_WORKERS, help="Parser processes")
+    parser.add_argument("--embed-batch", type=int, default=BULK_EMBED_BATCH, help="Chunks per embedding call")
+    parser.add_argument("--report", default="ingest_failures.jsonl", help="JSONL file for failed files")
+    args = parser.parse_args(argv)
+
+    summary = run(args.targets, args.workers, args.embed_batch, args.report)
+
+    print(f"[BULK INGEST] {summary['docs']}/{summary['files']} resumes, {summary['chunks']} chunks "
+          f"in {summary['wall_seconds']:.2f}s ({summary['failed']} failed -> {args.report})")
+    print(f"[BULK INGEST] {summary['docs_per_sec']} docs/sec | {summary['chunks_per_sec']} chunks/sec")
+    print(f"[BULK INGEST] embeddings: {summary['embeddings_reused']} reused, {summary['embeddings_computed']} computed")
+    for stage, seconds in summary["stage_seconds"].items():
+        print(f"[BULK INGEST]   {stage:<10} {seconds:8.3f}s")
+    return 0 if summary["docs"] or not summary["files"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+"""
+Multi-resume corpus: one ANN index for thousands of candidates plus a SQLite chunk store.
+Each candidate owns a contiguous FAISS id range, so adding or removing one candidate
+touches only that candidate's vectors.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from backend.config import (
+    CORPUS_DB_PATH, CORPUS_INDEX_TYPE, CORPUS_IVF_NLIST, CORPUS_IVF_NPROBE,
+    CORPUS_HNSW_M, CORPUS_HNSW_EF_SEARCH, CORPUS_CANDIDATE_CACHE
+)
+from backend.exceptions.custom_exceptions import VectorDatabaseError, CandidateNotFoundError
+from backend.utils.profile_extractor import extract_profile
+
+CORPUS_INDEX_FILE = os.path.join(CORPUS_DB_PATH, "index.faiss")
+CORPUS_STORE_FILE = os.path.join(CORPUS_DB_PATH, "corpus.db")
+
+# FAISS id = (candidate number << CHUNK_ID_BITS) | chunk number -> one id range per candidate
+CHUNK_ID_BITS = 20
+
+# IVF needs roughly this many training points per list; below that we stay on an exact flat index
+IVF_MIN_POINTS_PER_LIST = 39
+
+
+def chunk_id(candidate_num: int, chunk_idx: int) -> int:
+    return (candidate_num << CHUNK_ID_BITS) | chunk_idx
+
+
+def make_candidate_id(source_name: str, fingerprint: str) -> str:
+    """Readable, stable id: file stem slug + short content hash (e.g. 'jane-doe-cv-3fa91c')."""
+    stem = os.path.splitext(os.path.basename(source_name or "resume"))[0]
+    slug = re.sub(r"[^a-z0-9]+", "-", stem.lower()).strip("-")[:40] or "resume"
+    return f"{slug}-{fingerprint[:6]}"
+
+
+class CandidateCorpus:
+    """
+    Wrapper around the corpus index.
+    - "ivf": exact flat index until there are enough vectors to train IVF, then IVF with nprobe.
+    - "hnsw": HNSW graph with efSearch; removed candidates are tombstoned until compact().
+    Filtered (per-candidate) search scans only that candidate's vectors, so its cost does not
+    grow with the corpus.
+    """
+
+    _lock = threading.RLock()
+    _conn = None
+    _index = None
+    _index_stamp = None
+    _tombstones = None
+    _blocks = OrderedDict()
+    _stats = {"added": 0, "removed": 0, "searches": 0, "filtered_searches": 0, "ivf_migrations": 0}
+
+    # ---------- write path ----------
+
+    @classmethod
+    def add_candidate(cls, text: str, chunks, vectors, source_name: str = "", candidate_id: str = None):
+        """Adds one resume (already chunked + embedded). Replaces it if the candidate id exists."""
+        return cls.add_candidates([(text, chunks, vectors, source_name, candidate_id)])[0]
+
+    @classmethod
+    def add_candidates(cls, records):
+        """
+        Appends many resumes in one transaction and one index write.
+        records: iterable of (text, chunks, vectors, source_name, candidate_id or None).
+        Returns the candidate ids in the same order.
+        """
+        prepared = []
+        for text, chunks, vectors, source_name, candidate_id in records:
+            fingerprint = hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+            vectors = _unit_rows(vectors)
+            if len(chunks) != len(vectors):
+                raise VectorDatabaseError("Chunk and vector counts differ.")
+            if len(chunks) >= (1 << CHUNK_ID_BITS):
+                raise VectorDatabaseError("Resume has too many chunks for one candidate.")
+            prepared.append((
+                text, chunks, vectors, source_name,
+                candidate_id or make_candidate_id(source_name, fingerprint), fingerprint
+            ))
+        if not prepared:
+            return []
+        # The same candidate twice in one batch: the last copy wins
+        unique = list({p[4]: p for p in prepared}.values())
+
+        with cls._lock:
+            conn = cls._connection()
+            cls._ensure_index(unique[0][2].shape[1])
+            with conn:
+                # Numbers are never reused: a removed candidate's ids may still be tombstoned in the graph
+                num = conn.execute("SELECT value FROM meta WHERE key = 'last_num'").fetchone()[0]
+                all_ids, all_vectors = [], []
+                for text, chunks, vectors, source_name, candidate_id, fingerprint in unique:
+                    if cls._candidate_num(candidate_id) is not None:
+                        cls._remove_locked(candidate_id)
+                    num += 1
+                    ids = np.array([chunk_id(num, i) for i in range(len(chunks))], dtype=np.int64)
+                    conn.execute(
+                        "INSERT INTO candidates "
+                        "(candidate_id, num, source_name, fingerprint, start_text, chunks, created, profile) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (candidate_id, num, source_name, fingerprint, text[:1000], len(chunks), time.time(),
+                         json.dumps(extract_profile(text), separators=(",", ":")))
+                    )
+                    conn.executemany(
+                        "INSERT INTO chunks (id, candidate_num, chunk_idx, text, vector) VALUES (?, ?, ?, ?, ?)",
+                        [(int(ids[i]), num, i, chunks[i], vectors[i].tobytes()) for i in range(len(chunks))]
+                    )
+                    all_ids.append(ids)
+                    all_vectors.append(vectors)
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'last_num'", (num,))
+                cls._index.add_with_ids(np.vstack(all_vectors), np.concatenate(all_ids))
+                cls._maybe_migrate_to_ivf()
+                cls._save_index()
+            cls._stats["added"] += len(unique)
+        return [p[4] for p in prepared]
+
+    @classmethod
+    def remove_candidate(cls, candidate_id: str):
+        """Removes one candidate's vectors and chunks without rebuilding the index."""
+        with cls._lock:
+            conn = cls._connection()
+            cls._ensure_index()
+            with conn:
+                if cls._candidate_num(candidate_id) is None:
+                    raise CandidateNotFoundError(f"Unknown candidate: {candidate_id}")
+                cls._remove_locked(candidate_id)
+                cls._save_index()
+            cls._stats["removed"] += 1
+
+    @classmethod
+    def compact(cls):
+        """HNSW only: rebuilds the graph without tombstoned vectors. A no-op for IVF/flat."""
+        with cls._lock:
+            conn = cls._connection()
+            cls._ensure_index()
+            if cls._index is None or not cls._tombstones:
+                return
+            rows = conn.execute("SELECT id, vector FROM chunks ORDER BY id").fetchall()
+            cls._index = cls._new_hnsw(cls._index.d)
+            if rows:
+                cls._index.add_with_ids(
+                    np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows]),
+                    np.array([r[0] for r in rows], dtype=np.int64)
+                )
+            with conn:
+                conn.execute("DELETE FROM tombstones")
+                cls._tombstones = set()
+                cls._save_index()
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            if cls._conn is not None:
+                cls._conn.close()
+            cls._conn, cls._index, cls._index_stamp, cls._tombstones = None, None, None, None
+            cls._blocks.clear()
+            if os.path.exists(CORPUS_DB_PATH):
+                shutil.rmtree(CORPUS_DB_PATH)
+
+    # ---------- read path ----------
+
+    @classmethod
+    def search(cls, query_vector, k: int, candidate_ids=None):
+        """Top-k chunks as Documents. candidate_ids restricts the search to those candidates."""
+        q = _unit_rows([query_vector])
+        with cls._lock:
+            cls._connection()
+            if candidate_ids:
+                cls._stats["filtered_searches"] += 1
+                return cls._search_candidates(q[0], k, candidate_ids)
+
+            cls._stats["searches"] += 1
+            cls._ensure_index()
+            if cls._index is None or cls._index.ntotal == 0:
+                return []
+            scores, ids = cls._index.search(q, k, params=cls._search_params())
+            hits = [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i != -1]
+            return cls._fetch_chunks(hits)
+
+    @classmethod
+    def get_candidate(cls, candidate_id: str):
+        """Returns the candidate's row (source, fingerprint, start text, chunk count) or None."""
+        with cls._lock:
+            row = cls._connection().execute(
+                "SELECT candidate_id, source_name, fingerprint, start_text, chunks, created "
+                "FROM candidates WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        keys = ["candidate_id", "source_name", "fingerprint", "start_text", "chunks", "created"]
+        return dict(zip(keys, row))
+
+    @classmethod
+    def get_profile(cls, candidate_id: str):
+        """Structured fields extracted when the candidate was added, or None."""
+        with cls._lock:
+            row = cls._connection().execute(
+                "SELECT profile FROM candidates WHERE candidate_id = ?", (candidate_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    @classmethod
+    def list_candidates(cls):
+        with cls._lock:
+            if not os.path.exists(CORPUS_STORE_FILE):
+                return []
+            rows = cls._connection().execute(
+                "SELECT candidate_id, source_name, chunks FROM candidates ORDER BY num"
+            ).fetchall()
+        return [{"candidate_id": r[0], "source_name": r[1], "chunks": r[2]} for r in rows]
+
+    @classmethod
+    def fingerprint(cls, candidate_id: str = None):
+        """Cache scope: the candidate's resume hash, or the corpus index stamp for corpus-wide questions."""
+        if candidate_id:
+            candidate = cls.get_candidate(candidate_id)
+            return candidate["fingerprint"] if candidate else ""
+        try:
+            st = os.stat(CORPUS_INDEX_FILE)
+        except OSError:
+            return ""
+        return f"corpus-{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    @classmethod
+    def exists(cls):
+        return os.path.exists(CORPUS_INDEX_FILE)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            cls._connection()
+            if cls.exists():
+                cls._ensure_index()
+            stats["index_type"] = _index_kind(cls._index) if cls._index is not None else None
+            stats["vectors"] = cls._index.ntotal if cls._index is not None else 0
+            stats["tombstones"] = len(cls._tombstones or ())
+            stats["candidates"] = len(cls.list_candidates())
+        return stats
+
+    # ---------- internals (callers hold cls._lock) ----------
+
+    @classmethod
+    def _remove_locked(cls, candidate_id):
+        conn = cls._conn
+        num = cls._candidate_num(candidate_id)
+        lo, hi = chunk_id(num, 0), chunk_id(num + 1, 0)
+        if _index_kind(cls._index) == "hnsw":
+            conn.execute("INSERT OR IGNORE INTO tombstones (id) SELECT id FROM chunks WHERE candidate_num = ?", (num,))
+            cls._tombstones.update(r[0] for r in conn.execute("SELECT id FROM chunks WHERE candidate_num = ?", (num,)))
+        elif cls._index is not None:
+            import faiss
+            cls._index.remove_ids(faiss.IDSelectorRange(lo, hi))
+        conn.execute("DELETE FROM chunks WHERE candidate_num = ?", (num,))
+        conn.execute("DELETE FROM candidates WHERE num = ?", (num,))
+        cls._blocks.pop(num, None)
+
+    @classmethod
+    def _candidate_num(cls, candidate_id):
+        row = cls._conn.execute("SELECT num FROM candidates WHERE candidate_id = ?", (candidate_id,)).fetchone()
+        return row[0] if row else None
+
+    @classmethod
+    def _search_candidates(cls, q, k, candidate_ids):
+        """Exact scan over the selected candidates' vectors (cached per candidate)."""
+        ids, matrices = [], []
+        for candidate_id in candidate_ids:
+            num = cls._candidate_num(candidate_id)
+            if num is None:
+                continue
+            block = cls._blocks.get(num)
+            if block is None:
+                rows = cls._conn.execute(
+                    "SELECT id, vector FROM chunks WHERE candidate_num = ? ORDER BY chunk_idx", (num,)
+                ).fetchall()
+                if not rows:
+                    continue
+                block = (
+                    np.array([r[0] for r in rows], dtype=np.int64),
+                    np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+                )
+                cls._blocks[num] = block
+                while len(cls._blocks) > CORPUS_CANDIDATE_CACHE:
+                    cls._blocks.popitem(last=False)
+            cls._blocks.move_to_end(num)
+            ids.append(block[0])
+            matrices.append(block[1])
+
+        if not ids:
+            return []
+        all_ids, scores = np.concatenate(ids), np.vstack(matrices) @ q
+        top = np.argsort(-scores)[:k]
+        return cls._fetch_chunks([(int(all_ids[i]), float(scores[i])) for i in top])
+
+    @classmethod
+    def _fetch_chunks(cls, hits):
+        from langchain_core.documents import Document
+
+        if not hits:
+            return []
+        placeholders = ",".join("?" * len(hits))
+        rows = cls._conn.execute(
+            "SELECT c.id, c.text, c.chunk_idx, k.candidate_id, k.source_name FROM chunks c "
+            f"JOIN candidates k ON k.num = c.candidate_num WHERE c.id IN ({placeholders})",
+            [h[0] for h in hits]
+        ).fetchall()
+        by_id = {r[0]: r for r in rows}
+        results = []
+        for hit_id, score in hits:
+            row = by_id.get(hit_id)
+            if row:
+                results.append(Document(page_content=row[1], metadata={
+                    "candidate_id": row[3], "source": row[4], "chunk": row[2], "score": round(score, 4)
+                }))
+        return results
+
+    @classmethod
+    def _search_params(cls):
+        import faiss
+
+        kind = _index_kind(cls._index)
+        if kind == "ivf":
+            return faiss.SearchParametersIVF(nprobe=CORPUS_IVF_NPROBE)
+        if kind == "hnsw":
+            params = faiss.SearchParametersHNSW(efSearch=CORPUS_HNSW_EF_SEARCH)
+            if cls._tombstones:
+                excluded = faiss.IDSelectorBatch(np.array(sorted(cls._tombstones), dtype=np.int64))
+                params.sel = faiss.IDSelectorNot(excluded)
+                # The selector objects must outlive the search call
+                params._refs = (excluded, params.sel)
+            return params
+        return None
+
+    @classmethod
+    def _ensure_index(cls, dim: int = None):
+        """Loads (or reloads, if another process rewrote it) the index; creates one when dim is given."""
+        import faiss
+
+        try:
+            st = os.stat(CORPUS_INDEX_FILE)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+
+        if stamp is not None and stamp != cls._index_stamp:
+            cls._index = faiss.read_index(CORPUS_INDEX_FILE)
+            cls._index_stamp = stamp
+            cls._tombstones = {r[0] for r in cls._conn.execute("SELECT id FROM tombstones")}
+            cls._blocks.clear()
+        elif stamp is None and cls._index is None and dim is not None:
+            if CORPUS_INDEX_TYPE == "hnsw":
+                cls._index = cls._new_hnsw(dim)
+            else:
+                cls._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+            cls._tombstones = set()
+
+    @classmethod
+    def _new_hnsw(cls, dim):
+        import faiss
+        return faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, CORPUS_HNSW_M, faiss.METRIC_INNER_PRODUCT))
+
+    @classmethod
+    def _maybe_migrate_to_ivf(cls):
+        """One-time switch from the exact flat index to IVF once there is enough data to train it."""
+        import faiss
+
+        if CORPUS_INDEX_TYPE != "ivf" or _index_kind(cls._index) != "flat":
+            return
+        if cls._index.ntotal < CORPUS_IVF_NLIST * IVF_MIN_POINTS_PER_LIST:
+            return
+        rows = cls._conn.execute("SELECT id, vector FROM chunks ORDER BY id").fetchall()
+        ids = np.array([r[0] for r in rows], dtype=np.int64)
+        vectors = np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows])
+        quantizer = faiss.IndexFlatIP(vectors.shape[1])
+        ivf = faiss.IndexIVFFlat(quantizer, vectors.shape[1], CORPUS_IVF_NLIST, faiss.METRIC_INNER_PRODUCT)
+        ivf.train(vectors)
+        ivf.add_with_ids(vectors, ids)
+        cls._index = ivf
+        cls._stats["ivf_migrations"] += 1
+
+    @classmethod
+    def _save_index(cls):
+        """Writes the index next to the store and swaps it in atomically."""
+        import faiss
+
+        tmp_path = CORPUS_INDEX_FILE + ".tmp"
+        faiss.write_index(cls._index, tmp_path)
+        os.replace(tmp_path, CORPUS_INDEX_FILE)
+        st = os.stat(CORPUS_INDEX_FILE)
+        cls._index_stamp = (st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def _connection(cls):
+        if cls._conn is None:
+            os.makedirs(CORPUS_DB_PATH, exist_ok=True)
+            conn = sqlite3.connect(CORPUS_STORE_FILE, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS candidates ("
+                "candidate_id TEXT PRIMARY KEY, num INTEGER UNIQUE, source_name TEXT, fingerprint TEXT, "
+                "start_text TEXT, chunks INTEGER, created REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS chunks ("
+                "id INTEGER PRIMARY KEY, candidate_num INTEGER, chunk_idx INTEGER, text TEXT, vector BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_chunks_candidate ON chunks (candidate_num)")
+            conn.execute("CREATE TABLE IF NOT EXISTS tombstones (id INTEGER PRIMARY KEY)")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER)")
+            # Stores created before the counter: start above every number still in use or tombstoned
+            conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) SELECT 'last_num', MAX("
+                "(SELECT COALESCE(MAX(num), 0) FROM candidates), "
+                f"(SELECT COALESCE(MAX(id >> {CHUNK_ID_BITS}), 0) FROM tombstones))"
+            )
+            # Stores created before profile extraction
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(candidates)")}
+            if "profile" not in columns:
+                conn.execute("ALTER TABLE candidates ADD COLUMN profile TEXT")
+            conn.commit()
+            cls._conn = conn
+        return cls._conn
+
+
+def _index_kind(index):
+    import faiss
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    if isinstance(inner, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    return "flat"
+
+
+def _unit_rows(vectors):
+    """float32 matrix with every row scaled to length 1 (inner product == cosine)."""
+    matrix = np.array(vectors, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -1,75 +1,276 @@
 """Manages the FAISS vector database initialization and operations."""
+import hashlib
+import io
+import json
 import os
 import shutil
-import tempfile
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from backend.config import FAISS_DB_PATH, EMBEDDING_MODEL, CHUNK_SIZE, CHUNK_OVERLAP, PROJECT_ROOT
-from backend.utils.parsers import extract_text_from_pdf, extract_text_from_docx
-from backend.exceptions.custom_exceptions import UnsupportedFileFormatError, EmptyResumeError, VectorDatabaseError
-from backend.utils.cache_manager import ResponseCache
-
-RESUME_START_FILE = os.path.join(PROJECT_ROOT, "resume_start.txt")
+from backend.config import CHUNK_SIZE, CHUNK_OVERLAP, CORPUS_MODE, INGEST_PROGRESS_BATCH, SECTION_CHUNKING_ENABLED
+from backend.exceptions.custom_exceptions import (
+    UnsupportedFileFormatError, EmptyResumeError, VectorDatabaseError, DocumentProcessingError
+)
+from backend.utils.cache_manager import ResponseCache, SemanticCache
+from backend.utils.metrics import Metrics
+from backend.core.registry import (
+    IndexRegistry, RESUME_START_FILE, INDEX_META_FILE, LEXICAL_INDEX_FILE, PROFILE_FILE, active_directory
+)
+from backend.utils.lexical_index import BM25Index
+from backend.utils.vector_store import MappedVectorStore
+from backend.utils.profile_extractor import (
+    ProfileExtractor, PROFILE_FIELDS, LIST_FIELDS, HEADER_SECTION, heading_section
+)
+from backend.core.precompute import FAQPrecomputer
+from backend.core.corpus import CandidateCorpus
 
 class VectorDBManager:
     """Wrapper class for FAISS operations."""
     
     @staticmethod
-    def process_file_and_create_db(uploaded_file):
-        """Takes an uploaded file, extracts text, and builds the FAISS index."""
-        with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(uploaded_file.name)[1]) as tmp:
-            tmp.write(uploaded_file.getvalue())
-            tmp_path = tmp.name
-
+    def process_file_and_create_db(uploaded_file, precompute_faqs: bool = False, candidate_id: str = None,
+                                   progress=None):
+        """
+        Takes an uploaded file, extracts text, and builds the FAISS index.
+        The new index is built in a staging directory and published atomically; until then (and for
+        queries already running) the previous resume stays live. Returns the published generation.
+        progress(stage, done, total) is called as the build advances (see IngestJob).
+        With precompute_faqs=True, FAQ answers are generated in the background afterwards
+        (see FAQPrecomputer.progress()).
+        In CORPUS_MODE the resume is added to the corpus instead (the candidate id is returned).
+        """
+        progress = progress or (lambda stage, done=0, total=0: None)
+        staging = None
         try:
-            ext = os.path.splitext(uploaded_file.name)[1].lower()
-            if ext == ".pdf":
-                text = extract_text_from_pdf(tmp_path)
-            elif ext == ".docx":
-                text = extract_text_from_docx(tmp_path)
-            else:
-                raise UnsupportedFileFormatError("Please strictly upload a PDF or DOCX resume.")
+            if CORPUS_MODE:
+                progress("extract")
+                with Metrics.span("ingest_extract"):
+                    text = VectorDBManager.extract_text(uploaded_file)
+                progress("embed")
+                return VectorDBManager.add_candidate(text, uploaded_file.name, candidate_id)
 
-            if not text.strip():
+            # Pages stream straight from the upload into the splitter; the full text is never held
+            progress("extract")
+            with Metrics.span("ingest_extract_split"):
+                # Structured fields (email, phone, skills...) are picked up from the same pass
+                extractor = ProfileExtractor()
+                sections = extractor.tap(VectorDBManager._iter_sections(uploaded_file))
+                chunks, chunk_sections, start_text, fingerprint = VectorDBManager.split_stream(sections)
+                profile = extractor.result()
+            if not chunks:
                 raise EmptyResumeError("Empty resume or unreadable scanned image. File must contain real text.")
 
-            # Clear old index to maintain single resume state
-            VectorDBManager.delete_db()
+            # Unchanged chunks (e.g. re-uploading an edited resume) reuse their cached vectors
+            vectors, reused, computed = [], 0, 0
+            embeddings = IndexRegistry.get_ingest_embeddings()
+            with Metrics.span("ingest_embed"):
+                for i in range(0, len(chunks), INGEST_PROGRESS_BATCH):
+                    progress("embed", i, len(chunks))
+                    batch_vectors, batch_reused, batch_computed = \
+                        embeddings.embed_documents_with_stats(chunks[i:i + INGEST_PROGRESS_BATCH])
+                    vectors.extend(batch_vectors)
+                    reused += batch_reused
+                    computed += batch_computed
+            progress("embed", len(chunks), len(chunks))
 
+            # Everything goes into a private staging directory; nothing live is touched until publish()
+            progress("index")
+            staging = IndexRegistry.staging_directory()
             # Save the first 1000 characters to ensure Name/Contact info is never missed by vector search
-            with open(RESUME_START_FILE, "w", encoding="utf-8") as f:
-                f.write(text[:1000])
+            with open(os.path.join(staging, RESUME_START_FILE), "w", encoding="utf-8") as f:
+                f.write(start_text)
+            with Metrics.span("ingest_bm25"):
+                BM25Index.build(chunks).save(os.path.join(staging, LEXICAL_INDEX_FILE))
+            with open(os.path.join(staging, PROFILE_FILE), "w", encoding="utf-8") as f:
+                json.dump(profile, f, separators=(",", ":"))
+            with Metrics.span("ingest_index_write"):
+                # metadata["chunk"] is the chunk position, shared with the BM25 index for rank fusion;
+                # metadata["section"] lets section-routed questions search only part of the resume
+                MappedVectorStore.build(staging, chunks, vectors, metadatas=[
+                    {"chunk": i, "section": section} for i, section in enumerate(chunk_sections)])
+            # Fingerprint identifies this resume version for the registry and caches
+            with open(os.path.join(staging, INDEX_META_FILE), "w", encoding="utf-8") as f:
+                json.dump({
+                    "fingerprint": fingerprint,
+                    "chunks": len(chunks),
+                    "embeddings_reused": reused,
+                    "embeddings_computed": computed
+                }, f)
+            Metrics.inc("pria_ingest_chunks_total", len(chunks))
+            Metrics.inc("pria_ingest_embeddings_total", reused, result="reused")
+            Metrics.inc("pria_ingest_embeddings_total", computed, result="computed")
 
-            text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
-            chunks = text_splitter.split_text(text)
+            progress("publish")
+            previous = IndexRegistry.get()
+            # The old resume's FAQ job must not write answers once the new one is live
+            FAQPrecomputer.cancel()
+            generation = IndexRegistry.publish(staging)
+            staging = None
+            if previous is not None and previous.fingerprint != fingerprint:
+                # Answers are scoped by fingerprint, so the old resume's entries can never be hit again
+                ResponseCache.clear_fingerprint(previous.fingerprint)
+                SemanticCache.clear_fingerprint(previous.fingerprint)
 
-            embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-            vector_db = FAISS.from_texts(chunks, embeddings)
-            vector_db.save_local(FAISS_DB_PATH)
+            if precompute_faqs:
+                FAQPrecomputer.start(fingerprint)
 
-            return True
+            return generation
 
-        except (UnsupportedFileFormatError, EmptyResumeError) as e:
+        except (UnsupportedFileFormatError, EmptyResumeError, DocumentProcessingError) as e:
             raise e
         except Exception as e:
             raise VectorDatabaseError(f"Vector Indexing Failed: {str(e)}")
         finally:
-            os.remove(tmp_path)
+            if staging is not None:
+                # Failed build: the live index was never touched
+                shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def extract_text(uploaded_file):
+        """Extracts the upload's text (PDF or DOCX) in memory, without a temp-file copy."""
+        text = "\n".join(VectorDBManager._iter_sections(uploaded_file))
+        if not text.strip():
+            raise EmptyResumeError("Empty resume or unreadable scanned image. File must contain real text.")
+        return text
+
+    @staticmethod
+    def split_text(text: str):
+        # Splitter and parsers are imported on first ingest, not when the UI starts
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        return text_splitter.split_text(text)
+
+    @staticmethod
+    def split_stream(sections, buffer_chars: int = CHUNK_SIZE * 8):
+        """
+        Splits text sections as they arrive, holding at most ~buffer_chars of raw text.
+        With SECTION_CHUNKING_ENABLED no chunk crosses a resume heading (Education, Experience...),
+        and each chunk is tagged with its section ("header" for the text above the first heading).
+        Returns (chunks, section of each chunk, first 1000 characters, fingerprint of the full text).
+        """
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+        text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        hasher = hashlib.sha256()
+        chunks, chunk_sections, start_text, buffer = [], [], "", ""
+        current = HEADER_SECTION
+
+        def flush(text, final):
+            pieces = text_splitter.split_text(text)
+            # The last piece may continue in the next section: carry it over (overlap is kept)
+            done = pieces if final else pieces[:-1]
+            chunks.extend(done)
+            chunk_sections.extend([current] * len(done))
+            return "" if final or not pieces else pieces[-1]
+
+        for section in sections:
+            section += "\n"
+            hasher.update(section.encode("utf-8"))
+            if len(start_text) < 1000:
+                start_text += section[:1000 - len(start_text)]
+            if not SECTION_CHUNKING_ENABLED:
+                buffer += section
+            else:
+                for line in section.splitlines(keepends=True):
+                    heading = heading_section(line)
+                    if heading is not None:
+                        # A heading closes the previous section's last chunk and opens the next one
+                        if buffer.strip():
+                            flush(buffer, final=True)
+                        buffer, current = "", heading
+                    buffer += line
+            if len(buffer) >= buffer_chars:
+                buffer = flush(buffer, final=False)
+        if buffer.strip():
+            flush(buffer, final=True)
+        return chunks, chunk_sections, start_text, hasher.hexdigest()[:16]
+
+    @staticmethod
+    def _iter_sections(uploaded_file):
+        from backend.utils.parsers import iter_document_sections
+        ext = os.path.splitext(uploaded_file.name)[1].lower()
+        if ext not in (".pdf", ".docx"):
+            raise UnsupportedFileFormatError("Please strictly upload a PDF or DOCX resume.")
+        # Streamlit uploads are already in-memory file objects; anything else is wrapped
+        source = uploaded_file if hasattr(uploaded_file, "seek") else io.BytesIO(uploaded_file.getvalue())
+        source.seek(0)
+        return iter_document_sections(source, ext)
+
+    @staticmethod
+    def add_candidate(text: str, source_name: str = "", candidate_id: str = None):
+        """Corpus mode: chunks + embeds one resume and appends it to the corpus index."""
+        with Metrics.span("ingest_split"):
+            chunks = VectorDBManager.split_text(text)
+        with Metrics.span("ingest_embed"):
+            vectors = IndexRegistry.get_ingest_embeddings().embed_documents(chunks)
+        with Metrics.span("ingest_index_write"):
+            candidate_id = CandidateCorpus.add_candidate(text, chunks, vectors, source_name, candidate_id)
+        Metrics.inc("pria_ingest_chunks_total", len(chunks))
+        return candidate_id
+
+    @staticmethod
+    def remove_candidate(candidate_id: str):
+        """Corpus mode: drops one candidate and the cached answers scoped to it."""
+        fingerprint = CandidateCorpus.fingerprint(candidate_id)
+        CandidateCorpus.remove_candidate(candidate_id)
+        ResponseCache.clear_fingerprint(fingerprint)
+        SemanticCache.clear_fingerprint(fingerprint)
 
     @staticmethod
     def delete_db():
         """Wipes the FAISS index directory and clears cache."""
-        if os.path.exists(FAISS_DB_PATH):
-            shutil.rmtree(FAISS_DB_PATH)
-        if os.path.exists(RESUME_START_FILE):
-            os.remove(RESUME_START_FILE)
+        FAQPrecomputer.cancel()
+        IndexRegistry.unpublish()
         ResponseCache.clear()
+        SemanticCache.clear()
 
     @staticmethod
     def load_db():
-        """Loads the active FAISS index."""
-        if os.path.exists(FAISS_DB_PATH):
-            embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
-            return FAISS.load_local(FAISS_DB_PATH, embeddings, allow_dangerous_deserialization=True)
-        return None
+        """Returns the active FAISS index (resident in memory, loaded once per index version)."""
+        loaded = IndexRegistry.get()
+        return loaded.vector_db if loaded else None
+
+    @staticmethod
+    def load_active():
+        """Returns the full LoadedIndex (index, start-of-resume text, fingerprint) or None."""
+        return IndexRegistry.get()
+
+    @staticmethod
+    def current_fingerprint(candidate_id: str = None):
+        """Fingerprint of the indexed resume (or corpus candidate), used to scope cache keys ("" if none)."""
+        if CORPUS_MODE:
+            return CandidateCorpus.fingerprint(candidate_id)
+        loaded = IndexRegistry.get()
+        return loaded.fingerprint if loaded else ""
+
+    @staticmethod
+    def get_profile(candidate_id: str = None):
+        """Structured fields extracted at ingest (name, email, phone, skills, ...), or None."""
+        if CORPUS_MODE:
+            return CandidateCorpus.get_profile(candidate_id) if candidate_id else None
+        loaded = IndexRegistry.get()
+        return loaded.profile if loaded else None
+
+    @staticmethod
+    def get_profile_field(field: str, candidate_id: str = None):
+        """One profile field ("" / [] when not found). Raises KeyError for unknown field names."""
+        if field not in PROFILE_FIELDS:
+            raise KeyError(field)
+        profile = VectorDBManager.get_profile(candidate_id) or {}
+        return profile.get(field, [] if field in LIST_FIELDS else "")
+
+    @staticmethod
+    def ingest_stats():
+        """Stats of the live single-resume index (generation, chunk count, embeddings reused vs computed)."""
+        active = active_directory()
+        if active is None:
+            return {}
+        generation, directory = active
+        try:
+            with open(os.path.join(directory, INDEX_META_FILE), "r", encoding="utf-8") as f:
+                return dict(json.load(f), generation=generation)
+        except (OSError, ValueError):
+            return {"generation": generation}
+
+    @staticmethod
+    def has_index():
+        """True when there is something to query (the single-resume index, or a non-empty corpus)."""
+        if CORPUS_MODE:
+            return CandidateCorpus.exists()
+        return active_directory() is not None
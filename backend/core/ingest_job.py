@@ -0,0 +1,79 @@
+"""Background resume ingestion: builds the new index off the request path while the old one keeps serving."""
+import io
+import threading
+import time
+
+from backend.core.database import VectorDBManager
+
+
+class IngestJob:
+    """
+    One upload at a time, on a background thread. The build goes to a staging directory and is
+    published atomically (VectorDBManager.process_file_and_create_db), so viewers keep getting
+    answers from the previous resume until the new index is complete.
+    """
+
+    _lock = threading.Lock()
+    _thread = None
+    _done = threading.Event()
+    _job = 0
+    _progress = {"job": 0, "status": "idle", "stage": "", "done": 0, "total": 0, "file": "",
+                 "result": None, "error": "", "seconds": 0.0}
+
+    @classmethod
+    def start(cls, uploaded_file, precompute_faqs: bool = False, candidate_id: str = None):
+        """Starts ingesting the upload; returns the job number, or None if a job is already running."""
+        # Copied now: the upload object belongs to the Streamlit run that received it
+        source = io.BytesIO(uploaded_file.getvalue())
+        source.name = uploaded_file.name
+        with cls._lock:
+            if cls._thread is not None and cls._thread.is_alive():
+                return None
+            cls._job += 1
+            cls._done = threading.Event()
+            cls._progress = {"job": cls._job, "status": "running", "stage": "queued", "done": 0, "total": 0,
+                             "file": source.name, "result": None, "error": "", "seconds": 0.0}
+            cls._thread = threading.Thread(
+                target=cls._run, args=(cls._job, source, precompute_faqs, candidate_id, cls._done),
+                name="ingest", daemon=True
+            )
+            cls._thread.start()
+            return cls._job
+
+    @classmethod
+    def progress(cls):
+        """Snapshot: job number, status (idle/running/done/failed), stage, done/total chunks, result or error."""
+        with cls._lock:
+            return dict(cls._progress)
+
+    @classmethod
+    def wait(cls, timeout: float = None):
+        """Blocks until the current job finishes. Returns False on timeout."""
+        with cls._lock:
+            done = cls._done
+        return done.wait(timeout)
+
+    @classmethod
+    def _update(cls, job, **fields):
+        with cls._lock:
+            if cls._progress["job"] == job:
+                cls._progress.update(fields)
+
+    @classmethod
+    def _run(cls, job, source, precompute_faqs, candidate_id, done):
+        started = time.perf_counter()
+
+        def report(stage, completed=0, total=0):
+            cls._update(job, stage=stage, done=completed, total=total)
+
+        try:
+            result = VectorDBManager.process_file_and_create_db(
+                source, precompute_faqs=precompute_faqs, candidate_id=candidate_id, progress=report
+            )
+            cls._update(job, status="done", stage="published", result=result,
+                        seconds=round(time.perf_counter() - started, 2))
+        except Exception as e:
+            print(f"[INGEST] {source.name} failed: {e}")
+            cls._update(job, status="failed", error=str(e), seconds=round(time.perf_counter() - started, 2))
+        finally:
+            done.set()
@@ -0,0 +1,109 @@
+"""Background FAQ precomputation: answers FAQ_LIST once after ingest so the sidebar FAQ is instant."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config import FAQ_LIST, FAQ_PRECOMPUTE_WORKERS
+from backend.utils.cache_manager import ResponseCache
+
+
+class FAQPrecomputer:
+    """
+    Runs the FAQ set through RAGPipeline on a background thread (bounded concurrency)
+    and stores answers + evidence in the response cache for one resume fingerprint.
+    A new upload or delete cancels the running job before the index changes.
+    """
+
+    _lock = threading.Lock()
+    _thread = None
+    _cancel = threading.Event()
+    _progress = {"status": "idle", "done": 0, "failed": 0, "skipped": 0, "total": 0, "fingerprint": ""}
+
+    @classmethod
+    def start(cls, fingerprint: str, questions=None):
+        """Cancels any running job and starts a new one for the given resume fingerprint."""
+        questions = list(questions or FAQ_LIST)
+        cls.cancel()
+        with cls._lock:
+            cls._cancel = threading.Event()
+            cls._progress = {
+                "status": "running", "done": 0, "failed": 0, "skipped": 0,
+                "total": len(questions), "fingerprint": fingerprint
+            }
+            cls._thread = threading.Thread(
+                target=cls._run, args=(fingerprint, questions, cls._cancel), name="faq-precompute", daemon=True
+            )
+            cls._thread.start()
+
+    @classmethod
+    def cancel(cls, timeout: float = 30.0):
+        """Signals the running job to stop and waits for in-flight answers to finish."""
+        with cls._lock:
+            thread, cancel = cls._thread, cls._cancel
+        if thread is None or not thread.is_alive():
+            return
+        cancel.set()
+        thread.join(timeout)
+        with cls._lock:
+            if cls._progress["status"] == "running":
+                cls._progress["status"] = "cancelled"
+
+    @classmethod
+    def progress(cls):
+        """Returns a snapshot: status (idle/running/done/cancelled), done/failed/skipped/total counts."""
+        with cls._lock:
+            return dict(cls._progress)
+
+    @classmethod
+    def _bump(cls, cancel, field):
+        with cls._lock:
+            # Ignore late updates from a job that has already been replaced
+            if cancel is cls._cancel:
+                cls._progress[field] += 1
+
+    @classmethod
+    def _run(cls, fingerprint, questions, cancel):
+        with ThreadPoolExecutor(max_workers=FAQ_PRECOMPUTE_WORKERS, thread_name_prefix="faq") as pool:
+            for question in questions:
+                pool.submit(cls._answer_one, question, fingerprint, cancel)
+
+        with cls._lock:
+            if cancel is cls._cancel and cls._progress["status"] == "running":
+                cls._progress["status"] = "cancelled" if cancel.is_set() else "done"
+
+    @classmethod
+    def _answer_one(cls, question, fingerprint, cancel):
+        # Imported here: agent -> database -> precompute would otherwise be circular
+        from backend.core.agent import RAGPipeline
+
+        if cancel.is_set():
+            return
+        try:
+            # Exact match only: a semantic hit on a neighbouring FAQ must not stand in for this one.
+            # Contact questions are answered from the profile and never need the LLM.
+            if ResponseCache.get(question, fingerprint) or RAGPipeline.answer_from_profile(question):
+                cls._bump(cancel, "skipped")
+                return
+
+            query_vector = RAGPipeline.embed_query(question)
+            streamer, docs = RAGPipeline.answer_query(question, query_vector=query_vector)
+            if streamer is None:
+                cls._bump(cancel, "failed")
+                return
+
+            answer = ""
+            for chunk in streamer:
+                if cancel.is_set():
+                    return
+                answer += chunk
+
+            # Never write answers for a resume that was replaced mid-stream
+            if cancel.is_set() or not answer.strip():
+                return
+            RAGPipeline.remember_answer(
+                question, answer.strip(), fingerprint,
+                evidence=RAGPipeline.evidence_ref(docs, fingerprint), query_vector=query_vector
+            )
+            cls._bump(cancel, "done")
+        except Exception as e:
+            print(f"[FAQ PRECOMPUTE] Failed on '{question}': {e}")
+            cls._bump(cancel, "failed")
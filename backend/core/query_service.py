@@ -0,0 +1,178 @@
+"""
+Asyncio front for RAGPipeline: bounded concurrency, backpressure and single-flight coalescing.
+Identical questions against the same resume version share one cache lookup / LLM call, and
+every waiting client receives the same token stream.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.config import SERVICE_MAX_CONCURRENT, SERVICE_MAX_PENDING, SERVICE_QUEUE_TIMEOUT
+from backend.core.agent import RAGPipeline
+from backend.core.database import VectorDBManager
+from backend.exceptions.custom_exceptions import ServiceOverloadedError
+from backend.utils.cache_manager import normalize_query
+from backend.utils.metrics import Metrics
+from backend.utils.query_logger import QueryLogger
+
+
+class Flight:
+    """One in-progress answer. Tokens are kept so late subscribers replay from the start."""
+
+    def __init__(self):
+        self.tokens = []
+        self.source = "live"
+        self.evidence = ""
+        self.evidence_ref = None
+        self.error = None
+        self.done = False
+        self._wake = asyncio.Event()
+
+    def push(self, token):
+        self.tokens.append(token)
+        self._notify()
+
+    def finish(self, source, evidence="", error=None, evidence_ref=None):
+        self.source, self.evidence, self.error, self.evidence_ref = source, evidence, error, evidence_ref
+        self.done = True
+        self._notify()
+
+    def _notify(self):
+        self._wake.set()
+        self._wake = asyncio.Event()
+
+    @property
+    def answer(self):
+        return "".join(self.tokens)
+
+    async def stream(self):
+        """Yields tokens as they arrive. A slow reader never holds up the producer or other readers."""
+        i = 0
+        while True:
+            while i < len(self.tokens):
+                yield self.tokens[i]
+                i += 1
+            if self.done:
+                return
+            await self._wake.wait()
+
+
+class QueryService:
+    """
+    Admits questions, coalesces duplicates and runs the blocking pipeline in a bounded thread pool.
+    - At most `max_concurrent` answers are generated at once.
+    - At most `max_pending` distinct questions wait for a slot; more raise ServiceOverloadedError.
+    - Duplicates of an in-flight question attach to it and never count against either limit.
+    """
+
+    def __init__(self, max_concurrent: int = SERVICE_MAX_CONCURRENT, max_pending: int = SERVICE_MAX_PENDING,
+                 queue_timeout: float = SERVICE_QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="query-service")
+        self._flights = {}
+        self._tasks = set()
+        self._pending = 0
+        self._active = 0
+        self._stats = {"requests": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0, "timeouts": 0}
+
+    async def ask(self, question: str, candidate_id: str = None):
+        """
+        Returns (Flight answering this question, True if it was already in flight).
+        Raises ServiceOverloadedError when too many questions are waiting.
+        """
+        self._stats["requests"] += 1
+        fingerprint = await asyncio.to_thread(VectorDBManager.current_fingerprint, candidate_id)
+        key = (fingerprint, candidate_id or "", normalize_query(question))
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self._stats["coalesced"] += 1
+            Metrics.inc("pria_service_requests_total", result="coalesced")
+            return flight, True
+
+        if self._pending >= self.max_pending:
+            self._stats["rejected"] += 1
+            Metrics.inc("pria_service_requests_total", result="rejected")
+            raise ServiceOverloadedError(f"{self._pending} questions already waiting")
+
+        Metrics.inc("pria_service_requests_total", result="admitted")
+        flight = self._flights[key] = Flight()
+        self._pending += 1
+        task = asyncio.create_task(self._run(key, flight, question, candidate_id, fingerprint))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return flight, False
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats.update(in_flight=len(self._flights), pending=self._pending, active=self._active,
+                     max_concurrent=self.max_concurrent, max_pending=self.max_pending)
+        return stats
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, key, flight, question, candidate_id, fingerprint):
+        waited = asyncio.get_running_loop().time()
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                flight.finish("error", error="Timed out waiting for a free slot. Please retry.")
+                return
+            finally:
+                self._pending -= 1
+            Metrics.observe("pria_stage_seconds", asyncio.get_running_loop().time() - waited, stage="service_queue")
+
+            self._active += 1
+            try:
+                loop = asyncio.get_running_loop()
+                source, evidence, evidence_ref = await loop.run_in_executor(
+                    self._executor, self._answer, loop, flight, question, candidate_id, fingerprint
+                )
+                flight.finish(source, evidence, evidence_ref=evidence_ref)
+                self._stats["completed"] += 1
+            except Exception as e:
+                print(f"[QUERY SERVICE] Failed to answer '{question}': {e}")
+                self._stats["failed"] += 1
+                flight.finish("error", error=str(e))
+            finally:
+                self._active -= 1
+                self._slots.release()
+        finally:
+            self._flights.pop(key, None)
+
+    @staticmethod
+    def _answer(loop, flight, question, candidate_id, fingerprint):
+        """Worker thread: same steps as the Streamlit chat loop. Returns (source, evidence, evidence_ref)."""
+        def push(token):
+            loop.call_soon_threadsafe(flight.push, token)
+
+        cached, source, query_vector = RAGPipeline.lookup_cache(question, fingerprint, candidate_id)
+        if cached:
+            push(cached.answer)
+            QueryLogger.log(question, cached.answer, source=source)
+            ref = RAGPipeline.cached_evidence(cached, fingerprint)
+            return source, (RAGPipeline.resolve_evidence(ref) or "") if ref else "", ref
+
+        streamer, docs = RAGPipeline.answer_query(question, query_vector=query_vector, candidate_id=candidate_id)
+        if streamer is None:
+            # No index / guardrail refusal: shown to the caller, never cached or logged as an answer
+            push(docs)
+            return "live", "", None
+
+        parts = []
+        for token in streamer:
+            parts.append(token)
+            push(token)
+        answer, evidence = "".join(parts), RAGPipeline.format_evidence(docs)
+        ref = RAGPipeline.evidence_ref(docs, fingerprint)
+
+        if answer.strip():
+            RAGPipeline.remember_answer(question, answer.strip(), fingerprint, evidence=ref,
+                                        query_vector=query_vector)
+            QueryLogger.log(question, answer.strip(), source="live")
+        return "live", evidence, ref
@@ -0,0 +1,286 @@
+"""Process-wide registry that keeps the embedding model and FAISS index resident in memory."""
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import namedtuple
+
+from backend.config import (
+    FAISS_DB_PATH, EMBEDDING_MODEL, EMBEDDING_BACKEND, DATA_DIR, EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS,
+    INDEX_KEEP_GENERATIONS
+)
+from backend.utils.cache_manager import RetrievalCache
+from backend.utils.lexical_index import BM25Index
+from backend.utils.metrics import Metrics
+from backend.utils.vector_store import MappedVectorStore, VECTORS_FILE, CHUNKS_FILE
+
+# Published layout: faiss_index/CURRENT names the live generation directory (faiss_index/gen-000007/),
+# which holds the files below. A rebuild fills a staging directory, renames it to the next generation
+# and then replaces CURRENT atomically, so readers see either the old index or the new one, never a mix.
+CURRENT_FILE = "CURRENT"
+RESUME_START_FILE = "resume_start.txt"
+INDEX_META_FILE = "index_meta.json"
+LEXICAL_INDEX_FILE = "bm25.json"
+PROFILE_FILE = "profile.json"
+STAGING_PREFIX = "staging-"
+GENERATION_DIR = re.compile(r"^gen-(\d+)$")
+# Indexes built before generations keep their files directly in faiss_index/ (served as generation 0)
+LEGACY_START_FILE = "resume_start.txt"  # In DATA_DIR
+# LangChain save_local() format (pickled docstore); no longer loaded
+LEGACY_PICKLE_FILE = "index.pkl"
+
+# Everything a query needs from the active resume, loaded once per index version.
+# `lexical` is the BM25 index and `profile` the extracted fields (None for indexes built before them);
+# `generation` is the published generation it was loaded from.
+LoadedIndex = namedtuple("LoadedIndex",
+                         ["vector_db", "start_text", "fingerprint", "version", "lexical", "profile", "generation"],
+                         defaults=(None, None, 0))
+
+
+class IndexRegistry:
+    """
+    Shares one embedding model and one loaded FAISS index between all Streamlit sessions.
+    - The embedding model is loaded once per process and never dropped.
+    - The index is keyed by a version (local epoch + CURRENT pointer stamp), so a rebuild
+      in this process or in another one is picked up on the next query.
+    - A query keeps the LoadedIndex it started with; a swap never pulls files from under it.
+    """
+
+    _lock = threading.RLock()
+    _publish_lock = threading.Lock()
+    _embeddings = None
+    _entry = None
+    _epoch = 0
+    _legacy_warned = False
+    _stats = {"model_loads": 0, "index_loads": 0, "hits": 0, "misses": 0, "invalidations": 0}
+
+    @classmethod
+    def get_embeddings(cls):
+        """Returns the shared embedding model, loading it on first use."""
+        if cls._embeddings is None:
+            with cls._lock:
+                if cls._embeddings is None:
+                    with Metrics.span("model_load"):
+                        if EMBEDDING_BACKEND == "hashing":
+                            from backend.utils.offline_models import HashingEmbeddings
+                            cls._embeddings = HashingEmbeddings()
+                        elif EMBEDDING_BACKEND == "onnx":
+                            from backend.utils.onnx_embeddings import OnnxEmbeddings
+                            cls._embeddings = OnnxEmbeddings.load()
+                        else:
+                            from langchain_huggingface import HuggingFaceEmbeddings
+                            if EMBEDDING_THREADS > 0:
+                                import torch
+                                torch.set_num_threads(EMBEDDING_THREADS)
+                            cls._embeddings = HuggingFaceEmbeddings(
+                                model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE})
+                    cls._stats["model_loads"] += 1
+        return cls._embeddings
+
+    @classmethod
+    def get_ingest_embeddings(cls):
+        """The shared model behind the content-addressed cache: only unseen chunks are embedded."""
+        from backend.utils.embedding_cache import EmbeddingCache
+        return EmbeddingCache(cls.get_embeddings(), model_name=f"{EMBEDDING_BACKEND}/{EMBEDDING_MODEL}")
+
+    @classmethod
+    def get(cls):
+        """Returns the resident LoadedIndex for the current index version, or None if no index exists."""
+        version = cls._current_version()
+        if version is None:
+            return None
+
+        entry = cls._entry
+        if entry is not None and entry.version == version:
+            with cls._lock:
+                cls._stats["hits"] += 1
+            return entry
+
+        with cls._lock:
+            # Another session may have loaded it while we waited for the lock
+            version = cls._current_version()
+            if version is None:
+                return None
+            if cls._entry is not None and cls._entry.version == version:
+                cls._stats["hits"] += 1
+                return cls._entry
+
+            cls._stats["misses"] += 1
+            cls._entry = cls._load(version)
+            cls._stats["index_loads"] += 1
+            return cls._entry
+
+    @classmethod
+    def invalidate(cls):
+        """Drops the resident index (and cached retrieval results). Called whenever the index is rebuilt or deleted."""
+        with cls._lock:
+            cls._epoch += 1
+            cls._entry = None
+            cls._stats["invalidations"] += 1
+        RetrievalCache.clear()
+
+    @classmethod
+    def stats(cls):
+        """Returns load/hit counters plus the fingerprint of the resident index."""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["generation"] = cls._entry.generation if cls._entry else None
+            stats["fingerprint"] = cls._entry.fingerprint if cls._entry else None
+        return stats
+
+    @classmethod
+    def staging_directory(cls):
+        """A fresh, private directory to build the next index in; publish() it once complete."""
+        os.makedirs(FAISS_DB_PATH, exist_ok=True)
+        return tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=FAISS_DB_PATH)
+
+    @classmethod
+    def publish(cls, staging: str):
+        """
+        Makes a fully built staging directory the live index and returns its generation number.
+        The directory is renamed to the next generation, then CURRENT is replaced in one atomic rename.
+        """
+        with cls._publish_lock:
+            generation = max([0] + list(_generation_dirs())) + 1
+            directory = os.path.join(FAISS_DB_PATH, f"gen-{generation:06d}")
+            os.rename(staging, directory)
+            pointer = os.path.join(FAISS_DB_PATH, CURRENT_FILE)
+            with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "directory": os.path.basename(directory)}, f)
+            os.replace(pointer + ".tmp", pointer)
+            cls.invalidate()
+            cls._prune(generation)
+        Metrics.inc("pria_index_publish_total")
+        print(f"[REGISTRY] Published index generation {generation}")
+        return generation
+
+    @classmethod
+    def unpublish(cls):
+        """
+        Takes the live index down (removes CURRENT first, so no reader sees a half-deleted directory).
+        Staging directories are left alone: a build still running publishes into them afterwards.
+        """
+        with cls._publish_lock:
+            try:
+                os.remove(os.path.join(FAISS_DB_PATH, CURRENT_FILE))
+            except FileNotFoundError:
+                pass
+            cls.invalidate()
+            for directory in _generation_dirs().values():
+                shutil.rmtree(directory, ignore_errors=True)
+            cls._remove_flat_index()
+
+    @classmethod
+    def _prune(cls, generation):
+        """Drops generations older than the newest INDEX_KEEP_GENERATIONS, and a pre-generation flat index."""
+        for old, directory in _generation_dirs().items():
+            if old <= generation - INDEX_KEEP_GENERATIONS:
+                # Memory-mapped files stay readable until the last query holding them finishes
+                shutil.rmtree(directory, ignore_errors=True)
+        cls._remove_flat_index()
+
+    @classmethod
+    def _remove_flat_index(cls):
+        """Removes a pre-generation index (files directly in faiss_index/) and its start text."""
+        for name in (VECTORS_FILE, CHUNKS_FILE, INDEX_META_FILE, LEXICAL_INDEX_FILE, PROFILE_FILE,
+                     "index.faiss", LEGACY_PICKLE_FILE):
+            path = os.path.join(FAISS_DB_PATH, name)
+            if os.path.isfile(path):
+                os.remove(path)
+        legacy_start = os.path.join(DATA_DIR, LEGACY_START_FILE)
+        if os.path.exists(legacy_start):
+            os.remove(legacy_start)
+
+    @classmethod
+    def _current_version(cls):
+        """Cheap version stamp: one stat() call, no file reads."""
+        try:
+            # CURRENT is replaced, never rewritten in place: a new inode on every publish
+            st = os.stat(os.path.join(FAISS_DB_PATH, CURRENT_FILE))
+        except OSError:
+            try:
+                st = os.stat(os.path.join(FAISS_DB_PATH, VECTORS_FILE))
+            except OSError:
+                if not cls._legacy_warned and os.path.exists(os.path.join(FAISS_DB_PATH, LEGACY_PICKLE_FILE)):
+                    cls._legacy_warned = True
+                    print("[REGISTRY] Found an index in the old pickle format, which is no longer loaded. "
+                          "Re-upload the resume to rebuild it.")
+                return None
+        return (cls._epoch, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    @classmethod
+    def _load(cls, version):
+        active = active_directory()
+        if active is None:
+            return None
+        generation, directory = active
+
+        # Memory-mapped: constant-time open, no pickle. A replaced entry's file handles close once
+        # in-flight queries drop their reference to it.
+        with Metrics.span("index_file_load"):
+            vector_db = MappedVectorStore.open(directory)
+        if vector_db is None:
+            return None
+
+        start_text = ""
+        with Metrics.span("start_text"):
+            start_file = os.path.join(directory if generation else DATA_DIR, RESUME_START_FILE)
+            if os.path.exists(start_file):
+                with open(start_file, "r", encoding="utf-8") as f:
+                    start_text = f.read()
+
+        with Metrics.span("bm25_load"):
+            lexical = BM25Index.load(os.path.join(directory, LEXICAL_INDEX_FILE))
+
+        profile = None
+        try:
+            with open(os.path.join(directory, PROFILE_FILE), "r", encoding="utf-8") as f:
+                profile = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+        fingerprint = read_fingerprint(directory)
+        return LoadedIndex(vector_db, start_text, fingerprint, version, lexical, profile, generation)
+
+
+def _generation_dirs():
+    """{generation number: directory} of every published generation on disk."""
+    try:
+        names = os.listdir(FAISS_DB_PATH)
+    except OSError:
+        return {}
+    found = {}
+    for name in names:
+        match = GENERATION_DIR.match(name)
+        if match:
+            found[int(match.group(1))] = os.path.join(FAISS_DB_PATH, name)
+    return found
+
+
+def active_directory():
+    """(generation, directory) of the live index, or None. A pre-generation flat index is generation 0."""
+    try:
+        with open(os.path.join(FAISS_DB_PATH, CURRENT_FILE), "r", encoding="utf-8") as f:
+            pointer = json.load(f)
+        return pointer["generation"], os.path.join(FAISS_DB_PATH, pointer["directory"])
+    except (OSError, ValueError, KeyError):
+        pass
+    if os.path.exists(os.path.join(FAISS_DB_PATH, VECTORS_FILE)):
+        return 0, FAISS_DB_PATH
+    return None
+
+
+def read_fingerprint(directory: str):
+    """Returns the fingerprint of the index in this directory ("" if there is none)."""
+    try:
+        with open(os.path.join(directory, INDEX_META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f).get("fingerprint", "")
+    except (OSError, ValueError):
+        # Index built before fingerprints existed: fall back to the index file stamp
+        try:
+            st = os.stat(os.path.join(directory, VECTORS_FILE))
+        except OSError:
+            return ""
+        return f"legacy-{st.st_mtime_ns:x}-{st.st_size:x}"
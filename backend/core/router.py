@@ -0,0 +1,112 @@
+"""
+Question routers.
+
+ProfileRouter: contact questions (name, email, phone, LinkedIn, GitHub, location) are answered
+straight from the structured profile extracted at ingest, skipping retrieval and the LLM.
+SectionRouter: questions with a clear section intent ("Where did they study?") are searched only in
+the matching resume sections. Everything else falls through to the normal, whole-resume RAG chain.
+"""
+import re
+
+from backend.utils.cache_manager import normalize_query
+
+# (profile field, pattern) — a question must match exactly one
+INTENTS = [
+    ("contact", re.compile(r"\b(contact (details|info|information)|how (can|do|should) (i|we) (contact|reach))\b")),
+    ("email", re.compile(r"\b(e-?mail|mail id)\b")),
+    ("phone", re.compile(r"\b(phone|mobile|cell number|contact number|telephone)\b")),
+    ("linkedin", re.compile(r"\blinked ?in\b")),
+    ("github", re.compile(r"\bgit ?hub\b")),
+    ("location", re.compile(r"\b(where (is|does) .*(located|based|live|from)|"
+                            r"what('s| is) .*(location|current city|city of residence))\b")),
+    ("name", re.compile(r"\b(full name|candidate'?s name|name of the candidate|(his|her|their) name|who is the candidate)\b")),
+]
+# Questions about what the candidate did with a thing ("email marketing experience") need the resume text;
+# relocation and yes/no questions ("Is the candidate based in India?") need an answer, not a profile field
+NOT_CONTACT = re.compile(r"\b(experience|skills?|worked|work|projects?|marketing|campaigns?|built|years|compan(y|ies)|apps?|"
+                         r"relocat\w*|willing)\b|^(is|are|does|do|can|has)\b")
+# "name and current role", "email, phone": more than one thing asked, which the profile can't answer alone
+MULTI_PART = re.compile(r"\b(and|also|plus|as well as|along with)\b|[,&;]")
+MAX_WORDS = 14
+
+TEMPLATES = {
+    "email": "The candidate's email address is {}.",
+    "phone": "The candidate's phone number is {}.",
+    "linkedin": "The candidate's LinkedIn profile is {}.",
+    "github": "The candidate's GitHub profile is {}.",
+    "location": "The candidate is located in {}.",
+    "name": "The candidate's full name is {}.",
+}
+
+# (resume sections, pattern) — every matching intent adds its sections; the first listed is the primary one.
+# Skills and experience questions are deliberately left unrouted: the evidence is spread across sections.
+SECTION_INTENTS = [
+    (("education",), re.compile(
+        r"\b(educat\w*|degrees?|universit(y|ies)|colleges?|graduat\w*|studied|(where|what) did (he|she|they|the candidate) study|alma mater|gpa|cgpa|"
+        r"b\.? ?tech|m\.? ?tech|b\.e\.?|bachelor'?s?|masters|master'?s degree|mba|ph\.? ?d|doctorate|school(ing)?)\b")),
+    (("certifications", "achievements", "education"), re.compile(r"\b(certif\w*|licen[cs]es?|accredit\w*)\b")),
+    (("languages",), re.compile(r"\b(spoken languages?|languages? (does|do|can) (he|she|they|the candidate) speak|"
+                                r"(speak|speaks|fluent in|mother tongue|native language))\b")),
+    (("projects", "experience"), re.compile(r"\b(projects?|portfolio)\b")),
+    (("achievements",), re.compile(r"\b(awards?|achievements?|honou?rs?|accomplishments?)\b")),
+    (("publications",), re.compile(r"\b(publications?|published|papers?)\b")),
+    (("interests",), re.compile(r"\b(hobbies|hobby|interests|pastimes?|free time)\b")),
+]
+
+
+class SectionRouter:
+    """Maps a question to the resume sections that can answer it; None means "search everything"."""
+
+    @staticmethod
+    def route(question: str):
+        """Sections to search, primary first, or None when the question has no clear section intent."""
+        query = normalize_query(question)
+        if len(query.split()) > MAX_WORDS * 2:
+            return None
+        sections = []
+        for targets, pattern in SECTION_INTENTS:
+            if pattern.search(query):
+                sections.extend(s for s in targets if s not in sections)
+        return tuple(sections) or None
+
+
+class ProfileRouter:
+    """Maps a question to a profile field and formats the answer; None means "ask the LLM"."""
+
+    @staticmethod
+    def match(question: str):
+        """The profile field a question asks for, or None unless it asks for exactly one field."""
+        query = normalize_query(question)
+        if len(query.split()) > MAX_WORDS or NOT_CONTACT.search(query) or MULTI_PART.search(query):
+            return None
+        fields = [field for field, pattern in INTENTS if pattern.search(query)]
+        return fields[0] if len(fields) == 1 else None
+
+    @staticmethod
+    def route(question: str, profile):
+        """Returns the answer text, or None when the question isn't a contact question or the field is missing."""
+        if not profile:
+            return None
+        field = ProfileRouter.match(question)
+        if field is None:
+            return None
+
+        if field == "contact":
+            parts = []
+            if profile.get("email"):
+                parts.append(f"Email: {profile['email']}")
+            if profile.get("phone"):
+                parts.append(f"Phone: {profile['phone']}")
+            if profile.get("linkedin"):
+                parts.append(f"LinkedIn: {profile['linkedin']}")
+            return "The candidate's contact details are — " + "; ".join(parts) + "." if parts else None
+
+        value = profile.get(field)
+        if not value:
+            return None
+        answer = TEMPLATES[field].format(value)
+        plural = {"email": "emails", "phone": "phones"}.get(field)
+        others = [v for v in profile.get(plural, []) if v != value] if plural else []
+        if others:
+            answer += f" Also listed: {', '.join(others)}."
+        return answer
@@ -0,0 +1,88 @@
+"""Background warm-up: loads the query pipeline, embedding model and index once per process, off the render path."""
+import importlib
+import threading
+
+from backend.config import CORPUS_MODE
+from backend.utils.startup import StartupTimer
+
+
+class Warmup:
+    """
+    Started from the first page render. Each step is timed as a non-critical startup phase;
+    a failed step is recorded and skipped (the first question then pays for it instead).
+    """
+
+    _lock = threading.Lock()
+    _thread = None
+    _done = threading.Event()
+    _status = {"status": "idle", "steps": [], "error": ""}
+
+    @classmethod
+    def start(cls):
+        """Starts the warm-up thread once per process; later calls are no-ops."""
+        with cls._lock:
+            if cls._thread is not None:
+                return False
+            cls._status = {"status": "running", "steps": [], "error": ""}
+            cls._thread = threading.Thread(target=cls._run, name="warmup", daemon=True)
+            cls._thread.start()
+            return True
+
+    @classmethod
+    def status(cls):
+        """Snapshot: status (idle/running/done/failed), finished steps, last error."""
+        with cls._lock:
+            return {"status": cls._status["status"], "steps": list(cls._status["steps"]), "error": cls._status["error"]}
+
+    @classmethod
+    def wait(cls, timeout: float = None):
+        return cls._done.wait(timeout)
+
+    @classmethod
+    def _step(cls, name, fn):
+        try:
+            with StartupTimer.phase(f"warmup:{name}", critical=False):
+                fn()
+        except Exception as e:
+            print(f"[WARMUP] {name} failed: {e}")
+            with cls._lock:
+                cls._status["error"] = f"{name}: {e}"
+            return False
+        with cls._lock:
+            cls._status["steps"].append(name)
+        return True
+
+    @classmethod
+    def _run(cls):
+        try:
+            from backend.core.registry import IndexRegistry
+
+            vector = []
+            ok = cls._step("import_pipeline", lambda: importlib.import_module("backend.core.agent"))
+            ok &= cls._step("embedding_model", lambda: vector.append(IndexRegistry.get_embeddings().embed_query("warm up")))
+            if vector:
+                ok &= cls._step("index", lambda: cls._warm_index(vector[0]))
+            ok &= cls._step("llm_client", cls._warm_llm_client)
+            with cls._lock:
+                cls._status["status"] = "done" if ok else "failed"
+            print(f"[WARMUP] {cls._status['status']}: {', '.join(cls._status['steps'])}")
+        finally:
+            cls._done.set()
+
+    @staticmethod
+    def _warm_index(vector):
+        """Opens the index and runs one search so the mapped pages are resident."""
+        if CORPUS_MODE:
+            from backend.core.corpus import CandidateCorpus
+            if CandidateCorpus.exists():
+                CandidateCorpus.search(vector, 1)
+            return
+        from backend.core.registry import IndexRegistry
+        loaded = IndexRegistry.get()
+        if loaded is not None:
+            loaded.vector_db.similarity_search_by_vector(vector, k=1)
+
+    @staticmethod
+    def _warm_llm_client():
+        from backend.core.agent import RAGPipeline
+        RAGPipeline.get_llm()
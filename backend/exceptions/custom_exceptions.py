@@ -17,6 +17,18 @@ class VectorDatabaseError(Exception):
     """Something went wrong while building the FAISS index."""
     pass
 
+class CandidateNotFoundError(Exception):
+    """No candidate with that ID in the resume corpus."""
+    pass
+
 class LLMConnectionError(Exception):
     """Couldn't connect to Ollama or the LLM."""
     pass
+
+class LLMTimeoutError(LLMConnectionError):
+    """The LLM didn't finish the answer before its deadline."""
+    pass
+
+class ServiceOverloadedError(Exception):
+    """The query service has too many questions waiting; retry later."""
+    pass
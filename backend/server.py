@@ -0,0 +1,140 @@
+"""
+Headless HTTP query service (Starlette + uvicorn, both already installed with Streamlit).
+
+    python -m backend.server --port 8600
+    LLM_BACKEND=stub EMBEDDING_BACKEND=hashing python -m backend.server   # load testing without Groq
+
+Endpoints:
+    POST /ask      {"question": ..., "candidate_id": ..., "stream": true}
+                   stream=true → Server-Sent Events: `meta`, then `token` events, then `done` (or `error`)
+                   stream=false → one JSON body {"answer", "evidence", "evidence_ref", "source"}
+    GET  /ask?q=...&candidate_id=...   same SSE stream (handy for EventSource / curl)
+    GET  /profile?candidate_id=...           structured fields extracted at ingest
+    GET  /profile/{field}?candidate_id=...   one field, e.g. /profile/email
+    GET  /healthz  index status + service stats
+    GET  /metrics  Prometheus text
+"""
+import argparse
+import json
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+from backend.config import SERVICE_HOST, SERVICE_PORT, CORPUS_MODE
+from backend.core.corpus import CandidateCorpus
+from backend.core.database import VectorDBManager
+from backend.core.query_service import QueryService
+from backend.exceptions.custom_exceptions import ServiceOverloadedError
+from backend.utils.metrics import Metrics
+
+
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+async def _event_stream(flight, coalesced: bool):
+    yield _sse("meta", {"coalesced": coalesced})
+    async for token in flight.stream():
+        yield _sse("token", {"token": token})
+    if flight.error:
+        yield _sse("error", {"error": flight.error})
+    else:
+        yield _sse("done", {"answer": flight.answer, "evidence": flight.evidence, "source": flight.source,
+                            "evidence_ref": flight.evidence_ref})
+
+
+def create_app(service: QueryService = None) -> Starlette:
+    """Builds the ASGI app. Tests pass their own QueryService."""
+    state = {"service": service}
+
+    def get_service():
+        # Created lazily inside the server's event loop
+        if state["service"] is None:
+            state["service"] = QueryService()
+        return state["service"]
+
+    async def ask(request):
+        if request.method == "POST":
+            try:
+                body = await request.json()
+            except ValueError:
+                return JSONResponse({"error": "Body must be JSON."}, status_code=400)
+        else:
+            body = {"question": request.query_params.get("q", ""),
+                    "candidate_id": request.query_params.get("candidate_id")}
+        question = str(body.get("question") or "").strip()
+        if not question:
+            return JSONResponse({"error": "Missing 'question'."}, status_code=400)
+
+        try:
+            flight, coalesced = await get_service().ask(question, body.get("candidate_id") or None)
+        except ServiceOverloadedError as e:
+            return JSONResponse({"error": f"Service busy: {e}"}, status_code=503, headers={"Retry-After": "1"})
+
+        if body.get("stream", True):
+            return StreamingResponse(_event_stream(flight, coalesced), media_type="text/event-stream",
+                                     headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+        async for _ in flight.stream():
+            pass
+        if flight.error:
+            return JSONResponse({"error": flight.error}, status_code=502)
+        return JSONResponse({"answer": flight.answer, "evidence": flight.evidence, "source": flight.source,
+                             "evidence_ref": flight.evidence_ref, "coalesced": coalesced})
+
+    async def profile(request):
+        candidate_id = request.query_params.get("candidate_id") or None
+        field = request.path_params.get("field")
+        if field is None:
+            data = await run_in_threadpool(VectorDBManager.get_profile, candidate_id)
+            if data is None:
+                return JSONResponse({"error": "No profile for this resume."}, status_code=404)
+            return JSONResponse(data)
+        try:
+            value = await run_in_threadpool(VectorDBManager.get_profile_field, field, candidate_id)
+        except KeyError:
+            return JSONResponse({"error": f"Unknown profile field '{field}'."}, status_code=404)
+        return JSONResponse({"field": field, "value": value})
+
+    async def healthz(request):
+        has_index = CandidateCorpus.exists() if CORPUS_MODE else VectorDBManager.has_index()
+        return JSONResponse({"status": "ok", "has_index": has_index, "service": get_service().stats()})
+
+    async def metrics(request):
+        return PlainTextResponse(Metrics.prometheus_text(), media_type="text/plain; version=0.0.4")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        Metrics.register_collector("pria_service", lambda: get_service().stats())
+        yield
+        if state["service"] is not None:
+            state["service"].close()
+
+    return Starlette(
+        routes=[
+            Route("/ask", ask, methods=["GET", "POST"]),
+            Route("/profile", profile),
+            Route("/profile/{field}", profile),
+            Route("/healthz", healthz),
+            Route("/metrics", metrics),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def main(argv=None):
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Headless async query service for the resume assistant.")
+    parser.add_argument("--host", default=SERVICE_HOST)
+    parser.add_argument("--port", type=int, default=SERVICE_PORT)
+    args = parser.parse_args(argv)
+    print(f"[QUERY SERVICE] Listening on http://{args.host}:{args.port}")
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
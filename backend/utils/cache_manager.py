@@ -1,42 +1,472 @@
-import json
+"""
+Response Cache — in-memory LRU (L1) backed by an indexed SQLite store (L2).
+Keys include the resume fingerprint and prompt version, so a new resume or prompt never serves stale answers.
+"""
+import hashlib
 import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from backend.config import (
+    CACHE_DB_PATH, CACHE_L1_SIZE, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, PROMPT_VERSION, PROJECT_ROOT,
+    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES, QUERY_EMBEDDING_CACHE_SIZE, RETRIEVAL_CACHE_SIZE
+)
+
+# Files written by the old JSON cache and the LangChain SQLiteCache; removed on clear()
+LEGACY_CACHE_FILES = [
+    "local_query_cache.json",
+    "llm_cache.db",
+    os.path.join(PROJECT_ROOT, "local_query_cache.json"),
+    os.path.join(PROJECT_ROOT, "llm_cache.db"),
+]
+
+# Run the (cheap) size/TTL sweep on L2 once every N writes instead of on every write
+EVICTION_CHECK_EVERY = 32
+
+# chunks: ids of the retrieved chunks when the evidence is resolved from the index on demand (evidence is then "")
+CacheEntry = namedtuple("CacheEntry", ["answer", "evidence", "chunks"], defaults=(None,))
+
+
+def _pack_chunks(chunks):
+    return ",".join(str(int(c)) for c in chunks) if chunks else None
+
+
+def _unpack_chunks(value):
+    return [int(c) for c in value.split(",")] if value else None
+
+
+def _add_chunks_column(conn, table):
+    """Stores created before chunk-id evidence keep their text evidence."""
+    if "chunks" not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN chunks TEXT")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases and collapses whitespace so trivial formatting differences share one entry."""
+    return " ".join(query.lower().split())
+
+
+def make_cache_key(query: str, fingerprint: str = "") -> str:
+    raw = f"{fingerprint}|{PROMPT_VERSION}|{normalize_query(query)}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
 
-CACHE_FILE = "local_query_cache.json"
 
 class ResponseCache:
-    """Manages local JSON cache for repeated questions."""
-    
-    @staticmethod
-    def get(query: str):
-        if not os.path.exists(CACHE_FILE):
-            return None
-        try:
-            with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                cache = json.load(f)
-                return cache.get(query.lower().strip())
-        except Exception:
-            return None
-
-    @staticmethod
-    def set(query: str, response: str):
-        cache = {}
-        if os.path.exists(CACHE_FILE):
-            try:
-                with open(CACHE_FILE, "r", encoding="utf-8") as f:
-                    cache = json.load(f)
-            except Exception:
-                pass
-        cache[query.lower().strip()] = response
-        try:
-            with open(CACHE_FILE, "w", encoding="utf-8") as f:
-                json.dump(cache, f, indent=4)
-        except Exception:
-            pass
-
-    @staticmethod
-    def clear():
-        if os.path.exists(CACHE_FILE):
-            try:
-                os.remove(CACHE_FILE)
-            except Exception:
-                pass
+    """Manages the tiered cache for repeated questions."""
+
+    _lock = threading.Lock()
+    _l1 = OrderedDict()
+    _conn = None
+    _writes_since_sweep = 0
+    _stats = {"l1_hits": 0, "l2_hits": 0, "misses": 0, "sets": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def get(cls, query: str, fingerprint: str = ""):
+        """Returns a CacheEntry(answer, evidence, chunks) or None."""
+        key = make_cache_key(query, fingerprint)
+        now = time.time()
+
+        with cls._lock:
+            item = cls._l1.get(key)
+            if item is not None:
+                entry, expires_at = item
+                if expires_at > now:
+                    cls._l1.move_to_end(key)
+                    cls._stats["l1_hits"] += 1
+                    return entry
+                del cls._l1[key]
+
+            try:
+                conn = cls._connection()
+                row = conn.execute(
+                    "SELECT answer, evidence, chunks, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    cls._stats["misses"] += 1
+                    return None
+
+                answer, evidence, chunks, created = row
+                if created + CACHE_TTL_SECONDS <= now:
+                    with conn:
+                        conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    cls._stats["expired"] += 1
+                    cls._stats["misses"] += 1
+                    return None
+
+                with conn:
+                    conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                print(f"[CACHE] SQLite read error: {e}")
+                cls._stats["misses"] += 1
+                return None
+
+            entry = CacheEntry(answer, evidence or "", _unpack_chunks(chunks))
+            cls._l1_put(key, entry, created + CACHE_TTL_SECONDS)
+            cls._stats["l2_hits"] += 1
+            return entry
+
+    @classmethod
+    def set(cls, query: str, response: str, fingerprint: str = "", evidence: str = "", chunks=None):
+        """Stores an answer and its evidence (text, or the ids of its chunks) in both tiers."""
+        key = make_cache_key(query, fingerprint)
+        now = time.time()
+        entry = CacheEntry(response, evidence, list(chunks) if chunks else None)
+
+        with cls._lock:
+            cls._l1_put(key, entry, now + CACHE_TTL_SECONDS)
+            cls._stats["sets"] += 1
+            try:
+                conn = cls._connection()
+                with conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO responses "
+                        "(key, fingerprint, query, answer, evidence, chunks, created, last_access) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, fingerprint, normalize_query(query), response, evidence, _pack_chunks(chunks), now, now)
+                    )
+                cls._writes_since_sweep += 1
+                if cls._writes_since_sweep >= EVICTION_CHECK_EVERY:
+                    cls._sweep(conn, now)
+            except sqlite3.Error as e:
+                print(f"[CACHE] SQLite write error: {e}")
+
+    @classmethod
+    def clear(cls):
+        """Empties both tiers and removes files left by the legacy caches."""
+        with cls._lock:
+            cls._l1.clear()
+            try:
+                conn = cls._connection()
+                with conn:
+                    conn.execute("DELETE FROM responses")
+            except sqlite3.Error as e:
+                print(f"[CACHE] SQLite clear error: {e}")
+
+        for path in LEGACY_CACHE_FILES:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except Exception:
+                    pass
+
+    @classmethod
+    def clear_fingerprint(cls, fingerprint: str):
+        """Drops every entry scoped to one resume (L1 is simply emptied; it refills from L2)."""
+        with cls._lock:
+            cls._l1.clear()
+            try:
+                conn = cls._connection()
+                with conn:
+                    conn.execute("DELETE FROM responses WHERE fingerprint = ?", (fingerprint,))
+            except sqlite3.Error as e:
+                print(f"[CACHE] SQLite clear error: {e}")
+
+    @classmethod
+    def stats(cls):
+        """Returns hit/miss/eviction counters plus current tier sizes."""
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["l1_size"] = len(cls._l1)
+            try:
+                stats["l2_size"] = cls._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            except sqlite3.Error:
+                stats["l2_size"] = None
+        lookups = stats["l1_hits"] + stats["l2_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["l1_hits"] + stats["l2_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    @classmethod
+    def _l1_put(cls, key, entry, expires_at):
+        cls._l1[key] = (entry, expires_at)
+        cls._l1.move_to_end(key)
+        while len(cls._l1) > CACHE_L1_SIZE:
+            cls._l1.popitem(last=False)
+            cls._stats["evictions"] += 1
+
+    @classmethod
+    def _sweep(cls, conn, now):
+        """Drops expired rows, then the least recently used rows above CACHE_MAX_ENTRIES."""
+        cls._writes_since_sweep = 0
+        with conn:
+            expired = conn.execute("DELETE FROM responses WHERE created <= ?", (now - CACHE_TTL_SECONDS,)).rowcount
+            count = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            excess = count - CACHE_MAX_ENTRIES
+            evicted = 0
+            if excess > 0:
+                evicted = conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access ASC LIMIT ?)", (excess,)
+                ).rowcount
+        cls._stats["expired"] += max(expired, 0)
+        cls._stats["evictions"] += max(evicted, 0)
+
+    @classmethod
+    def _connection(cls):
+        """Lazily opens the shared SQLite connection (callers hold cls._lock)."""
+        if cls._conn is None:
+            conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False, timeout=5)
+            # WAL lets several processes read while one writes; each write is its own transaction
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT, query TEXT, answer TEXT, evidence TEXT, "
+                "created REAL, last_access REAL, chunks TEXT)"
+            )
+            _add_chunks_column(conn, "responses")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created ON responses (created)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_fingerprint ON responses (fingerprint)")
+            conn.commit()
+            cls._conn = conn
+        return cls._conn
+
+
+class SemanticCache:
+    """
+    Similarity-based cache: reuses the answer of a previously asked question whose
+    embedding is close enough to the new one. Scoped to one resume + prompt version.
+    Vectors are kept in a small in-memory matrix; SQLite keeps them across restarts.
+    """
+
+    _lock = threading.Lock()
+    _conn = None
+    _scope = None
+    _ids = []
+    _entries = []
+    _matrix = None
+    _stats = {"lookups": 0, "hits": 0, "sets": 0, "evictions": 0}
+
+    @classmethod
+    def get(cls, query_vector, fingerprint: str = ""):
+        """Returns (CacheEntry, similarity) for the closest cached question above the threshold, or None."""
+        import numpy as np
+
+        with cls._lock:
+            cls._stats["lookups"] += 1
+            try:
+                cls._load_scope(fingerprint)
+            except sqlite3.Error as e:
+                print(f"[CACHE] Semantic cache read error: {e}")
+                return None
+            if cls._matrix is None or not len(cls._entries):
+                return None
+
+            scores = cls._matrix @ _unit(query_vector)
+            best = int(np.argmax(scores))
+            similarity = float(scores[best])
+            if similarity < SEMANTIC_CACHE_THRESHOLD:
+                return None
+            cls._stats["hits"] += 1
+            return cls._entries[best], similarity
+
+    @classmethod
+    def set(cls, query: str, query_vector, response: str, fingerprint: str = "", evidence: str = "", chunks=None):
+        """Adds an answered question to the active resume's vector index."""
+        import numpy as np
+
+        vector = _unit(query_vector)
+        with cls._lock:
+            try:
+                cls._load_scope(fingerprint)
+                conn = cls._connection()
+                with conn:
+                    row_id = conn.execute(
+                        "INSERT INTO semantic_entries "
+                        "(fingerprint, prompt_version, query, vector, answer, evidence, chunks, created) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (fingerprint, PROMPT_VERSION, normalize_query(query), vector.tobytes(), response, evidence,
+                         _pack_chunks(chunks), time.time())
+                    ).lastrowid
+            except sqlite3.Error as e:
+                print(f"[CACHE] Semantic cache write error: {e}")
+                return
+
+            cls._ids.append(row_id)
+            cls._entries.append(CacheEntry(response, evidence, list(chunks) if chunks else None))
+            row = vector.reshape(1, -1)
+            cls._matrix = row if cls._matrix is None else np.vstack([cls._matrix, row])
+            cls._stats["sets"] += 1
+
+            excess = len(cls._ids) - SEMANTIC_CACHE_MAX_ENTRIES
+            if excess > 0:
+                dropped, cls._ids = cls._ids[:excess], cls._ids[excess:]
+                cls._entries = cls._entries[excess:]
+                cls._matrix = cls._matrix[excess:]
+                cls._stats["evictions"] += excess
+                try:
+                    with conn:
+                        conn.executemany("DELETE FROM semantic_entries WHERE id = ?", [(i,) for i in dropped])
+                except sqlite3.Error as e:
+                    print(f"[CACHE] Semantic cache eviction error: {e}")
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            cls._scope = None
+            cls._ids, cls._entries, cls._matrix = [], [], None
+            try:
+                conn = cls._connection()
+                with conn:
+                    conn.execute("DELETE FROM semantic_entries")
+            except sqlite3.Error as e:
+                print(f"[CACHE] Semantic cache clear error: {e}")
+
+    @classmethod
+    def clear_fingerprint(cls, fingerprint: str):
+        with cls._lock:
+            if cls._scope and cls._scope[0] == fingerprint:
+                cls._scope = None
+                cls._ids, cls._entries, cls._matrix = [], [], None
+            try:
+                conn = cls._connection()
+                with conn:
+                    conn.execute("DELETE FROM semantic_entries WHERE fingerprint = ?", (fingerprint,))
+            except sqlite3.Error as e:
+                print(f"[CACHE] Semantic cache clear error: {e}")
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            stats["size"] = len(cls._entries)
+        stats["hit_rate"] = round(stats["hits"] / stats["lookups"], 3) if stats["lookups"] else 0.0
+        stats["threshold"] = SEMANTIC_CACHE_THRESHOLD
+        return stats
+
+    @classmethod
+    def _load_scope(cls, fingerprint):
+        """Swaps the in-memory matrix to the given resume + prompt version (callers hold cls._lock)."""
+        import numpy as np
+
+        scope = (fingerprint, PROMPT_VERSION)
+        if cls._scope == scope:
+            return
+        rows = cls._connection().execute(
+            "SELECT id, vector, answer, evidence, chunks FROM semantic_entries "
+            "WHERE fingerprint = ? AND prompt_version = ? ORDER BY id DESC LIMIT ?",
+            (fingerprint, PROMPT_VERSION, SEMANTIC_CACHE_MAX_ENTRIES)
+        ).fetchall()
+        rows.reverse()
+        cls._scope = scope
+        cls._ids = [r[0] for r in rows]
+        cls._entries = [CacheEntry(r[2], r[3] or "", _unpack_chunks(r[4])) for r in rows]
+        cls._matrix = np.vstack([np.frombuffer(r[1], dtype=np.float32) for r in rows]) if rows else None
+
+    @classmethod
+    def _connection(cls):
+        if cls._conn is None:
+            conn = sqlite3.connect(CACHE_DB_PATH, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS semantic_entries ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, fingerprint TEXT, prompt_version TEXT, query TEXT, "
+                "vector BLOB, answer TEXT, evidence TEXT, created REAL, chunks TEXT)"
+            )
+            _add_chunks_column(conn, "semantic_entries")
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_semantic_scope ON semantic_entries (fingerprint, prompt_version)"
+            )
+            conn.commit()
+            cls._conn = conn
+        return cls._conn
+
+
+class _BoundedLRU:
+    """Thread-safe in-memory LRU with hit/miss counters."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._stats = {"hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._stats["sets"] += 1
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+class QueryEmbeddingCache:
+    """
+    Question -> query vector, so repeated questions skip the encoder. Vectors depend only on the
+    (process-wide) embedding model, not on the index, so rebuilds keep them. Cached vectors are shared:
+    callers must not modify them.
+    """
+
+    _lru = _BoundedLRU(QUERY_EMBEDDING_CACHE_SIZE)
+
+    @classmethod
+    def get(cls, query: str):
+        return cls._lru.get(normalize_query(query))
+
+    @classmethod
+    def set(cls, query: str, vector):
+        cls._lru.put(normalize_query(query), vector)
+
+    @classmethod
+    def clear(cls):
+        cls._lru.clear()
+
+    @classmethod
+    def stats(cls):
+        return cls._lru.stats()
+
+
+class RetrievalCache:
+    """
+    (index generation, fingerprint, question, k) -> ranked (chunk id, score) pairs.
+    Cleared when the registry drops its index; the generation in the key covers rebuilds published
+    by other processes.
+    """
+
+    _lru = _BoundedLRU(RETRIEVAL_CACHE_SIZE)
+
+    @classmethod
+    def get(cls, generation: int, fingerprint: str, query: str, k: int):
+        return cls._lru.get((generation, fingerprint, normalize_query(query), k))
+
+    @classmethod
+    def set(cls, generation: int, fingerprint: str, query: str, k: int, ranking):
+        cls._lru.put((generation, fingerprint, normalize_query(query), k), tuple(ranking))
+
+    @classmethod
+    def clear(cls):
+        cls._lru.clear()
+
+    @classmethod
+    def stats(cls):
+        return cls._lru.stats()
+
+
+def _unit(vector):
+    """float32 copy of the vector scaled to length 1, so a dot product is cosine similarity."""
+    import numpy as np
+
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    return v / norm if norm else v
@@ -0,0 +1,41 @@
+"""Chat history for a Streamlit session, bounded to CHAT_HISTORY_WINDOW messages."""
+from backend.config import CHAT_HISTORY_WINDOW
+
+
+class ChatHistory:
+    """
+    Messages live in a session_state-like mapping under "messages". Answers keep a small evidence
+    reference (chunk ids, see RAGPipeline.evidence_ref) instead of the evidence text, and the oldest
+    messages are dropped past the window, so a long session costs the same to store and re-render.
+    """
+
+    @staticmethod
+    def messages(state):
+        if "messages" not in state:
+            state["messages"] = []
+        return state["messages"]
+
+    @staticmethod
+    def append(state, role: str, content: str, evidence=None, window: int = CHAT_HISTORY_WINDOW):
+        """Adds a message (with a session-unique "id" for widget keys) and trims the history to the window."""
+        state["message_seq"] = state.get("message_seq", 0) + 1
+        message = {"id": state["message_seq"], "role": role, "content": content}
+        if evidence:
+            message["evidence"] = evidence
+        messages = ChatHistory.messages(state)
+        messages.append(message)
+        if len(messages) > window:
+            dropped = len(messages) - window
+            del messages[:dropped]
+            state["messages_dropped"] = state.get("messages_dropped", 0) + dropped
+        return message
+
+    @staticmethod
+    def dropped(state):
+        """Messages trimmed from this session so far."""
+        return state.get("messages_dropped", 0)
+
+    @staticmethod
+    def clear(state):
+        state["messages"] = []
+        state["messages_dropped"] = 0
@@ -0,0 +1,132 @@
+"""
+Token-budgeted prompt context.
+Retrieved chunks overlap their neighbours by CHUNK_OVERLAP characters and the first ones usually repeat
+the start-of-resume block, so joining them naively sends the same text two or three times.
+build_context() drops what the start block already covers, merges overlapping/adjacent chunks into
+one passage, and packs passages by relevance until the token budget is spent.
+"""
+import math
+
+from backend.config import CONTEXT_TOKEN_BUDGET, CONTEXT_CHARS_PER_TOKEN, CONTEXT_MIN_OVERLAP
+
+START_HEADER = "[Start of Resume]\n"
+MATCHES_HEADER = "\n[End of Start]\n\n[Relevant Matches]\n"
+SEPARATOR = "\n\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Character-based token estimate (no tokenizer download needed; close enough for budgeting)."""
+    return math.ceil(len(text) / CONTEXT_CHARS_PER_TOKEN) if text else 0
+
+
+def overlap_length(left: str, right: str, min_overlap: int = CONTEXT_MIN_OVERLAP) -> int:
+    """Length of the longest suffix of `left` that is also a prefix of `right` (0 if shorter than min_overlap)."""
+    if len(left) < min_overlap or len(right) < min_overlap:
+        return 0
+    probe = right[:min_overlap]
+    start = left.find(probe, max(0, len(left) - len(right)))
+    while start != -1:
+        if right.startswith(left[start:]):
+            return len(left) - start
+        start = left.find(probe, start + 1)
+    return 0
+
+
+def _position(doc):
+    """(candidate, chunk number) when the index records it, else None (indexes built before hybrid search)."""
+    chunk = doc.metadata.get("chunk")
+    return None if chunk is None else (doc.metadata.get("candidate_id") or "", chunk)
+
+
+class _Passage:
+    """One or more merged chunks. `rank` is the best (lowest) relevance rank among them."""
+
+    __slots__ = ("rank", "first", "last", "text", "chunks")
+
+    def __init__(self, rank, position, text):
+        self.rank = rank
+        self.first = self.last = position
+        self.text = text
+        self.chunks = 1
+
+    def try_append(self, other):
+        """Merges `other` onto the end of this passage if it continues it. Returns True on success."""
+        if self.last is not None and other.first is not None and self.last[0] != other.first[0]:
+            return False  # Never merge text across candidates
+        adjacent = self.last is not None and other.first is not None and other.first[1] - self.last[1] in (0, 1)
+        if other.text in self.text:
+            shared = len(other.text)
+            addition = ""
+        else:
+            shared = overlap_length(self.text, other.text)
+            addition = other.text[shared:]
+        if not shared and not adjacent:
+            return False
+        if addition:
+            self.text += addition if shared else "\n" + addition
+        self.rank = min(self.rank, other.rank)
+        self.last = other.last if other.last is not None else self.last
+        self.chunks += other.chunks
+        return True
+
+
+def build_context(docs, start_text: str = "", token_budget: int = CONTEXT_TOKEN_BUDGET):
+    """
+    Returns (context text, stats) for documents in relevance order.
+    stats: naive/sent token estimates, tokens saved, chunks merged, covered by the start block, or cut by the budget.
+    """
+    stats = {"chunks": len(docs), "merged": 0, "covered_by_start": 0, "over_budget": 0}
+    naive = SEPARATOR.join(doc.page_content for doc in docs)
+    if start_text:
+        naive = f"{START_HEADER}{start_text}{MATCHES_HEADER}{naive}"
+
+    # 1. Drop chunks inside the start block; trim the part of a chunk that continues it
+    passages = []
+    for rank, doc in enumerate(docs):
+        text = doc.page_content.strip()
+        if not text:
+            continue
+        if start_text:
+            if text in start_text:
+                stats["covered_by_start"] += 1
+                continue
+            shared = overlap_length(start_text, text)
+            if shared:
+                # Back up to a word boundary so the remainder doesn't start mid-word
+                cut = max(text.rfind(" ", 0, shared), text.rfind("\n", 0, shared))
+                text = text[cut + 1:].strip()
+        passages.append(_Passage(rank, _position(doc), text))
+
+    # 2. Merge overlapping/adjacent chunks in document order (chunks without positions keep retrieval order)
+    passages.sort(key=lambda p: (p.first is None, p.first or ("", 0), p.rank))
+    merged = []
+    for passage in passages:
+        if merged and merged[-1].try_append(passage):
+            stats["merged"] += 1
+        else:
+            merged.append(passage)
+
+    # 3. Pack by relevance. The start block (name, contact) always goes in and counts against the budget
+    used = estimate_tokens(f"{START_HEADER}{start_text}{MATCHES_HEADER}") if start_text else 0
+    selected = []
+    for passage in sorted(merged, key=lambda p: p.rank):
+        cost = estimate_tokens(passage.text + SEPARATOR)
+        if used + cost > token_budget:
+            if selected or start_text:
+                stats["over_budget"] += passage.chunks
+                continue
+            # Never send an empty context: keep the best passage, cut at a word boundary
+            keep = int(max(0, token_budget - used) * CONTEXT_CHARS_PER_TOKEN)
+            passage.text = passage.text[:keep].rsplit(" ", 1)[0]
+            cost = estimate_tokens(passage.text + SEPARATOR)
+        selected.append(passage)
+        used += cost
+
+    context = SEPARATOR.join(passage.text for passage in selected)
+    if start_text:
+        context = f"{START_HEADER}{start_text}{MATCHES_HEADER}{context}"
+
+    stats["tokens_naive"] = estimate_tokens(naive)
+    stats["tokens_sent"] = estimate_tokens(context)
+    stats["tokens_saved"] = max(0, stats["tokens_naive"] - stats["tokens_sent"])
+    return context, stats
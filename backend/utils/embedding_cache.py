@@ -0,0 +1,139 @@
+"""
+Content-addressed embedding cache.
+Vectors are stored in SQLite keyed by (embedding model, sha256 of chunk text), so re-indexing
+an edited resume only embeds the chunks that actually changed. At most EMBEDDING_CACHE_MAX_ENTRIES
+vectors are kept; the least recently used go first.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from backend.config import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_MODEL
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Wraps an embedding model; embed_documents() reuses cached vectors and computes only misses."""
+
+    _lock = threading.Lock()
+    _conn = None
+    _stats = {"reused": 0, "computed": 0, "evicted": 0}
+
+    def __init__(self, embeddings, model_name: str = EMBEDDING_MODEL):
+        self.embeddings = embeddings
+        self.model_name = model_name
+
+    def embed_documents(self, texts):
+        return self.embed_documents_with_stats(texts)[0]
+
+    def embed_query(self, text):
+        # Queries are not content-addressed here; they go straight to the model
+        return self.embeddings.embed_query(text)
+
+    def embed_documents_with_stats(self, texts):
+        """Returns (vectors, reused count, computed count). Vectors keep the order of texts."""
+        hashes = [text_hash(t) for t in texts]
+        found = self._lookup(set(hashes))
+
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in found:
+                missing.setdefault(h, t)
+        if missing:
+            computed = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), (np.asarray(v, dtype=np.float32) for v in computed)))
+            self._store(new_vectors)
+            found.update(new_vectors)
+
+        reused = len(texts) - len(missing)
+        with EmbeddingCache._lock:
+            EmbeddingCache._stats["reused"] += reused
+            EmbeddingCache._stats["computed"] += len(missing)
+        return [found[h].tolist() for h in hashes], reused, len(missing)
+
+    def _lookup(self, hashes):
+        if not hashes:
+            return {}
+        found = {}
+        keys = list(hashes)
+        with EmbeddingCache._lock:
+            conn = EmbeddingCache._connection()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                rows = conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({','.join('?' * len(batch))})",
+                    [self.model_name] + batch
+                ).fetchall()
+                found.update((h, np.frombuffer(v, dtype=np.float32)) for h, v in rows)
+            if found:
+                with conn:
+                    conn.executemany("UPDATE embeddings SET last_access = ? WHERE model = ? AND hash = ?",
+                                     [(time.time(), self.model_name, h) for h in found])
+        return found
+
+    def _store(self, vectors):
+        with EmbeddingCache._lock:
+            conn = EmbeddingCache._connection()
+            with conn:
+                now = time.time()
+                conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                    [(self.model_name, h, v.tobytes(), now) for h, v in vectors.items()]
+                )
+            EmbeddingCache._evict(conn)
+
+    @classmethod
+    def _evict(cls, conn, max_entries: int = None):
+        """Drops the least recently used vectors above EMBEDDING_CACHE_MAX_ENTRIES (callers hold cls._lock)."""
+        max_entries = EMBEDDING_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        excess = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - max_entries
+        if excess > 0:
+            with conn:
+                evicted = conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)", (excess,)
+                ).rowcount
+            cls._stats["evicted"] += max(evicted, 0)
+
+    @classmethod
+    def stats(cls):
+        with cls._lock:
+            stats = dict(cls._stats)
+            try:
+                stats["stored"] = cls._connection().execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            except sqlite3.Error:
+                stats["stored"] = None
+        return stats
+
+    @classmethod
+    def clear(cls):
+        with cls._lock:
+            conn = cls._connection()
+            with conn:
+                conn.execute("DELETE FROM embeddings")
+
+    @classmethod
+    def _connection(cls):
+        """Shared connection (callers hold cls._lock)."""
+        if cls._conn is None:
+            conn = sqlite3.connect(EMBEDDING_CACHE_PATH, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT, hash TEXT, vector BLOB, last_access REAL, PRIMARY KEY (model, hash))"
+            )
+            # Caches created before eviction: existing rows count as least recently used
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(embeddings)")}
+            if "last_access" not in columns:
+                conn.execute("ALTER TABLE embeddings ADD COLUMN last_access REAL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+            conn.commit()
+            cls._conn = conn
+        return cls._conn
@@ -0,0 +1,103 @@
+"""
+In-memory BM25 inverted index over resume chunks, persisted as JSON next to the FAISS index.
+Catches literal keyword questions ("experience with React?") that embedding similarity can rank too low.
+Lookups are plain dict accesses on precomputed postings (microseconds per term).
+"""
+import json
+import math
+import os
+import re
+from collections import Counter
+
+# Keeps tech names intact: c++, c#, node.js, .net, ci/cd
+_TOKEN = re.compile(r"[a-z0-9.+#/]*[a-z0-9+#]")
+STOPWORDS = frozenset(
+    "a an and are as at be by can does did do for from has have he her his how i in is it its me my of on or "
+    "she that the their them they this to was were what when where which who whom why will with you your "
+    "candidate candidates candidate's resume cv any list tell about".split()
+)
+
+
+def tokenize(text: str):
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        token = token.strip("./")
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def reciprocal_rank_fusion(rankings, k: int = 60, with_scores: bool = False):
+    """
+    Merges ranked id lists: score(id) = sum of 1 / (k + rank). Returns ids, best first (ties keep
+    first-seen order), or (id, score) pairs with with_scores=True.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+    ordered = sorted(scores, key=lambda doc_id: -scores[doc_id])
+    return [(doc_id, scores[doc_id]) for doc_id in ordered] if with_scores else ordered
+
+
+class BM25Index:
+    """Okapi BM25. Document ids are chunk positions, the same order the chunks were added to FAISS."""
+
+    def __init__(self, postings, doc_lengths, k1: float = 1.5, b: float = 0.75):
+        self.postings = postings  # term -> [[doc id, term frequency], ...]
+        self.doc_lengths = doc_lengths
+        self.k1 = k1
+        self.b = b
+        n = len(doc_lengths)
+        self.avg_length = (sum(doc_lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in postings.items()
+        }
+
+    @classmethod
+    def build(cls, chunks, **params):
+        postings, doc_lengths = {}, []
+        for doc_id, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk))
+            doc_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append([doc_id, tf])
+        return cls(postings, doc_lengths, **params)
+
+    def search(self, query: str, k: int, allowed=None):
+        """
+        Returns up to k (doc id, score) pairs, best first. Chunks sharing no term with the query are skipped,
+        as are chunks outside allowed (a set of doc ids) when it is given.
+        """
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in docs:
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / (self.avg_length or 1.0))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def save(self, path: str):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "doc_lengths": self.doc_lengths, "postings": self.postings},
+                      f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """Returns the saved index, or None if there is none (e.g. an index built before hybrid search)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(data["postings"], data["doc_lengths"], k1=data["k1"], b=data["b"])
+
+    def __len__(self):
+        return len(self.doc_lengths)
@@ -0,0 +1,298 @@
+"""
+Long-lived LLM client shared by every session.
+- Backends are pluggable: the Groq (OpenAI-compatible) HTTP API, the offline stub, or a test fake.
+- One pooled keep-alive HTTP client instead of a new ChatGroq per question.
+- A deadline per answer, jittered retries on 429 / 5xx / connection errors (before the first token only),
+  and an optional hedged second request when the first token is later than the observed p95.
+- Every request (retries and hedges included) is booked against the process-wide requests/tokens-per-minute
+  budget (RateLimiter.shared()), whichever path it comes from.
+"""
+import json
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import httpx
+
+from backend.config import (
+    GROQ_API_BASE, GROQ_API_KEY, LLM_MODEL, LLM_TEMPERATURE, LLM_BACKEND, LLM_POOL_SIZE, LLM_CONNECT_TIMEOUT,
+    LLM_DEADLINE_SECONDS, LLM_MAX_RETRIES, LLM_RETRY_BASE_DELAY, LLM_RETRY_MAX_DELAY, LLM_HEDGE_ENABLED,
+    LLM_HEDGE_DEFAULT_DELAY, LLM_HEDGE_MIN_DELAY, LLM_HEDGE_MIN_SAMPLES, LLM_NUM_PREDICT
+)
+from backend.exceptions.custom_exceptions import LLMConnectionError, LLMTimeoutError
+from backend.utils.context_builder import estimate_tokens
+from backend.utils.metrics import Metrics
+from backend.utils.rate_limiter import RateLimiter
+
+Metrics.register_collector("pria_rate_limiter", lambda: RateLimiter.shared().stats())
+
+
+class RetryableLLMError(Exception):
+    """Raised by backends for failures worth retrying (rate limits, 5xx, dropped connections)."""
+
+    def __init__(self, message, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMBackend:
+    """
+    Transport interface. stream() yields answer text pieces for a list of {"role", "content"} messages,
+    gives up after `timeout` seconds, and stops early once `cancel` (a threading.Event) is set.
+    """
+
+    name = "base"
+
+    def stream(self, messages, timeout: float, cancel=None):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _retry_after(headers):
+    try:
+        return max(0.0, float(headers.get("retry-after", "")))
+    except ValueError:
+        return None
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Streaming /chat/completions over a pooled keep-alive httpx client (Groq, or any compatible server)."""
+
+    name = "openai-compatible"
+
+    def __init__(self, base_url: str = GROQ_API_BASE, api_key: str = GROQ_API_KEY, model: str = LLM_MODEL,
+                 temperature: float = LLM_TEMPERATURE, pool_size: int = LLM_POOL_SIZE,
+                 connect_timeout: float = LLM_CONNECT_TIMEOUT):
+        self.model = model
+        self.temperature = temperature
+        self.connect_timeout = connect_timeout
+        self._client = httpx.Client(
+            base_url=base_url.rstrip("/"),
+            headers={"Authorization": f"Bearer {api_key}"},
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=60),
+        )
+
+    def stream(self, messages, timeout: float, cancel=None):
+        payload = {"model": self.model, "messages": messages, "temperature": self.temperature, "stream": True}
+        request_timeout = httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+        try:
+            with self._client.stream("POST", "/chat/completions", json=payload, timeout=request_timeout) as response:
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableLLMError(f"LLM returned HTTP {response.status_code}", _retry_after(response.headers))
+                if response.status_code != 200:
+                    response.read()
+                    raise LLMConnectionError(f"LLM request failed ({response.status_code}): {response.text[:200]}")
+                for line in response.iter_lines():
+                    if cancel is not None and cancel.is_set():
+                        return
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[5:].strip()
+                    if data == "[DONE]":
+                        # Keep reading to the end of the body so the connection goes back to the pool
+                        continue
+                    choices = json.loads(data).get("choices") or [{}]
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        except httpx.TransportError as e:
+            # Connect/read timeouts, refused or reset connections
+            raise RetryableLLMError(f"{type(e).__name__}: {e}")
+
+    def close(self):
+        self._client.close()
+
+
+class LLMClient:
+    """Wraps a backend with deadlines, retries and hedging. Use LLMClient.shared() for the app-wide instance."""
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, backend: LLMBackend, deadline: float = LLM_DEADLINE_SECONDS, max_retries: int = LLM_MAX_RETRIES,
+                 retry_base_delay: float = LLM_RETRY_BASE_DELAY, retry_max_delay: float = LLM_RETRY_MAX_DELAY,
+                 hedge: bool = LLM_HEDGE_ENABLED, hedge_default_delay: float = LLM_HEDGE_DEFAULT_DELAY,
+                 hedge_min_delay: float = LLM_HEDGE_MIN_DELAY, hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+                 limiter: RateLimiter = None):
+        self.backend = backend
+        self.deadline = deadline
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.hedge = hedge
+        self.hedge_default_delay = hedge_default_delay
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.limiter = limiter  # None: no budget (the offline stub, tests)
+        self._lock = threading.Lock()
+        self._ttfts = deque(maxlen=200)
+        self._stats = {"requests": 0, "retries": 0, "failures": 0, "timeouts": 0, "hedges": 0, "hedge_wins": 0}
+
+    @classmethod
+    def shared(cls):
+        """The process-wide client for LLM_BACKEND ("groq", or "stub" for offline benchmarks/load tests)."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    if LLM_BACKEND == "stub":
+                        from backend.utils.offline_models import StubLLMBackend
+                        cls._shared = cls(StubLLMBackend())
+                    else:
+                        cls._shared = cls(OpenAICompatibleBackend(), limiter=RateLimiter.shared())
+        return cls._shared
+
+    def stream(self, messages, deadline: float = None):
+        """
+        Yields answer text. Raises LLMTimeoutError past the deadline, LLMConnectionError when retries run out.
+        Waits for rate-limit budget first; the deadline starts once the request may be sent.
+        """
+        self._count("requests")
+        tokens = estimate_tokens("".join(m["content"] for m in messages)) + LLM_NUM_PREDICT
+        if self.limiter is not None:
+            Metrics.observe("pria_stage_seconds", self.limiter.acquire(tokens), stage="rate_limit_wait")
+        deadline_at = time.monotonic() + (deadline or self.deadline)
+        try:
+            if self.hedge:
+                yield from self._hedged(messages, deadline_at, tokens)
+            else:
+                yield from self._with_retries(messages, deadline_at, tokens=tokens)
+        except LLMTimeoutError:
+            self._count("timeouts")
+            raise
+        except LLMConnectionError:
+            self._count("failures")
+            raise
+
+    def hedge_delay(self):
+        """p95 of recent time-to-first-token (a default until enough samples), never below the floor."""
+        with self._lock:
+            samples = sorted(self._ttfts)
+        if len(samples) < self.hedge_min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, samples[int(0.95 * (len(samples) - 1))])
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_delay"] = round(self.hedge_delay(), 3)
+        return stats
+
+    def close(self):
+        self.backend.close()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _with_retries(self, messages, deadline_at, cancel=None, tokens=0):
+        attempt = 0
+        while True:
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                raise LLMTimeoutError("LLM deadline exceeded before the answer started.")
+            started = time.monotonic()
+            emitted = False
+            try:
+                for piece in self.backend.stream(messages, timeout=remaining, cancel=cancel):
+                    if not emitted:
+                        emitted = True
+                        with self._lock:
+                            self._ttfts.append(time.monotonic() - started)
+                    yield piece
+                    if time.monotonic() > deadline_at:
+                        raise LLMTimeoutError("LLM deadline exceeded mid-answer.")
+                return
+            except RetryableLLMError as e:
+                if emitted:
+                    # Part of the answer is already on screen; a silent retry would duplicate it
+                    raise LLMConnectionError(f"LLM stream broke mid-answer: {e}")
+                if time.monotonic() >= deadline_at:
+                    raise LLMTimeoutError(f"LLM deadline exceeded: {e}")
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise LLMConnectionError(f"LLM unavailable after {attempt} attempts: {e}")
+                delay = e.retry_after
+                if delay is None:
+                    delay = random.uniform(0, min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempt - 1)))
+                if self.limiter is not None:
+                    # A retry is another request against the budget
+                    delay = max(delay, self.limiter.reserve(tokens))
+                if time.monotonic() + delay >= deadline_at:
+                    raise LLMTimeoutError(f"LLM deadline would pass while backing off: {e}")
+                self._count("retries")
+                Metrics.inc("pria_llm_retries_total")
+                print(f"[LLM] {e}; retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                if cancel is not None:
+                    if cancel.wait(delay):
+                        return
+                else:
+                    time.sleep(delay)
+
+    def _hedged(self, messages, deadline_at, tokens=0):
+        """Primary request, plus a second one if no token arrives within hedge_delay(). First to answer wins."""
+        events = queue.Queue()
+        cancels = []
+
+        def run(attempt, cancel):
+            try:
+                for piece in self._with_retries(messages, deadline_at, cancel, tokens):
+                    if cancel.is_set():
+                        return
+                    events.put((attempt, "token", piece))
+                events.put((attempt, "done", None))
+            except Exception as e:
+                events.put((attempt, "error", e))
+
+        def launch():
+            cancel = threading.Event()
+            cancels.append(cancel)
+            threading.Thread(target=run, args=(len(cancels) - 1, cancel), name="llm-hedge", daemon=True).start()
+
+        launch()
+        hedge_at = time.monotonic() + self.hedge_delay()
+        winner, failed = None, set()
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline_at:
+                    raise LLMTimeoutError("LLM deadline exceeded.")
+                wait = deadline_at - now
+                can_hedge = winner is None and len(cancels) == 1 and not failed
+                if can_hedge:
+                    wait = min(wait, max(0.0, hedge_at - now))
+                try:
+                    attempt, kind, value = events.get(timeout=wait)
+                except queue.Empty:
+                    if can_hedge and time.monotonic() >= hedge_at:
+                        if self.limiter is not None and not self.limiter.try_reserve(tokens):
+                            hedge_at = deadline_at  # No spare budget: the hedge is optional, skip it
+                            continue
+                        launch()
+                        self._count("hedges")
+                        Metrics.inc("pria_llm_hedges_total")
+                    continue
+
+                if winner is not None and attempt != winner:
+                    continue
+                if kind == "error":
+                    failed.add(attempt)
+                    if winner is None and len(failed) < len(cancels):
+                        continue  # The other request may still answer
+                    raise value
+                if winner is None:
+                    winner = attempt
+                    if attempt:
+                        self._count("hedge_wins")
+                    for i, cancel in enumerate(cancels):
+                        if i != winner:
+                            cancel.set()
+                if kind == "done":
+                    return
+                yield value
+        finally:
+            for cancel in cancels:
+                cancel.set()
@@ -0,0 +1,198 @@
+"""
+In-process metrics: timed spans, histograms and counters for every stage of a question
+and of an ingest, exported as Prometheus text.
+Recording is a dict lookup + a few additions under one lock, cheap enough to stay on in production.
+"""
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Upper bounds in seconds (Prometheus "le" buckets); +Inf is implicit
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "sum", "max")
+
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.buckets[bisect_left(LATENCY_BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Bucket upper bound at quantile q (what histogram_quantile() would report, without interpolation)."""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                # A bucket bound can't be larger than anything actually observed
+                return min(LATENCY_BUCKETS[i], self.max) if i < len(LATENCY_BUCKETS) else self.max
+        return self.max
+
+
+class Metrics:
+    """
+    Process-wide metric store shared by all Streamlit sessions.
+    - span("stage") times a block into the `pria_stage_seconds` histogram.
+    - observe()/inc() record histograms and counters directly.
+    - Collectors (e.g. cache stats) are read only when metrics are exported.
+    """
+
+    _lock = threading.Lock()
+    _histograms = {}
+    _counters = {}
+    _collectors = {}
+
+    @classmethod
+    def observe(cls, name: str, seconds: float, **labels):
+        key = (name, _label_key(labels))
+        with cls._lock:
+            hist = cls._histograms.get(key)
+            if hist is None:
+                hist = cls._histograms[key] = _Histogram()
+            hist.observe(seconds)
+
+    @classmethod
+    def inc(cls, name: str, amount: float = 1, **labels):
+        key = (name, _label_key(labels))
+        with cls._lock:
+            cls._counters[key] = cls._counters.get(key, 0) + amount
+
+    @classmethod
+    @contextmanager
+    def span(cls, stage: str, **labels):
+        """Times the block as one stage; failures are counted separately in `pria_stage_errors_total`."""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            cls.inc("pria_stage_errors_total", stage=stage, **labels)
+            raise
+        finally:
+            cls.observe("pria_stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    @classmethod
+    def timed_stream(cls, stream, started: float = None, **labels):
+        """
+        Wraps an LLM token stream: records time to first token (from `started`, default now),
+        the streamed-token phase and the token count. Works for partially consumed streams too.
+        """
+        started = time.perf_counter() if started is None else started
+        first = None
+        tokens = 0
+        try:
+            for token in stream:
+                if first is None:
+                    first = time.perf_counter()
+                    cls.observe("pria_stage_seconds", first - started, stage="llm_ttft", **labels)
+                tokens += 1
+                yield token
+        finally:
+            if first is not None:
+                cls.observe("pria_stage_seconds", time.perf_counter() - first, stage="llm_stream", **labels)
+            cls.observe("pria_stage_seconds", time.perf_counter() - started, stage="llm_total", **labels)
+            cls.inc("pria_llm_tokens_total", tokens, **labels)
+
+    @classmethod
+    def register_collector(cls, prefix: str, stats_fn):
+        """stats_fn() returns a flat dict; its numeric values are exported as `<prefix>_<key>` gauges."""
+        with cls._lock:
+            cls._collectors[prefix] = stats_fn
+
+    @classmethod
+    def summary(cls):
+        """Per-stage latency table for the admin panel: count, mean, p50/p95 (bucket bounds) and max, in ms."""
+        with cls._lock:
+            items = [(key, hist.count, hist.sum, hist.quantile(0.5), hist.quantile(0.95), hist.max)
+                     for key, hist in cls._histograms.items()]
+        rows = []
+        for (name, labels), count, total, p50, p95, worst in sorted(items):
+            rows.append({
+                "metric": name + _format_labels(labels),
+                "count": count,
+                "mean_ms": round(total / count * 1000, 2) if count else 0.0,
+                "p50_ms": round(p50 * 1000, 2),
+                "p95_ms": round(p95 * 1000, 2),
+                "max_ms": round(worst * 1000, 2),
+            })
+        return rows
+
+    @classmethod
+    def counters(cls):
+        with cls._lock:
+            return {name + _format_labels(labels): value for (name, labels), value in sorted(cls._counters.items())}
+
+    @classmethod
+    def prometheus_text(cls):
+        """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+        with cls._lock:
+            histograms = [(key, list(h.buckets), h.count, h.sum) for key, h in cls._histograms.items()]
+            counters = list(cls._counters.items())
+            collectors = list(cls._collectors.items())
+
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), buckets, count, total in sorted(histograms):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += n
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total:.6f}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        for (name, labels), value in sorted(counters):
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for prefix, stats_fn in sorted(collectors, key=lambda c: c[0]):
+            try:
+                stats = stats_fn()
+            except Exception as e:
+                print(f"[METRICS] Collector {prefix} failed: {e}")
+                continue
+            for key, value in sorted(stats.items()):
+                if isinstance(value, bool):
+                    value = int(value)
+                if isinstance(value, (int, float)):
+                    name = f"{prefix}_{key}"
+                    declare(name, "gauge")
+                    lines.append(f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def reset(cls):
+        """Drops recorded histograms and counters (collectors stay registered)."""
+        with cls._lock:
+            cls._histograms.clear()
+            cls._counters.clear()
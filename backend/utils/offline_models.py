@@ -0,0 +1,68 @@
+"""
+Deterministic offline stand-ins for the LLM and the embedding model.
+Used by benchmarks and load tests (LLM_BACKEND=stub, EMBEDDING_BACKEND=hashing) so they run
+without a Groq key, a model download or network access.
+"""
+import re
+import time
+import zlib
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.config import STUB_LLM_TTFT_MS, STUB_LLM_TOKEN_MS
+from backend.utils.llm_client import LLMBackend
+
+_WORD = re.compile(r"\w+")
+
+
+class StubLLMBackend(LLMBackend):
+    """Streams a fixed-length answer with configurable time-to-first-token and per-token latency."""
+
+    name = "stub"
+
+    def __init__(self, ttft_ms: float = STUB_LLM_TTFT_MS, token_ms: float = STUB_LLM_TOKEN_MS,
+                 response_tokens: int = 24):
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.response_tokens = response_tokens
+
+    def _tokens(self, messages):
+        question = str(messages[-1]["content"]) if messages else ""
+        words = _WORD.findall(question.lower()) or ["answer"]
+        # Same question -> same answer, so outputs can be compared across runs
+        return [f"{words[i % len(words)]} " for i in range(self.response_tokens)]
+
+    def stream(self, messages, timeout: float, cancel=None):
+        time.sleep(min(self.ttft_ms / 1000, timeout))
+        for i, token in enumerate(self._tokens(messages)):
+            if cancel is not None and cancel.is_set():
+                return
+            if i:
+                time.sleep(self.token_ms / 1000)
+            yield token
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    Feature-hashed bag of words. Fast, deterministic across processes, and lexically
+    meaningful enough that retrieval benchmarks return sensible chunks.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str):
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            h = zlib.crc32(word.encode("utf-8"))
+            vector[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
@@ -1,19 +1,173 @@
 """Helper functions for extracting text from resume files."""
+import io
+import multiprocessing
+import os
+from collections import deque
+
 import pdfplumber
 from docx import Document
 
-def extract_text_from_pdf(file_path):
+from backend.config import MAX_UPLOAD_BYTES, MAX_PDF_PAGES, MAX_TEXT_CHARS, PDF_PAGE_TIMEOUT, PDF_PAGE_WORKERS
+from backend.exceptions.custom_exceptions import DocumentProcessingError
+
+# Pages handed to one worker at a time when extracting in parallel
+PAGES_PER_TASK = 4
+
+# Worker-process copy of the PDF being extracted (a path, or the upload's bytes)
+_worker_source = None
+
+
+def extract_text_from_pdf(file_path, workers: int = PDF_PAGE_WORKERS):
     """Extracts all text from a PDF file."""
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-    return text
+    return "".join(page + "\n" for page in iter_pdf_pages(file_path, workers=workers))
 
 def extract_text_from_docx(file_path):
     """Extracts all text from a Word (DOCX) file."""
-    doc = Document(file_path)
-    text = "\n".join([para.text for para in doc.paragraphs])
-    return text
+    return "\n".join(iter_docx_sections(file_path))
+
+
+def iter_document_sections(source, ext, workers: int = PDF_PAGE_WORKERS):
+    """Yields text sections (PDF pages / DOCX paragraph blocks) for a path or file-like object."""
+    if ext == ".pdf":
+        return iter_pdf_pages(source, workers=workers)
+    if ext == ".docx":
+        return iter_docx_sections(source)
+    raise DocumentProcessingError(f"Unsupported file type: {ext}")
+
+
+def iter_pdf_pages(source, max_pages: int = MAX_PDF_PAGES, max_chars: int = MAX_TEXT_CHARS,
+                   workers: int = PDF_PAGE_WORKERS, page_timeout: float = PDF_PAGE_TIMEOUT):
+    """
+    Yields the text of each PDF page (empty pages skipped) without building the whole document.
+    - source: path or binary file-like object (no temp copy needed).
+    - max_pages / max_chars: extraction stops once either limit is reached.
+    - workers > 1: pages are extracted in worker processes (each gets the path, or one copy of
+      the upload's bytes). A page block that exceeds its timeout is skipped and its worker killed,
+      instead of stalling the upload.
+    """
+    _check_size(source)
+    pages = _iter_pdf_pages_parallel(source, max_pages, workers, page_timeout) \
+        if workers > 1 else _iter_pdf_pages_serial(source, max_pages)
+    yield from _limit_chars(pages, max_chars)
+
+
+def iter_docx_sections(source, max_chars: int = MAX_TEXT_CHARS, section_chars: int = 2000):
+    """Yields DOCX paragraphs grouped into ~section_chars blocks."""
+    _check_size(source)
+    doc = Document(source)
+    yield from _limit_chars(_group_paragraphs(doc.paragraphs, section_chars), max_chars)
+
+
+def _group_paragraphs(paragraphs, section_chars):
+    block, size = [], 0
+    for para in paragraphs:
+        block.append(para.text)
+        size += len(para.text) + 1
+        if size >= section_chars:
+            yield "\n".join(block)
+            block, size = [], 0
+    if block:
+        yield "\n".join(block)
+
+
+def _iter_pdf_pages_serial(source, max_pages):
+    with pdfplumber.open(source) as pdf:
+        for page in pdf.pages[:max_pages]:
+            page_text = page.extract_text()
+            # Drop the parsed layout objects as soon as the page is done
+            page.close()
+            if page_text:
+                yield page_text
+
+
+def _iter_pdf_pages_parallel(source, max_pages, workers, page_timeout):
+    if not isinstance(source, (str, os.PathLike)):
+        source.seek(0)
+        source = source.getvalue() if hasattr(source, "getvalue") else source.read()
+    with pdfplumber.open(_open_source(source)) as pdf:
+        page_count = min(len(pdf.pages), max_pages)
+
+    blocks = iter([(start, min(start + PAGES_PER_TASK, page_count))
+                   for start in range(0, page_count, PAGES_PER_TASK)])
+    pool = _start_pool(workers, source)
+    pending = deque()
+    try:
+        # Sliding window keeps at most 2 blocks per worker in memory and yields pages in order
+        for block in blocks:
+            pending.append((block, pool.apply_async(_extract_page_range, block)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            (start, end), result = pending.popleft()
+            try:
+                texts = result.get(timeout=page_timeout * (end - start))
+            except multiprocessing.TimeoutError:
+                print(f"[PARSER] Pages {start + 1}-{end} timed out after {page_timeout}s/page; skipped.")
+                texts = []
+                # A worker stuck inside pdfplumber can't be interrupted: kill the pool, requeue the rest
+                pool.terminate()
+                pool = _start_pool(workers, source)
+                in_flight = [block for block, _ in pending]
+                pending.clear()
+                for block in in_flight:
+                    pending.append((block, pool.apply_async(_extract_page_range, block)))
+            for text in texts:
+                if text:
+                    yield text
+            for block in blocks:
+                pending.append((block, pool.apply_async(_extract_page_range, block)))
+                break
+    finally:
+        # Also stops the workers when the caller abandons the generator early (e.g. the char limit)
+        pool.terminate()
+        pool.join()
+
+
+def _start_pool(workers, source):
+    return multiprocessing.Pool(processes=workers, initializer=_init_worker, initargs=(source,))
+
+
+def _init_worker(source):
+    global _worker_source
+    _worker_source = source
+
+
+def _open_source(source):
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def _extract_page_range(start, end):
+    """Worker process: extracts pages [start, end) of the PDF given to _init_worker."""
+    texts = []
+    with pdfplumber.open(_open_source(_worker_source)) as pdf:
+        for page in pdf.pages[start:end]:
+            texts.append(page.extract_text() or "")
+            page.close()
+    return texts
+
+
+def _limit_chars(sections, max_chars):
+    total = 0
+    for section in sections:
+        if total + len(section) > max_chars:
+            remaining = max_chars - total
+            if remaining > 0:
+                yield section[:remaining]
+            print(f"[PARSER] Text limit of {max_chars} characters reached; the rest of the document is ignored.")
+            return
+        total += len(section)
+        yield section
+
+
+def _check_size(source):
+    """Rejects inputs over MAX_UPLOAD_BYTES before any parsing happens."""
+    if isinstance(source, (str, os.PathLike)):
+        size = os.path.getsize(source)
+    elif hasattr(source, "getbuffer"):
+        size = source.getbuffer().nbytes
+    else:
+        size = getattr(source, "size", 0) or 0
+    if size > MAX_UPLOAD_BYTES:
+        raise DocumentProcessingError(
+            f"File is {size / 1024 / 1024:.1f} MB; the limit is {MAX_UPLOAD_BYTES / 1024 / 1024:.0f} MB."
+        )
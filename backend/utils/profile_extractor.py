@@ -0,0 +1,174 @@
+"""
+Rule-based structured profile extraction (no LLM): name, emails, phones, URLs, location,
+section headings and skill/language/certification lists.
+Fed line by line during ingest, so it works on streamed pages with bounded memory.
+"""
+import re
+
+PROFILE_FIELDS = ["name", "email", "phone", "linkedin", "github", "website", "location",
+                  "emails", "phones", "urls", "headings", "skills", "languages", "certifications"]
+
+EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE = re.compile(r"(?<![\w/])(?:\+\d{1,3}[\s.-]?)?(?:\(?\d{2,5}\)?[\s.-]?){1,4}\d{3,5}(?![\w/])")
+URL = re.compile(r"(?:https?://|www\.)[^\s,;|()<>]+|\b(?:linkedin\.com|github\.com)/[^\s,;|()<>]+", re.IGNORECASE)
+LOCATION_LABEL = re.compile(r"^\s*(?:location|address|based in|city)\s*[:\-]\s*(.+)$", re.IGNORECASE)
+# "Bengaluru, India" / "San Francisco, CA" / "Austin, TX, USA" style header lines
+CITY_LINE = re.compile(r"^[A-Z][A-Za-z .'-]{1,40}(?:,\s*[A-Z][A-Za-z .'-]{1,40}){1,2}$")
+# The part after the last comma must be one of these, so "Senior Data Engineer, Acme Corp" is not a location
+PLACES = frozenset(p.strip().lower() for p in """
+    india, usa, us, u.s., u.s.a., united states, united states of america, uk, u.k., united kingdom, england,
+    scotland, wales, ireland, canada, australia, new zealand, germany, france, netherlands, belgium, spain,
+    portugal, italy, switzerland, austria, sweden, norway, denmark, finland, poland, czech republic, romania,
+    ukraine, israel, uae, united arab emirates, saudi arabia, qatar, egypt, nigeria, kenya, south africa,
+    singapore, malaysia, indonesia, philippines, vietnam, thailand, japan, china, hong kong, taiwan,
+    south korea, korea, pakistan, bangladesh, sri lanka, nepal, brazil, mexico, argentina, chile, colombia,
+    al, ak, az, ar, ca, co, ct, de, dc, fl, ga, hi, id, il, in, ia, ks, ky, la, me, md, ma, mi, mn, ms, mo,
+    mt, ne, nv, nh, nj, nm, ny, nc, nd, oh, ok, or, pa, ri, sc, sd, tn, tx, ut, vt, va, wa, wv, wi, wy,
+    california, texas, new york, washington, florida, illinois, massachusetts, georgia, virginia,
+    colorado, new jersey, north carolina, pennsylvania, ohio, michigan, arizona, oregon,
+    on, bc, ab, qc, ontario, british columbia, alberta, quebec,
+    karnataka, maharashtra, tamil nadu, telangana, andhra pradesh, kerala, delhi, new delhi, haryana,
+    uttar pradesh, gujarat, west bengal, rajasthan, punjab, madhya pradesh, odisha, bihar
+""".split(","))
+NAME_LINE = re.compile(r"^[A-Z][A-Za-z.'-]+(?:\s+[A-Z][A-Za-z.'-]+){1,3}$")
+# Document titles and job titles that look like names ("Curriculum Vitae", "Senior Software Engineer")
+NOT_NAME = re.compile(
+    r"\b(curriculum|vitae|resume|r[ée]sum[ée]|cv|bio ?data|portfolio|"
+    r"engineer\w*|developer|programmer|architect|manager|analyst|consultant|scientist|designer|administrator|"
+    r"director|lead|head|officer|specialist|intern|associate|executive|coordinator|technician|tester|"
+    r"senior|junior|principal|staff|software|data|full ?stack|front ?end|back ?end|devops|cloud|"
+    r"product|project|marketing|sales|business|research|qa)\b", re.IGNORECASE)
+
+HEADINGS = {
+    "summary": "summary", "professional summary": "summary", "profile": "summary", "objective": "summary",
+    "about me": "summary", "skills": "skills", "technical skills": "skills", "core skills": "skills",
+    "key skills": "skills", "core competencies": "skills", "technologies": "skills", "tech stack": "skills",
+    "experience": "experience", "work experience": "experience", "professional experience": "experience",
+    "employment history": "experience", "education": "education", "academic background": "education",
+    "projects": "projects", "key projects": "projects", "certifications": "certifications",
+    "certificates": "certifications", "licenses & certifications": "certifications",
+    "languages": "languages", "languages known": "languages", "achievements": "achievements",
+    "awards": "achievements", "publications": "publications", "interests": "interests", "hobbies": "interests",
+}
+HEADER_SECTION = "header"  # Text above the first heading (name, contact line)
+LIST_SECTIONS = ("skills", "languages", "certifications")
+LIST_FIELDS = ("emails", "phones", "urls", "headings") + LIST_SECTIONS
+HEADER_LINES = 8  # Name/contact/location are only trusted near the top
+MAX_LIST_ITEMS = 60
+_SPLIT_ITEMS = re.compile(r"\s*(?:[,;|•·▪●]|\s-\s|\t)\s*")
+_BULLET = re.compile(r"^[\s•·▪●*\-–]+")
+# "Languages: Python, Go" / "Tools - Spark, Airflow": a short inline label before the items
+_INLINE_LABEL = re.compile(r"^[^,;|:]{1,30}?(?::|\s[-–]\s)\s*")
+
+
+def heading_section(line: str):
+    """Canonical section for a heading line ("TECHNICAL SKILLS:" -> "skills"), else None."""
+    candidate = line.strip().rstrip(":").strip().lower()
+    if len(candidate) > 40:
+        return None
+    return HEADINGS.get(candidate)
+
+
+def _phone_digits(raw: str):
+    digits = re.sub(r"\D", "", raw)
+    return digits if 10 <= len(digits) <= 15 else None
+
+
+class ProfileExtractor:
+    """Incremental extractor: feed() text as it arrives, then result() returns the profile dict."""
+
+    def __init__(self):
+        self._pending = ""
+        self._line_no = 0
+        self._section = None
+        self.name = ""
+        self.location = ""
+        self.emails, self.phones, self.urls, self.headings = [], [], [], []
+        self.lists = {section: [] for section in LIST_SECTIONS}
+
+    def tap(self, sections):
+        """Passes text sections through unchanged while feeding them to the extractor."""
+        for section in sections:
+            self.feed(section + "\n")
+            yield section
+
+    def feed(self, text: str):
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def result(self):
+        if self._pending:
+            self._line(self._pending)
+            self._pending = ""
+        urls = self.urls
+        profile = {
+            "name": self.name,
+            "email": self.emails[0] if self.emails else "",
+            "phone": self.phones[0] if self.phones else "",
+            "linkedin": next((u for u in urls if "linkedin.com" in u.lower()), ""),
+            "github": next((u for u in urls if "github.com" in u.lower()), ""),
+            "website": next((u for u in urls if "linkedin.com" not in u.lower() and "github.com" not in u.lower()), ""),
+            "location": self.location,
+            "emails": self.emails,
+            "phones": self.phones,
+            "urls": urls,
+            "headings": self.headings,
+        }
+        profile.update(self.lists)
+        return profile
+
+    def _line(self, raw: str):
+        line = raw.strip()
+        if not line:
+            return
+        self._line_no += 1
+        in_header = self._line_no <= HEADER_LINES
+
+        section = heading_section(line)
+        if section:
+            self._section = section
+            self.headings.append(line.rstrip(":").strip())
+            return
+
+        for email in EMAIL.findall(line):
+            if email.lower() not in (e.lower() for e in self.emails):
+                self.emails.append(email)
+        line_without_emails = EMAIL.sub(" ", line)
+        for url in URL.findall(line_without_emails):
+            url = url.rstrip(".")
+            if url not in self.urls:
+                self.urls.append(url)
+        for match in PHONE.findall(URL.sub(" ", line_without_emails)):
+            digits = _phone_digits(match)
+            if digits and digits not in (_phone_digits(p) for p in self.phones):
+                self.phones.append(match.strip())
+
+        label = LOCATION_LABEL.match(line)
+        if label and not self.location:
+            self.location = label.group(1).strip()
+        elif in_header and not self.location and CITY_LINE.match(line) \
+                and line.rsplit(",", 1)[1].strip().lower() in PLACES:
+            self.location = line
+
+        if in_header and not self.name and self._section is None and NAME_LINE.match(line) \
+                and not NOT_NAME.search(line):
+            self.name = line.title() if line.isupper() else line
+        elif self._section in LIST_SECTIONS:
+            self._add_items(self._section, line)
+
+    def _add_items(self, section, line):
+        items = self.lists[section]
+        line = _INLINE_LABEL.sub("", _BULLET.sub("", line), count=1)
+        for item in _SPLIT_ITEMS.split(line):
+            item = item.strip(" .")
+            if 1 < len(item) <= 60 and len(items) < MAX_LIST_ITEMS and item.lower() not in (i.lower() for i in items):
+                items.append(item)
+
+
+def extract_profile(text: str):
+    """One-shot extraction from a full text."""
+    extractor = ProfileExtractor()
+    extractor.feed(text)
+    return extractor.result()
@@ -1,58 +1,107 @@
 """
 Query Logger — Works on Streamlit Cloud using Supabase (free) OR fallback to print logs.
 Supabase free tier: 500MB storage, unlimited rows — enough for thousands of queries!
+
+Logging never blocks a viewer: log() only enqueues. A background writer batches inserts,
+and spools to a local SQLite file when Supabase is slow, failing or not configured.
+Spooled rows are replayed once the remote is healthy again; the spool keeps at most
+QUERY_LOG_SPOOL_MAX_ROWS (oldest dropped first).
 """
+import importlib.util
 import os
+import queue
+import sqlite3
+import threading
+import time
 from datetime import datetime
 
-# Try to import supabase — if not installed, fallback to print logging
-try:
-    from supabase import create_client
-    SUPABASE_ENABLED = True
-except ImportError:
-    SUPABASE_ENABLED = False
+from backend.config import (
+    QUERY_LOG_QUEUE_SIZE, QUERY_LOG_BATCH_SIZE, QUERY_LOG_FLUSH_SECONDS,
+    QUERY_LOG_SLOW_SECONDS, QUERY_LOG_BACKOFF_SECONDS, QUERY_LOG_SPOOL_PATH, QUERY_LOG_SPOOL_MAX_ROWS
+)
+
+# If supabase isn't installed, fallback to print logging. The package itself (~0.5s) is imported on first use
+SUPABASE_ENABLED = importlib.util.find_spec("supabase") is not None
+
+_client = None
+_client_lock = threading.Lock()
 
 
 def _get_supabase_client():
-    """Returns a Supabase client using env vars."""
-    url = os.getenv("SUPABASE_URL", "")
-    key = os.getenv("SUPABASE_KEY", "")
-    if url and key and SUPABASE_ENABLED:
-        return create_client(url, key)
-    return None
+    """Returns the shared Supabase client (created once) using env vars."""
+    global _client
+    if _client is None:
+        url = os.getenv("SUPABASE_URL", "")
+        key = os.getenv("SUPABASE_KEY", "")
+        if url and key and SUPABASE_ENABLED:
+            with _client_lock:
+                if _client is None:
+                    from supabase import create_client, ClientOptions
+                    # A hung insert must not stall the writer for the default 120s
+                    options = ClientOptions(postgrest_client_timeout=QUERY_LOG_SLOW_SECONDS * 3)
+                    _client = create_client(url, key, options=options)
+    return _client
 
 
 class QueryLogger:
     """
     Logs every user question with timestamp.
     - If Supabase env vars are set → saves to cloud DB (permanent!)
-    - Otherwise → prints to console (visible in Streamlit Cloud Logs tab)
+    - Otherwise → prints to console (visible in Streamlit Cloud Logs tab) and keeps a local spool
     """
 
+    _queue = queue.Queue(maxsize=QUERY_LOG_QUEUE_SIZE)
+    _writer = None
+    _writer_lock = threading.Lock()
+    _spool_lock = threading.Lock()
+    _spool_conn = None
+    _stats_lock = threading.Lock()
+    _backoff_until = 0.0
+    _stats = {"enqueued": 0, "dropped": 0, "sent": 0, "spooled": 0, "spool_dropped": 0, "replayed": 0,
+              "remote_errors": 0, "slow_inserts": 0}
+
     @staticmethod
     def log(query: str, answer: str, source: str = "live"):
-        """Saves a question + answer + timestamp."""
+        """Queues a question + answer + timestamp. Returns immediately."""
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
         # Always print to console (visible in Streamlit Cloud → Logs tab)
         print(f"[QUERY LOG] [{timestamp}] SOURCE={source} | Q: {query} | A: {answer[:100]}")
 
-        # If Supabase configured → save to DB (permanent)
-        client = _get_supabase_client()
-        if client:
-            try:
-                client.table("query_logs").insert({
-                    "timestamp": timestamp,
-                    "question": query.strip(),
-                    "answer": answer.strip()[:500],
-                    "source": source
-                }).execute()
-            except Exception as e:
-                print(f"[QUERY LOG] Supabase error: {e}")
+        record = {
+            "timestamp": timestamp,
+            "question": query.strip(),
+            "answer": answer.strip()[:500],
+            "source": source
+        }
+        QueryLogger._ensure_writer()
+        try:
+            QueryLogger._queue.put_nowait(record)
+            QueryLogger._count("enqueued")
+        except queue.Full:
+            QueryLogger._count("dropped")
+
+    @staticmethod
+    def flush(timeout: float = 10.0):
+        """Blocks until everything queued so far has been sent or spooled (used by tests/shutdown)."""
+        deadline = time.monotonic() + timeout
+        while QueryLogger._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return QueryLogger._queue.unfinished_tasks == 0
+
+    @staticmethod
+    def stats():
+        """Queue depth plus sent/spooled/replayed/dropped counters."""
+        with QueryLogger._stats_lock:
+            stats = dict(QueryLogger._stats)
+        stats["queue_depth"] = QueryLogger._queue.qsize()
+        stats["spool_depth"] = QueryLogger._spool_count()
+        stats["remote_paused"] = time.monotonic() < QueryLogger._backoff_until
+        return stats
 
     @staticmethod
     def get_all():
-        """Returns all logged queries from Supabase (or empty list if not configured)."""
+        """Returns the latest 100 logged queries (Supabase, or the local spool if not configured)."""
         client = _get_supabase_client()
         if client:
             try:
@@ -61,14 +110,166 @@ class QueryLogger:
             except Exception as e:
                 print(f"[QUERY LOG] Supabase fetch error: {e}")
                 return []
-        return []  # No Supabase → no persistent logs
+        return QueryLogger._read_spool(limit=100, newest_first=True)
 
     @staticmethod
     def clear():
-        """Clears all logs (admin only) — only works if Supabase is configured."""
+        """Clears all logs (admin only): Supabase table and local spool."""
         client = _get_supabase_client()
         if client:
             try:
                 client.table("query_logs").delete().neq("id", 0).execute()
             except Exception as e:
                 print(f"[QUERY LOG] Supabase clear error: {e}")
+        with QueryLogger._spool_lock:
+            conn = QueryLogger._spool_connection()
+            with conn:
+                conn.execute("DELETE FROM spool")
+
+    @staticmethod
+    def _count(name, amount=1):
+        with QueryLogger._stats_lock:
+            QueryLogger._stats[name] += amount
+
+    # ---------- background writer ----------
+
+    @staticmethod
+    def _ensure_writer():
+        if QueryLogger._writer is not None and QueryLogger._writer.is_alive():
+            return
+        with QueryLogger._writer_lock:
+            if QueryLogger._writer is None or not QueryLogger._writer.is_alive():
+                QueryLogger._writer = threading.Thread(target=QueryLogger._run, name="query-logger", daemon=True)
+                QueryLogger._writer.start()
+
+    @staticmethod
+    def _run():
+        while True:
+            try:
+                batch = [QueryLogger._queue.get(timeout=QUERY_LOG_FLUSH_SECONDS * 5)]
+            except queue.Empty:
+                # Idle: a good moment to replay anything spooled while the remote was down
+                try:
+                    QueryLogger._replay_spool()
+                except Exception as e:
+                    print(f"[QUERY LOG] Replay error: {e}")
+                continue
+            deadline = time.monotonic() + QUERY_LOG_FLUSH_SECONDS
+            while len(batch) < QUERY_LOG_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(QueryLogger._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                QueryLogger._write_batch(batch)
+            except Exception as e:
+                print(f"[QUERY LOG] Writer error: {e}")
+            finally:
+                for _ in batch:
+                    QueryLogger._queue.task_done()
+
+    @staticmethod
+    def _write_batch(batch):
+        client = _get_supabase_client()
+        if client is None or time.monotonic() < QueryLogger._backoff_until:
+            QueryLogger._spool(batch)
+            return
+
+        if not QueryLogger._send(client, batch):
+            QueryLogger._spool(batch)
+            return
+        QueryLogger._count("sent", len(batch))
+
+        # Remote is healthy: drain older spooled rows, one batch per cycle
+        QueryLogger._replay_spool()
+
+    @staticmethod
+    def _replay_spool():
+        """Sends the oldest spooled batch if Supabase is configured and not paused."""
+        client = _get_supabase_client()
+        if client is None or time.monotonic() < QueryLogger._backoff_until:
+            return
+        spooled = QueryLogger._read_spool(limit=QUERY_LOG_BATCH_SIZE)
+        if spooled and QueryLogger._send(client, spooled):
+            QueryLogger._delete_spooled([row["spool_id"] for row in spooled])
+            QueryLogger._count("replayed", len(spooled))
+
+    @staticmethod
+    def _send(client, rows):
+        """One batched insert. Slow or failed inserts pause remote writes for a while."""
+        payload = [{k: v for k, v in row.items() if k != "spool_id"} for row in rows]
+        start = time.monotonic()
+        try:
+            client.table("query_logs").insert(payload).execute()
+        except Exception as e:
+            print(f"[QUERY LOG] Supabase error: {e}")
+            QueryLogger._count("remote_errors")
+            QueryLogger._backoff_until = time.monotonic() + QUERY_LOG_BACKOFF_SECONDS
+            return False
+        if time.monotonic() - start > QUERY_LOG_SLOW_SECONDS:
+            QueryLogger._count("slow_inserts")
+            QueryLogger._backoff_until = time.monotonic() + QUERY_LOG_BACKOFF_SECONDS
+        return True
+
+    # ---------- local spool ----------
+
+    @staticmethod
+    def _spool(batch):
+        with QueryLogger._spool_lock:
+            conn = QueryLogger._spool_connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO spool (timestamp, question, answer, source) VALUES (?, ?, ?, ?)",
+                    [(r["timestamp"], r["question"], r["answer"], r["source"]) for r in batch]
+                )
+                # Bounded even when nothing ever drains it: keep the newest rows
+                dropped = conn.execute(
+                    "DELETE FROM spool WHERE id IN (SELECT id FROM spool ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                    (QUERY_LOG_SPOOL_MAX_ROWS,)
+                ).rowcount
+        QueryLogger._count("spooled", len(batch))
+        if dropped > 0:
+            QueryLogger._count("spool_dropped", dropped)
+
+    @staticmethod
+    def _read_spool(limit: int, newest_first: bool = False):
+        order = "DESC" if newest_first else "ASC"
+        with QueryLogger._spool_lock:
+            conn = QueryLogger._spool_connection()
+            rows = conn.execute(
+                f"SELECT id, timestamp, question, answer, source FROM spool ORDER BY id {order} LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {"spool_id": r[0], "timestamp": r[1], "question": r[2], "answer": r[3], "source": r[4]}
+            for r in rows
+        ]
+
+    @staticmethod
+    def _delete_spooled(ids):
+        with QueryLogger._spool_lock:
+            conn = QueryLogger._spool_connection()
+            with conn:
+                conn.executemany("DELETE FROM spool WHERE id = ?", [(i,) for i in ids])
+
+    @staticmethod
+    def _spool_count():
+        with QueryLogger._spool_lock:
+            conn = QueryLogger._spool_connection()
+            count = conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+        return count
+
+    @staticmethod
+    def _spool_connection():
+        """Shared spool connection, opened on first use (callers hold _spool_lock)."""
+        if QueryLogger._spool_conn is None:
+            conn = sqlite3.connect(QUERY_LOG_SPOOL_PATH, timeout=5, check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS spool ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, question TEXT, answer TEXT, source TEXT)"
+            )
+            conn.commit()
+            QueryLogger._spool_conn = conn
+        return QueryLogger._spool_conn
@@ -0,0 +1,91 @@
+"""Requests- and tokens-per-minute budget for the LLM API (Groq enforces both per model)."""
+import threading
+import time
+
+from backend.config import LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE
+
+
+class RateLimiter:
+    """
+    Two token buckets (requests and tokens), refilled continuously at limit/60 per second and
+    starting full. reserve() books a call immediately and returns how long to wait before sending it,
+    so callers are served in arrival order without polling. A limit of 0 disables that bucket.
+    """
+
+    _shared = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, clock=time.monotonic):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = clock()
+        self._stats = {"reserved": 0, "delayed": 0, "wait_seconds": 0.0}
+
+    @classmethod
+    def shared(cls):
+        """The process-wide budget: every LLMClient.shared() call (chat, FAQ precompute, batches) draws on it."""
+        if cls._shared is None:
+            with cls._shared_lock:
+                if cls._shared is None:
+                    cls._shared = cls()
+        return cls._shared
+
+    def reserve(self, tokens: int) -> float:
+        """Books one request of ~tokens (prompt + max completion). Returns seconds to wait before sending."""
+        with self._lock:
+            return self._book(tokens, self._clock())
+
+    def try_reserve(self, tokens: int) -> bool:
+        """Books one request only if it can be sent right away (for optional calls such as hedges)."""
+        with self._lock:
+            now = self._clock()
+            elapsed = now - self._updated
+            if self.requests_per_minute > 0 and \
+                    min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60) < 1:
+                return False
+            if self.tokens_per_minute > 0 and min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60) \
+                    < min(tokens, self.tokens_per_minute):
+                return False
+            self._book(tokens, now)
+            return True
+
+    def _book(self, tokens, now):
+        """Refills both buckets up to now and takes one request out (callers hold self._lock)."""
+        elapsed, self._updated = now - self._updated, now
+        wait = 0.0
+        if self.requests_per_minute > 0:
+            rate = self.requests_per_minute / 60
+            self._requests = min(self.requests_per_minute, self._requests + elapsed * rate) - 1
+            wait = max(wait, -self._requests / rate)
+        if self.tokens_per_minute > 0:
+            rate = self.tokens_per_minute / 60
+            # A single call larger than the whole budget still goes through, once the bucket is full
+            cost = min(tokens, self.tokens_per_minute)
+            self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * rate) - cost
+            wait = max(wait, -self._tokens / rate)
+        self._stats["reserved"] += 1
+        if wait > 0:
+            self._stats["delayed"] += 1
+            self._stats["wait_seconds"] += wait
+        return wait
+
+    def acquire(self, tokens: int, cancel=None) -> float:
+        """reserve(), then sleeps until the call may be sent. Returns the seconds waited."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            if cancel is not None:
+                cancel.wait(wait)
+            else:
+                time.sleep(wait)
+        return wait
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
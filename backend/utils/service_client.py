@@ -0,0 +1,41 @@
+"""Thin client for the headless query service (backend/server.py), used by Streamlit when QUERY_SERVICE_URL is set."""
+import json
+
+from backend.config import QUERY_SERVICE_URL
+
+_client = None
+
+
+def _get_client():
+    """One pooled keep-alive client per process."""
+    global _client
+    if _client is None:
+        import httpx
+        _client = httpx.Client(timeout=httpx.Timeout(120.0, connect=5.0))
+    return _client
+
+
+class QueryServiceClient:
+    """Streams answers from the service as ("token", text) events followed by one ("done", info) event."""
+
+    @staticmethod
+    def stream(question: str, candidate_id: str = None, base_url: str = QUERY_SERVICE_URL):
+        body = {"question": question, "candidate_id": candidate_id, "stream": True}
+        with _get_client().stream("POST", f"{base_url.rstrip('/')}/ask", json=body) as response:
+            if response.status_code != 200:
+                response.read()
+                raise ConnectionError(f"Query service returned {response.status_code}: {response.text[:200]}")
+            event = "message"
+            for line in response.iter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    payload = json.loads(line[5:])
+                    if event == "token":
+                        yield "token", payload["token"]
+                    elif event == "done":
+                        yield "done", payload
+                    elif event == "error":
+                        raise ConnectionError(payload["error"])
+                elif not line:
+                    event = "message"
@@ -0,0 +1,84 @@
+"""
+Cold-start accounting: how long each startup phase (import groups, model/index warm-up) took, once per process.
+Phases before the first paint count against COLD_START_BUDGET_SECONDS; going over is logged and counted.
+"""
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.config import COLD_START_BUDGET_SECONDS
+from backend.utils.metrics import Metrics
+
+
+class StartupTimer:
+    """Class-level so every Streamlit session (and rerun) sees the same process-wide record."""
+
+    _lock = threading.Lock()
+    _phases = {}  # name -> {"seconds", "critical", "thread"} in first-seen order
+    _budget_checked = False
+
+    @classmethod
+    @contextmanager
+    def phase(cls, name: str, critical: bool = True):
+        """
+        Times a startup phase the first time it runs. critical=True means it delays the first paint
+        and counts against the cold-start budget; background warm-up phases pass critical=False.
+        """
+        if name in cls._phases:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            with cls._lock:
+                cls._phases.setdefault(name, {"seconds": seconds, "critical": critical,
+                                              "thread": threading.current_thread().name})
+            Metrics.observe("pria_startup_seconds", seconds, phase=name)
+
+    @classmethod
+    def import_module(cls, module: str, phase: str = None, critical: bool = True):
+        """Imports a heavy module on first use, timing that first import as a startup phase."""
+        if module in sys.modules:
+            # import_module (not sys.modules) so a half-done import in the warm-up thread is waited for
+            return importlib.import_module(module)
+        with cls.phase(phase or f"import:{module}", critical):
+            return importlib.import_module(module)
+
+    @classmethod
+    def critical_seconds(cls):
+        with cls._lock:
+            return sum(p["seconds"] for p in cls._phases.values() if p["critical"])
+
+    @classmethod
+    def check_budget(cls, budget: float = COLD_START_BUDGET_SECONDS):
+        """Call once the first page is rendered. Returns True when within budget (logs once if not)."""
+        spent = cls.critical_seconds()
+        within = spent <= budget
+        with cls._lock:
+            first_check = not cls._budget_checked
+            cls._budget_checked = True
+        if first_check:
+            print(f"[STARTUP] First paint after {spent * 1000:.0f} ms of startup phases (budget {budget * 1000:.0f} ms)")
+            if not within:
+                Metrics.inc("pria_startup_budget_exceeded_total")
+                slowest = sorted(cls.report(), key=lambda p: -p["ms"])[:3]
+                print(f"[STARTUP] Cold-start budget exceeded; slowest phases: {slowest}")
+        return within
+
+    @classmethod
+    def report(cls):
+        """Phases in the order they ran: name, milliseconds, whether they block the first paint, thread."""
+        with cls._lock:
+            return [{"phase": name, "ms": round(p["seconds"] * 1000, 1), "critical": p["critical"], "thread": p["thread"]}
+                    for name, p in cls._phases.items()]
+
+    @classmethod
+    def reset(cls):
+        """Tests only."""
+        with cls._lock:
+            cls._phases = {}
+            cls._budget_checked = False
@@ -0,0 +1,61 @@
+"""Coalesces streamed LLM tokens into a few UI updates (each Streamlit update is a websocket message + markdown re-render)."""
+import time
+
+from backend.config import STREAM_RENDER_INTERVAL_SECONDS, STREAM_RENDER_MAX_CHARS
+from backend.utils.metrics import Metrics
+
+CURSOR = "▌"
+
+
+class ThrottledRenderer:
+    """
+    Buffers tokens and calls render(text so far + cursor) on the first token, then at most once per
+    interval, or sooner once max_chars new characters are waiting. finish() draws the final text.
+    """
+
+    def __init__(self, render, interval: float = STREAM_RENDER_INTERVAL_SECONDS,
+                 max_chars: int = STREAM_RENDER_MAX_CHARS, clock=time.monotonic):
+        self.render = render
+        self.interval = interval
+        self.max_chars = max_chars
+        self._clock = clock
+        self._text = ""
+        self._pending = []
+        self._pending_chars = 0
+        self._last = None
+        self.tokens = 0
+        self.renders = 0
+
+    @property
+    def text(self):
+        return self._text + "".join(self._pending)
+
+    def feed(self, token: str):
+        if not token:
+            return
+        self._pending.append(token)
+        self._pending_chars += len(token)
+        self.tokens += 1
+        now = self._clock()
+        if self._last is None or now - self._last >= self.interval or self._pending_chars >= self.max_chars:
+            self._draw(self.text + CURSOR)
+            self._last = now
+
+    def stream(self, tokens):
+        """Feeds every token, then finish(). Returns the full text."""
+        for token in tokens:
+            self.feed(token)
+        return self.finish()
+
+    def finish(self, final_text: str = None):
+        """Draws the final text (final_text if given, e.g. the server's cleaned answer) without the cursor."""
+        text = self.text if final_text is None else final_text
+        self._draw(text)
+        Metrics.inc("pria_stream_tokens_total", self.tokens)
+        Metrics.inc("pria_stream_renders_total", self.renders)
+        return text
+
+    def _draw(self, text):
+        self._text, self._pending, self._pending_chars = self.text, [], 0
+        self.render(text)
+        self.renders += 1
@@ -0,0 +1,176 @@
+"""
+Native on-disk vector store for the single-resume index (replaces LangChain's FAISS save_local/load_local).
+
+    vectors.faiss  plain FAISS index file (flat, 8-bit scalar-quantized or product-quantized),
+                   opened memory-mapped: O(1) open, pages shared by every worker process
+    chunks.db      SQLite table of chunk text + JSON metadata, keyed by FAISS id (= chunk position);
+                   metadata["section"] (when present) lets a search be restricted to resume sections
+
+Nothing is unpickled, so opening an index never executes code from disk.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+from backend.config import INDEX_QUANTIZATION, INDEX_PQ_SUBQUANTIZERS, INDEX_PQ_MIN_VECTORS
+
+VECTORS_FILE = "vectors.faiss"
+CHUNKS_FILE = "chunks.db"
+
+
+def _build_index(vectors, quantization: str):
+    import faiss
+
+    dim = vectors.shape[1]
+    if quantization == "pq" and (len(vectors) < INDEX_PQ_MIN_VECTORS or dim % INDEX_PQ_SUBQUANTIZERS):
+        # PQ codebooks need a few hundred vectors per centroid set; a single resume is far smaller
+        print(f"[VECTOR STORE] {len(vectors)} vectors is too few for PQ; using 8-bit scalar quantization.")
+        quantization = "sq8"
+    if quantization == "pq":
+        index = faiss.IndexPQ(dim, INDEX_PQ_SUBQUANTIZERS, 8, faiss.METRIC_L2)
+    elif quantization == "sq8":
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_L2)
+    elif quantization == "flat":
+        index = faiss.IndexFlatL2(dim)
+    else:
+        raise ValueError(f"Unknown INDEX_QUANTIZATION '{quantization}' (expected flat, sq8 or pq).")
+    if not index.is_trained:
+        index.train(vectors)
+    index.add(vectors)
+    return index
+
+
+class MappedVectorStore:
+    """Read side: a memory-mapped FAISS index plus a read-only SQLite chunk store. Safe to share between threads."""
+
+    def __init__(self, index, connection):
+        self.index = index
+        self._connection = connection
+        self._lock = threading.Lock()
+        self._sections = None
+
+    @staticmethod
+    def build(directory: str, chunks, vectors, metadatas=None, quantization: str = INDEX_QUANTIZATION):
+        """
+        Writes chunks.db, then vectors.faiss (each via a temp file + atomic rename).
+        The vectors file goes last: its stat() stamp is what tells other processes the index changed.
+        """
+        import faiss
+        import numpy as np
+
+        os.makedirs(directory, exist_ok=True)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        metadatas = metadatas or [{} for _ in chunks]
+
+        chunks_path = os.path.join(directory, CHUNKS_FILE)
+        tmp_chunks = chunks_path + ".tmp"
+        if os.path.exists(tmp_chunks):
+            os.remove(tmp_chunks)
+        connection = sqlite3.connect(tmp_chunks)
+        try:
+            connection.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, text TEXT NOT NULL, metadata TEXT)")
+            connection.executemany("INSERT INTO chunks (id, text, metadata) VALUES (?, ?, ?)",
+                                   [(i, text, json.dumps(meta)) for i, (text, meta) in enumerate(zip(chunks, metadatas))])
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(tmp_chunks, chunks_path)
+
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        faiss.write_index(_build_index(vectors, quantization), vectors_path + ".tmp")
+        os.replace(vectors_path + ".tmp", vectors_path)
+
+    @classmethod
+    def open(cls, directory: str):
+        """Opens an index written by build(), or returns None if there is none."""
+        import faiss
+
+        vectors_path = os.path.join(directory, VECTORS_FILE)
+        chunks_path = os.path.join(directory, CHUNKS_FILE)
+        if not (os.path.exists(vectors_path) and os.path.exists(chunks_path)):
+            return None
+        index = faiss.read_index(vectors_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY)
+        connection = sqlite3.connect(f"file:{chunks_path}?mode=ro", uri=True, check_same_thread=False)
+        return cls(index, connection)
+
+    def similarity_search_by_vector(self, embedding, k: int = 4):
+        """Top-k chunks as Documents, nearest first (same call as LangChain's FAISS store)."""
+        return self.similarity_search_by_vectors([embedding], k)[0]
+
+    def similarity_search_by_vectors(self, embeddings, k: int = 4):
+        """Batched similarity_search_by_vector: one FAISS search and one chunk-store read for all queries."""
+        hits = self.search_ids(embeddings, k)
+        docs = self._fetch_by_id(sorted({i for row in hits for i, _ in row}))
+        return [[docs[i] for i, _ in row if i in docs] for row in hits]
+
+    def search_ids(self, embeddings, k: int = 4, ids=None):
+        """
+        (chunk id, L2 distance) pairs per query, nearest first. Chunk ids are FAISS ids = chunk positions.
+        With ids, only those chunks are scored (FAISS skips the rest during the scan).
+        """
+        import numpy as np
+
+        candidates = self.index.ntotal if ids is None else len(ids)
+        if candidates == 0 or not len(embeddings):
+            return [[] for _ in embeddings]
+        queries = np.asarray(embeddings, dtype=np.float32)
+        if ids is None:
+            distances, found = self.index.search(queries, min(k, candidates))
+        else:
+            import faiss
+            selector = faiss.IDSelectorBatch(np.asarray(sorted(ids), dtype=np.int64))
+            distances, found = self.index.search(queries, min(k, candidates),
+                                                 params=faiss.SearchParameters(sel=selector))
+        return [[(int(i), float(d)) for i, d in zip(id_row, distance_row) if i != -1]
+                for id_row, distance_row in zip(found, distances)]
+
+    def sections(self):
+        """{section: [chunk ids]} from the chunk metadata; empty for indexes built before section tagging."""
+        if self._sections is None:
+            with self._lock:
+                rows = self._connection.execute("SELECT id, metadata FROM chunks").fetchall()
+            sections = {}
+            for chunk_id, metadata in rows:
+                section = json.loads(metadata or "{}").get("section")
+                if section:
+                    sections.setdefault(section, []).append(chunk_id)
+            self._sections = sections
+        return self._sections
+
+    def section_ids(self, sections):
+        """Chunk ids tagged with any of these sections, ascending."""
+        available = self.sections()
+        return sorted(i for section in sections for i in available.get(section, ()))
+
+    def get_chunks(self, positions):
+        """Chunks stored at these FAISS ids, in the same order (missing ids are skipped)."""
+        return self._fetch(list(positions))
+
+    def get_chunk(self, position: int):
+        """The chunk stored at this FAISS id, or None."""
+        docs = self._fetch([position])
+        return docs[0] if docs else None
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        return self.index.ntotal
+
+    def _fetch(self, ids):
+        by_id = self._fetch_by_id(ids)
+        return [by_id[i] for i in ids if i in by_id]
+
+    def _fetch_by_id(self, ids):
+        from langchain_core.documents import Document
+
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._connection.execute(
+                f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})", ids
+            ).fetchall()
+        return {row[0]: Document(page_content=row[1], metadata=json.loads(row[2] or "{}")) for row in rows}
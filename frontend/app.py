@@ -2,49 +2,148 @@
 import streamlit as st
 import sys
 import os
+import time
 
 # Add root project directory to Python path to import backend
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from langchain_core.globals import set_llm_cache
-from langchain_community.cache import SQLiteCache
-
-# Import modular components
-from backend.config import FAISS_DB_PATH, ADMIN_PASSWORD
-from backend.core.database import VectorDBManager
-from backend.core.agent import RAGPipeline
-from backend.exceptions.custom_exceptions import UnsupportedFileFormatError, EmptyResumeError, VectorDatabaseError
-from backend.utils.cache_manager import ResponseCache
-from backend.utils.query_logger import QueryLogger
-
-# Enable sqlite caching (Langchain level)
-set_llm_cache(SQLiteCache(database_path="llm_cache.db"))
-
-FAQ_LIST = [
-    "What is the candidate's full name?",
-    "What is the candidate's email address?",
-    "What is the candidate's phone number?",
-    "Summarize the professional summary.",
-    "What are the candidate's core skills?",
-    "What is the candidate's total years of experience?",
-    "What is the candidate's current or most recent job title?",
-    "What are the candidate's educational qualifications?",
-    "What major projects has the candidate worked on?",
-    "Does the candidate have experience with Python?",
-    "Does the candidate have experience with React?",
-    "What certifications does the candidate hold?",
-    "What languages can the candidate speak?",
-    "What is the candidate's LinkedIn profile?",
-    "Where is the candidate located?",
-    "Does the candidate have leadership or management experience?",
-    "Which databases is the candidate familiar with?",
-    "What is the candidate's highest degree earned?",
-    "What cloud platforms (AWS, Azure, GCP) does the candidate know?",
-    "Can you list the candidate's soft skills?"
-]
+# Import modular components. Only light modules here: the first paint must not wait for langchain,
+# httpx, the embedding model or the index. The query pipeline is imported by the warm-up thread
+# (or by the first question) via pipeline().
+from backend.utils.startup import StartupTimer
+
+with StartupTimer.phase("import:ui_modules"):
+    from backend.config import ADMIN_PASSWORD, FAQ_LIST, CORPUS_MODE, QUERY_SERVICE_URL, WARMUP_ENABLED
+    from backend.core.database import VectorDBManager
+    from backend.core.registry import IndexRegistry
+    from backend.core.precompute import FAQPrecomputer
+    from backend.core.ingest_job import IngestJob
+    from backend.core.corpus import CandidateCorpus
+    from backend.core.warmup import Warmup
+    from backend.utils.cache_manager import ResponseCache, SemanticCache
+    from backend.utils.query_logger import QueryLogger
+    from backend.utils.metrics import Metrics
+    from backend.utils.service_client import QueryServiceClient
+    from backend.utils.stream_renderer import ThrottledRenderer
+    from backend.utils.chat_history import ChatHistory
 
 st.set_page_config(page_title="Personal Resume AI Assistant", page_icon="📄", layout="wide")
 
+def pipeline():
+    """RAGPipeline, imported on first use (normally the warm-up thread got there first)."""
+    return StartupTimer.import_module("backend.core.agent", "import:pipeline", critical=False).RAGPipeline
+
+@st.fragment(run_every=2)
+def faq_precompute_status():
+    """Live progress of the background FAQ precompute job (reruns only this block)."""
+    progress = FAQPrecomputer.progress()
+    if progress["status"] == "idle":
+        return
+    finished = progress["done"] + progress["failed"] + progress["skipped"]
+    total = max(progress["total"], 1)
+    if progress["status"] == "running":
+        st.progress(finished / total, text=f"Precomputing FAQ answers... {finished}/{progress['total']}")
+    else:
+        st.caption(f"FAQ precompute {progress['status']}: {progress['done']} answered, "
+                   f"{progress['skipped']} already cached, {progress['failed']} failed.")
+
+INGEST_STAGES = {"queued": "Starting", "extract": "Reading the document", "embed": "Generating embeddings",
+                 "index": "Writing the new index", "publish": "Switching to the new index"}
+
+@st.fragment(run_every=1)
+def ingest_status():
+    """Live progress of the background upload job; the current resume keeps answering meanwhile."""
+    progress = IngestJob.progress()
+    if progress["status"] == "idle":
+        return
+    if progress["status"] == "running":
+        stage = INGEST_STAGES.get(progress["stage"], progress["stage"])
+        fraction = progress["done"] / progress["total"] if progress["total"] else 0.0
+        count = f" {progress['done']}/{progress['total']} chunks" if progress["total"] else ""
+        st.progress(fraction, text=f"{progress['file']}: {stage}...{count}")
+        return
+
+    if progress["status"] == "failed":
+        st.error(progress["error"])
+    elif CORPUS_MODE:
+        st.success(f"Candidate added to corpus as `{progress['result']}`.")
+    else:
+        st.success(f"Resume successfully processed and indexed (generation {progress['result']}, "
+                   f"{progress['seconds']} s).")
+        ingest = VectorDBManager.ingest_stats()
+        st.caption(f"{ingest.get('chunks', 0)} chunks · "
+                   f"{ingest.get('embeddings_reused', 0)} embeddings reused · "
+                   f"{ingest.get('embeddings_computed', 0)} computed")
+    if st.session_state.get("ingest_job_seen") != progress["job"]:
+        st.session_state["ingest_job_seen"] = progress["job"]
+        if progress["status"] == "done":
+            if not CORPUS_MODE:
+                ChatHistory.clear(st.session_state)
+                st.session_state["checklist_results"] = []
+            st.rerun()  # Full page: status and chat input follow the new index
+
+def batch_module():
+    """backend.core.batch (imports the query pipeline, so not at startup)."""
+    return StartupTimer.import_module("backend.core.batch", "import:batch", critical=False)
+
+def run_checklist(checklist_text, candidate_id):
+    """Answers every checklist question in one batch, filling the table in as answers arrive."""
+    batch = batch_module()
+    questions = batch.parse_checklist(checklist_text)
+    if not questions:
+        st.warning("Paste at least one question into the checklist.")
+        return
+    results = []
+    with st.status(f"Answering {len(questions)} questions...", expanded=True) as status:
+        table = st.empty()
+        for item in batch.BatchAnswerer().run(questions, candidate_id):
+            results.append(item)
+            table.dataframe([{k: r[k] for k in ("question", "answer", "source", "seconds")} for r in results],
+                            hide_index=True, use_container_width=True)
+        failed = sum(1 for r in results if r["error"])
+        status.update(label=f"Answered {len(results) - failed}/{len(questions)} questions "
+                            f"in {max(r['seconds'] for r in results):.1f}s", state="error" if failed else "complete")
+    st.session_state["checklist_results"] = results
+
+def show_checklist_report(results):
+    """Checklist answers in checklist order, with CSV/JSON downloads (kept across reruns)."""
+    batch = batch_module()
+    with st.expander(f"📝 Checklist Report ({len(results)} questions)", expanded=True):
+        for item in sorted(results, key=lambda r: r["index"]):
+            st.markdown(f"**{item['index'] + 1}. {item['question']}**")
+            st.markdown(item["answer"] or f"⚠️ {item['error']}")
+        st.download_button("Download CSV", batch.format_report(results, "csv"),
+                           file_name="checklist_report.csv", mime="text/csv")
+        st.download_button("Download JSON", batch.format_report(results, "json"),
+                           file_name="checklist_report.json", mime="application/json")
+
+def stream_from_service(user_query, candidate_id, message_placeholder):
+    """
+    Thin-client mode: the query service caches, coalesces and logs.
+    Returns (answer, evidence for the history, source); chunk ids are kept when the service sends them.
+    """
+    renderer = ThrottledRenderer(message_placeholder.markdown)
+    final, source_text, evidence, source = None, "", None, "live"
+    for kind, value in QueryServiceClient.stream(user_query, candidate_id):
+        if kind == "token":
+            renderer.feed(value)
+        else:
+            final, source_text, source = value["answer"], value["evidence"], value["source"]
+            evidence = value.get("evidence_ref") or ({"text": source_text} if source_text else None)
+    full_response = renderer.finish(final)
+    if source_text:
+        with st.expander("Show Evidence (Source Reference)"):
+            st.text(source_text)
+    return full_response, evidence, source
+
+def show_evidence(msg):
+    """Evidence under a past answer, looked up only while its expander is open."""
+    expander = st.expander("Show Evidence (Source Reference)", key=f"evidence-{msg['id']}", on_change="rerun")
+    with expander:
+        if expander.open:
+            source_text = msg["evidence"].get("text") or pipeline().resolve_evidence(msg["evidence"])
+            st.text(source_text or "This resume has been replaced; its evidence is no longer available.")
+
 def main():
     st.title("📄 Personal Resume AI Assistant (vayu)")
     st.markdown("Your private, local AI assistant verified to answer queries directly from the uploaded resume using 100% Free architecture.")
@@ -61,25 +160,50 @@ def main():
             uploaded_file = st.file_uploader("Upload Resume (PDF, DOCX)", type=["pdf", "docx"])
             
             if uploaded_file:
+                precompute_faqs = False if CORPUS_MODE else st.checkbox("Precompute FAQ answers in background", value=True)
                 if st.button("Process & Upload Resume"):
-                    with st.spinner("Processing text and generating embeddings..."):
-                        try:
-                            VectorDBManager.process_file_and_create_db(uploaded_file)
-                            st.success("Resume successfully processed and indexed.")
-                            st.session_state["messages"] = [] # Clear chat
-                        except (UnsupportedFileFormatError, EmptyResumeError, VectorDatabaseError) as e:
-                            st.error(str(e))
-                        except Exception as e:
-                            st.error(f"An unexpected error occurred: {str(e)}")
-                            
+                    # Runs in the background; viewers keep the current resume until the new index is published
+                    if IngestJob.start(uploaded_file, precompute_faqs=precompute_faqs) is None:
+                        st.warning("Another upload is still being processed. Try again once it finishes.")
+
+            ingest_status()
+            faq_precompute_status()
+
             st.divider()
-            if st.button("Delete Current Resume (Admin)"):
+            if CORPUS_MODE:
+                candidate_ids = [c["candidate_id"] for c in CandidateCorpus.list_candidates()]
+                to_remove = st.selectbox("Remove candidate:", candidate_ids, index=None)
+                if to_remove and st.button("Remove Candidate (Admin)"):
+                    VectorDBManager.remove_candidate(to_remove)
+                    st.success(f"Candidate `{to_remove}` removed from the corpus.")
+            elif st.button("Delete Current Resume (Admin)"):
                 VectorDBManager.delete_db()
-                st.session_state["messages"] = []
+                ChatHistory.clear(st.session_state)
+                st.session_state["checklist_results"] = []
                 st.success("Current Resume (and memory) completely purged.")
 
+            with st.expander("⚙️ Index Registry Stats"):
+                st.json(CandidateCorpus.stats() if CORPUS_MODE else IndexRegistry.stats())
+            if not CORPUS_MODE:
+                with st.expander("🪪 Extracted Profile"):
+                    st.json(VectorDBManager.get_profile() or {})
+            with st.expander("⚡ Response Cache Stats"):
+                st.json({"exact": ResponseCache.stats(), "semantic": SemanticCache.stats()})
+            with st.expander("🚀 Startup & Warm-up"):
+                st.caption("Startup phases in the order they ran; critical ones delay the first paint.")
+                st.dataframe(StartupTimer.report(), hide_index=True, use_container_width=True)
+                st.json(Warmup.status())
+            with st.expander("📈 Pipeline Metrics"):
+                st.caption("Per-stage latency since the app started (p50/p95 are histogram bucket bounds).")
+                st.dataframe(Metrics.summary(), hide_index=True, use_container_width=True)
+                st.json(Metrics.counters())
+                st.download_button("Download Prometheus metrics", Metrics.prometheus_text(),
+                                    file_name="pria_metrics.prom", mime="text/plain")
+
             st.divider()
             st.subheader("📋 Query Logs (Friends Questions)")
+            with st.expander("📮 Log Writer Stats"):
+                st.json(QueryLogger.stats())
             all_logs = QueryLogger.get_all()
             if all_logs:
                 st.success(f"Total questions asked: {len(all_logs)}")
@@ -97,38 +221,51 @@ def main():
         else:
             st.info("Upload functionality is disabled for viewers. Switch to Admin mode to manage resumes.")
 
+        candidate_id = None
+        if CORPUS_MODE:
+            st.divider()
+            st.subheader("Candidate")
+            candidates = CandidateCorpus.list_candidates()
+            candidate_id = st.selectbox(
+                "Ask about:", [c["candidate_id"] for c in candidates], index=None,
+                placeholder="All candidates"
+            )
+
         st.divider()
         st.subheader("Frequently Asked Questions (FAQ)")
         selected_test_q = st.selectbox("Select a query to ask the AI instantly:", FAQ_LIST)
         test_q_submitted = st.button("Ask FAQ ⚡")
+
+        with st.expander("📝 Ask a Checklist"):
+            checklist_text = st.text_area("One question per line:", height=160)
+            checklist_submitted = st.button("Answer All Questions")
         
         st.divider()
         st.subheader("System Status")
-        if os.path.exists(FAISS_DB_PATH):
+        if VectorDBManager.has_index():
             st.success("🟢 Resume Indexed & AI Ready")
+            if Warmup.status()["status"] == "running":
+                st.caption("⏳ Loading the model and index in the background...")
         else:
             st.error("🔴 No Resume Uploaded")
 
-    # Initialize chat history
-    if "messages" not in st.session_state:
-        st.session_state["messages"] = []
-
-    # Render chat history
-    for msg in st.session_state["messages"]:
+    # Render chat history (the last CHAT_HISTORY_WINDOW messages)
+    if ChatHistory.dropped(st.session_state):
+        st.caption(f"{ChatHistory.dropped(st.session_state)} earlier messages are no longer shown.")
+    for msg in ChatHistory.messages(st.session_state):
         with st.chat_message(msg["role"]):
             st.markdown(msg["content"])
-            if msg.get("source"):
-                with st.expander("Show Evidence (Source Reference)"):
-                    st.text(msg["source"])
+            if msg.get("evidence"):
+                show_evidence(msg)
 
 
-    if os.path.exists(FAISS_DB_PATH):
+    if VectorDBManager.has_index():
         chat_q = st.chat_input("Ask a question about the uploaded resume...")
         user_query = chat_q if chat_q else (selected_test_q if test_q_submitted else None)
         
         if user_query:
             
-            st.session_state["messages"].append({"role": "user", "content": user_query})
+            ChatHistory.append(st.session_state, "user", user_query)
             with st.chat_message("user"):
                 st.markdown(user_query)
 
@@ -137,51 +274,68 @@ def main():
                 message_placeholder = st.empty()
                 message_placeholder.markdown("*(Thinking...)* ⏳")
                 
+                question_started = time.perf_counter()
+                cache_source = "error"
                 try:
-                    cached_response = ResponseCache.get(user_query)
-                    
-                    if cached_response:
-                        full_response = cached_response
-                        source_text = "Retrieved instantly from fast cache ⚡"
-                        message_placeholder.markdown(full_response)
-                        QueryLogger.log(user_query, full_response.strip(), source="cache")
+                    if QUERY_SERVICE_URL:
+                        full_response, evidence, cache_source = stream_from_service(
+                            user_query, candidate_id, message_placeholder)
                     else:
-                        streamer, docs = RAGPipeline.answer_query(user_query)
-                        
-                        if streamer is None:
-                            full_response = docs
-                            source_text = ""
+                        RAGPipeline = pipeline()
+                        fingerprint = VectorDBManager.current_fingerprint(candidate_id)
+                        cached_response, cache_source, query_vector = RAGPipeline.lookup_cache(
+                            user_query, fingerprint, candidate_id)
+                    
+                        if cached_response:
+                            full_response = cached_response.answer
+                            evidence = RAGPipeline.cached_evidence(cached_response, fingerprint) or \
+                                {"text": "Retrieved instantly from fast cache ⚡"}
                             message_placeholder.markdown(full_response)
+                            QueryLogger.log(user_query, full_response.strip(), source=cache_source)
                         else:
-                            full_response = ""
-                            for chunk in streamer:
-                                full_response += chunk
-                                message_placeholder.markdown(full_response + "▌")
-                            
-                            message_placeholder.markdown(full_response)
-                            source_text = "\n\n---\n\n".join([f"Chunk:\n{doc.page_content}" for doc in docs])
-                            if source_text:
-                                with st.expander("Show Evidence (Source Reference)"):
-                                    st.text(source_text)
+                            streamer, docs = RAGPipeline.answer_query(user_query, query_vector=query_vector,
+                                                                      candidate_id=candidate_id)
+                        
+                            if streamer is None:
+                                full_response = docs
+                                evidence = None
+                                message_placeholder.markdown(full_response)
+                            else:
+                                # Tokens are drawn in batches, not one websocket message per token
+                                full_response = ThrottledRenderer(message_placeholder.markdown).stream(streamer)
+                                source_text = RAGPipeline.format_evidence(docs)
+                                # The history keeps chunk ids; the text is looked up if the evidence is opened
+                                evidence = RAGPipeline.evidence_ref(docs, fingerprint)
+                                if source_text:
+                                    with st.expander("Show Evidence (Source Reference)"):
+                                        st.text(source_text)
                             
-                        # Save successful answers to fast cache
-                        if full_response and "Failed to connect" not in full_response:
-                            ResponseCache.set(user_query, full_response.strip())
-                            QueryLogger.log(user_query, full_response.strip(), source="live")
+                                # Save successful answers to fast cache
+                                if full_response and "Failed to connect" not in full_response:
+                                    RAGPipeline.remember_answer(user_query, full_response.strip(), fingerprint,
+                                                                evidence=evidence, query_vector=query_vector)
+                                    QueryLogger.log(user_query, full_response.strip(), source="live")
                             
                 except Exception as e:
+                    cache_source = "error"
                     full_response = f"Failed to connect to backend AI/Ollama. Please ensure Ollama is running. Error: {str(e)}"
                     message_placeholder.markdown(full_response)
-                    source_text = ""
+                    evidence = None
+                Metrics.observe("pria_question_seconds", time.perf_counter() - question_started, source=cache_source)
                 
 
-                st.session_state["messages"].append({
-                    "role": "assistant",
-                    "content": full_response.strip(),
-                    "source": source_text
-                })
+                ChatHistory.append(st.session_state, "assistant", full_response.strip(), evidence)
+        if checklist_submitted:
+            run_checklist(checklist_text, candidate_id)
+        if st.session_state.get("checklist_results"):
+            show_checklist_report(st.session_state["checklist_results"])
     else:
         st.info("Please upload a resume on the sidebar to begin checking facts.")
 
+    StartupTimer.check_budget()
+    # A thin client (QUERY_SERVICE_URL) never queries locally, so there is nothing to warm
+    if WARMUP_ENABLED and not QUERY_SERVICE_URL:
+        Warmup.start()  # Once per process, after the first paint: model, index and LLM client load in the background
+
 if __name__ == "__main__":
     main()
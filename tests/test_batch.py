@@ -0,0 +1,106 @@
+import sys
+import os
+import csv
+import io
+import time
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.config import LLM_NUM_PREDICT
+from backend.core import registry
+from backend.core.batch import BatchAnswerer, parse_checklist, format_report
+from backend.core.batch import RAGPipeline, ResponseCache, SemanticCache, QueryLogger, VectorDBManager
+from backend.core.registry import IndexRegistry
+from backend.utils.cache_manager import RetrievalCache
+from backend.utils.llm_client import LLMClient
+from backend.utils.offline_models import HashingEmbeddings, StubLLMBackend
+from backend.utils.rate_limiter import RateLimiter
+from test_metrics import QUESTIONS, SyntheticUpload
+
+
+class RecordingLimiter:
+    def __init__(self):
+        self.reserved = []
+
+    def acquire(self, tokens, cancel=None):
+        self.reserved.append(tokens)
+        return 0.0
+
+
+@pytest.fixture
+def indexed_resume(tmp_path, monkeypatch):
+    embeddings = HashingEmbeddings()
+    monkeypatch.setattr(registry, "FAISS_DB_PATH", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(registry, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(IndexRegistry, "_entry", None)
+    monkeypatch.setattr(IndexRegistry, "_embeddings", embeddings)
+    monkeypatch.setattr(IndexRegistry, "get_ingest_embeddings", classmethod(
+        lambda cls: type("Ingest", (), {"embed_documents_with_stats": lambda self, texts: (
+            embeddings.embed_documents(texts), 0, len(texts))})()))
+    # Every question goes live: no answers from (or into) the shared caches and query log
+    monkeypatch.setattr(ResponseCache, "get", classmethod(lambda cls, query, fingerprint="": None))
+    monkeypatch.setattr(SemanticCache, "get", classmethod(lambda cls, vector, fingerprint="": None))
+    monkeypatch.setattr(RAGPipeline, "remember_answer", staticmethod(lambda *a, **k: None))
+    monkeypatch.setattr(QueryLogger, "log", staticmethod(lambda *a, **k: None))
+    VectorDBManager.process_file_and_create_db(SyntheticUpload(0))
+    return embeddings
+
+
+def test_rate_limiter_spaces_requests_and_tokens():
+    now = [0.0]
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=0, clock=lambda: now[0])
+    assert [limiter.reserve(100) for _ in range(60)] == [0.0] * 60  # A full minute's burst
+    assert limiter.reserve(100) == pytest.approx(1.0)
+    assert limiter.reserve(100) == pytest.approx(2.0)  # Queued behind the previous reservation
+    now[0] = 2.0
+    assert limiter.reserve(100) == pytest.approx(1.0)
+
+    limiter = RateLimiter(requests_per_minute=0, tokens_per_minute=600, clock=lambda: now[0])
+    assert limiter.reserve(500) == 0.0
+    assert limiter.reserve(200) == pytest.approx(10.0)  # 100 tokens short at 10 tokens/s
+    assert limiter.reserve(10_000) == pytest.approx(70.0)  # Cost capped at one minute's budget
+    assert limiter.stats()["delayed"] == 2
+
+
+def test_batch_retrieval_matches_single_question_path(indexed_resume):
+    vectors = indexed_resume.embed_documents(QUESTIONS)
+    docs_per_question, start_texts = RAGPipeline.retrieve_batch(QUESTIONS, vectors)
+    loaded = IndexRegistry.get()
+    RetrievalCache.clear()  # Compare against a fresh search, not the rankings cached by the batch
+    for question, vector, docs, start_text in zip(QUESTIONS, vectors, docs_per_question, start_texts):
+        single = RAGPipeline.retrieve(loaded, question, vector)
+        assert [d.page_content for d in docs] == [d.page_content for d in single]
+        assert start_text == RAGPipeline.start_text_for(loaded, question)
+    assert start_texts.count("") >= 1  # Education/certification questions skip the start-of-resume block
+
+
+def test_batch_answers_concurrently_within_budget(indexed_resume):
+    limiter = RecordingLimiter()
+    llm = LLMClient(StubLLMBackend(ttft_ms=300, token_ms=0), limiter=limiter)
+    questions = QUESTIONS[:8]
+
+    started = time.perf_counter()
+    results = list(BatchAnswerer(max_concurrent=8, llm=llm).run(questions))
+    wall = time.perf_counter() - started
+
+    assert sorted(r["index"] for r in results) == list(range(len(questions)))
+    live = [r for r in results if r["source"] == "live"]
+    # Contact questions come back first, from the profile; the rest each made one LLM call
+    assert results[0]["source"] == "profile" and len(live) >= 5
+    assert all(r["answer"] and r["evidence"] and not r["error"] for r in results)
+    # The live calls (300 ms each) overlap: close to one call, far from the serial sum
+    assert wall < 1.2
+    assert len(limiter.reserved) == len(live) and min(limiter.reserved) > LLM_NUM_PREDICT
+
+    rows = list(csv.DictReader(io.StringIO(format_report(results, "csv"))))
+    assert [row["question"] for row in rows] == questions
+
+
+def test_parse_checklist_strips_bullets_and_numbering():
+    text = "1. Where does the candidate work?\n\n- Which cloud platforms?\n  3) Years of Python\n* Education"
+    assert parse_checklist(text) == ["Where does the candidate work?", "Which cloud platforms?",
+                                     "Years of Python", "Education"]
@@ -0,0 +1,99 @@
+import sys
+import os
+from collections import OrderedDict
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.core import agent, registry
+from backend.core.agent import RAGPipeline
+from backend.core.database import VectorDBManager
+from backend.core.registry import IndexRegistry
+from backend.utils import cache_manager
+from backend.utils.cache_manager import ResponseCache
+from backend.utils.chat_history import ChatHistory
+from backend.utils.offline_models import HashingEmbeddings
+from backend.utils.stream_renderer import ThrottledRenderer, CURSOR
+from test_metrics import SyntheticUpload
+
+
+def test_renderer_coalesces_tokens_by_time_and_size():
+    now, frames = [0.0], []
+    renderer = ThrottledRenderer(frames.append, interval=0.1, max_chars=50, clock=lambda: now[0])
+    for i in range(500):  # 500 tokens over 1 s
+        now[0] = i * 0.002
+        renderer.feed("tok ")
+    assert renderer.finish() == "tok " * 500
+    # First token, then at most one frame per 100 ms or per 50 new characters, then the final text
+    assert frames[0] == "tok " + CURSOR and frames[-1] == "tok " * 500
+    assert len(frames) < 500 / 10 and renderer.renders == len(frames)
+    assert all(frame.endswith(CURSOR) for frame in frames[:-1])
+
+    # A burst arriving at one instant is still drawn in max_chars slices
+    frames.clear()
+    renderer = ThrottledRenderer(frames.append, interval=10, max_chars=50, clock=lambda: 0.0)
+    assert renderer.stream(["x" * 10] * 20) == "x" * 200
+    assert [len(frame.rstrip(CURSOR)) for frame in frames] == [10, 60, 110, 160, 200]
+
+
+def test_history_keeps_a_bounded_window():
+    state = {}
+    for i in range(25):
+        ChatHistory.append(state, "user", f"question {i}", window=10)
+        ChatHistory.append(state, "assistant", f"answer {i}", {"fingerprint": "fp", "chunks": [i]}, window=10)
+    messages = ChatHistory.messages(state)
+    assert len(messages) == 10 and messages[-1]["content"] == "answer 24"
+    assert ChatHistory.dropped(state) == 40
+    assert len({m["id"] for m in messages}) == 10 and "evidence" not in messages[0]
+    ChatHistory.clear(state)
+    assert ChatHistory.messages(state) == [] and ChatHistory.dropped(state) == 0
+
+
+@pytest.fixture
+def indexed_resume(tmp_path, monkeypatch):
+    embeddings = HashingEmbeddings()
+    monkeypatch.setattr(registry, "FAISS_DB_PATH", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(registry, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(IndexRegistry, "_entry", None)
+    monkeypatch.setattr(IndexRegistry, "_embeddings", embeddings)
+    monkeypatch.setattr(IndexRegistry, "get_ingest_embeddings", classmethod(
+        lambda cls: type("Ingest", (), {"embed_documents_with_stats": lambda self, texts: (
+            embeddings.embed_documents(texts), 0, len(texts))})()))
+    VectorDBManager.process_file_and_create_db(SyntheticUpload(0))
+    yield
+    IndexRegistry.unpublish()
+
+
+def test_evidence_is_stored_as_chunk_ids_and_resolved_on_demand(indexed_resume):
+    loaded = IndexRegistry.get()
+    docs = RAGPipeline.retrieve(loaded, "Which cloud platforms has the candidate used?")
+    ref = RAGPipeline.evidence_ref(docs, loaded.fingerprint)
+    assert ref == {"fingerprint": loaded.fingerprint, "chunks": [d.metadata["chunk"] for d in docs]}
+    assert RAGPipeline.resolve_evidence(ref) == RAGPipeline.format_evidence(docs)
+    assert RAGPipeline.resolve_evidence({"text": "from cache"}) == "from cache"
+
+    # After a new upload the ids would point into a different resume
+    VectorDBManager.process_file_and_create_db(SyntheticUpload(1))
+    assert RAGPipeline.resolve_evidence(ref) is None
+
+
+def test_cached_answers_keep_chunk_ids_not_text(indexed_resume, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache_manager, "CACHE_DB_PATH", str(tmp_path / "cache.db"))
+    monkeypatch.setattr(ResponseCache, "_conn", None)
+    monkeypatch.setattr(ResponseCache, "_l1", OrderedDict())
+    monkeypatch.setattr(agent, "SEMANTIC_CACHE_ENABLED", False)
+    loaded = IndexRegistry.get()
+    question = "Which databases has the candidate used?"
+    docs = RAGPipeline.retrieve(loaded, question)
+    RAGPipeline.remember_answer(question, "PostgreSQL and Redis.", loaded.fingerprint,
+                                evidence=RAGPipeline.evidence_ref(docs, loaded.fingerprint))
+
+    ResponseCache._l1.clear()  # Read back from SQLite
+    entry = ResponseCache.get(question, loaded.fingerprint)
+    assert entry.evidence == "" and entry.chunks == [d.metadata["chunk"] for d in docs]
+    ref = RAGPipeline.cached_evidence(entry, loaded.fingerprint)
+    assert RAGPipeline.resolve_evidence(ref) == RAGPipeline.format_evidence(docs)
+    ResponseCache._conn.close()
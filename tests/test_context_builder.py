@@ -0,0 +1,65 @@
+import sys
+import os
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.documents import Document
+
+from backend.core.database import VectorDBManager
+from backend.utils.context_builder import build_context, estimate_tokens, overlap_length
+
+TEXT = "\n".join(
+    f"Role {i}: built service {i} in Python and Go, cutting latency by {i * 7}% for {i * 1000} users."
+    for i in range(120)
+)
+
+
+def chunk_docs(order):
+    chunks = VectorDBManager.split_text(TEXT)
+    return chunks, [Document(page_content=chunks[i], metadata={"chunk": i}) for i in order]
+
+
+def test_overlap_length():
+    assert overlap_length("alpha beta gamma delta epsilon", "gamma delta epsilon zeta eta", 5) == 19
+    assert overlap_length("alpha beta gamma delta", "zeta eta theta iota", 5) == 0
+
+
+def test_adjacent_chunks_are_merged_without_repeating_the_overlap():
+    chunks, docs = chunk_docs([3, 2])
+    context, stats = build_context(docs, token_budget=10_000)
+
+    assert stats["merged"] == 1
+    assert stats["tokens_saved"] > 0
+    # Every line of both chunks is present exactly once, in document order
+    for line in set(chunks[2].splitlines() + chunks[3].splitlines()):
+        assert context.count(line) == 1
+    assert context.index(chunks[2][:40]) < context.index(chunks[3][-40:])
+
+
+def test_text_in_the_start_block_is_not_sent_twice():
+    chunks, docs = chunk_docs([0, 1, 10])
+    start_text = TEXT[:1000]
+    context, stats = build_context(docs, start_text, token_budget=10_000)
+
+    assert stats["covered_by_start"] == 1  # chunk 0 lies inside the first 1000 characters
+    assert context.count(chunks[0]) == 1
+    assert chunks[10] in context
+    # chunk 1 straddles the start block: only the words past it are added
+    assert context.count(chunks[1][-40:]) == 1 and context.count(TEXT[900:960]) == 1
+    assert stats["tokens_saved"] >= estimate_tokens(chunks[0] + chunks[1][:400])
+
+
+def test_budget_keeps_the_most_relevant_chunks():
+    chunks, docs = chunk_docs([15, 5, 12, 19])
+    budget = estimate_tokens(chunks[15] + chunks[5]) + 10
+    context, stats = build_context(docs, token_budget=budget)
+
+    assert chunks[15] in context and chunks[5] in context
+    assert chunks[12] not in context and chunks[19] not in context
+    assert stats["over_budget"] == 2
+    assert stats["tokens_sent"] <= budget
+
+    # A single chunk larger than the budget is cut rather than dropped
+    context, _ = build_context(docs[:1], token_budget=20)
+    assert context and chunks[15].startswith(context)
@@ -0,0 +1,84 @@
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.core.corpus as corpus
+from backend.core.corpus import CandidateCorpus
+from backend.exceptions.custom_exceptions import CandidateNotFoundError
+
+
+@pytest.fixture(params=["ivf", "hnsw"])
+def fresh_corpus(request, tmp_path, monkeypatch):
+    """Empty corpus in a temp dir; small nlist so the IVF migration happens in the test."""
+    monkeypatch.setattr(corpus, "CORPUS_DB_PATH", str(tmp_path))
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_FILE", str(tmp_path / "index.faiss"))
+    monkeypatch.setattr(corpus, "CORPUS_STORE_FILE", str(tmp_path / "corpus.db"))
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_TYPE", request.param)
+    monkeypatch.setattr(corpus, "CORPUS_IVF_NLIST", 4)
+    monkeypatch.setattr(corpus, "CORPUS_IVF_NPROBE", 4)
+    CandidateCorpus.clear()
+    yield CandidateCorpus
+    CandidateCorpus.clear()
+
+
+def _add_candidates(corpus_cls, count, chunks_per_candidate=8, dim=16):
+    rng = np.random.default_rng(0)
+    ids = []
+    for n in range(count):
+        chunks = [f"cand{n} chunk{i}" for i in range(chunks_per_candidate)]
+        ids.append(corpus_cls.add_candidate(f"resume {n}", chunks, rng.normal(size=(chunks_per_candidate, dim)), f"Cand {n}.pdf"))
+    return ids
+
+
+def test_filtered_search_only_returns_that_candidate(fresh_corpus):
+    ids = _add_candidates(fresh_corpus, 30)
+    query = np.random.default_rng(1).normal(size=16)
+
+    docs = fresh_corpus.search(query, 3, [ids[7]])
+
+    assert len(docs) == 3
+    assert {d.metadata["candidate_id"] for d in docs} == {ids[7]}
+
+
+def test_remove_candidate_hides_its_chunks(fresh_corpus):
+    ids = _add_candidates(fresh_corpus, 30)
+    query = np.random.default_rng(1).normal(size=16)
+
+    fresh_corpus.remove_candidate(ids[3])
+
+    assert fresh_corpus.search(query, 3, [ids[3]]) == []
+    assert all(d.metadata["candidate_id"] != ids[3] for d in fresh_corpus.search(query, 100))
+    assert fresh_corpus.stats()["candidates"] == 29
+    with pytest.raises(CandidateNotFoundError):
+        fresh_corpus.remove_candidate(ids[3])
+
+
+def test_removed_candidate_numbers_are_never_reused(fresh_corpus):
+    rng = np.random.default_rng(2)
+    alice = fresh_corpus.add_candidate("alice", ["a0", "a1", "a2"], rng.normal(size=(3, 16)), "alice.pdf")
+    bob = fresh_corpus.add_candidate("bob", ["b0", "b1", "b2"], rng.normal(size=(3, 16)), "bob.pdf")
+    fresh_corpus.remove_candidate(bob)
+
+    dan_vectors = rng.normal(size=(3, 16))
+    dan = fresh_corpus.add_candidate("dan", ["d0", "d1", "d2"], dan_vectors, "dan.pdf")
+    # Dan's chunks get fresh ids, so bob's tombstones (HNSW) cannot hide them
+    assert {d.metadata["candidate_id"] for d in fresh_corpus.search(dan_vectors[0], 3)} >= {dan}
+    assert fresh_corpus.search(dan_vectors[0], 1)[0].page_content == "d0"
+    assert sorted(c["candidate_id"] for c in fresh_corpus.list_candidates()) == sorted([alice, dan])
+
+    # The counter survives a reopen of the store
+    fresh_corpus._conn.close()
+    fresh_corpus._conn, fresh_corpus._index, fresh_corpus._index_stamp, fresh_corpus._tombstones = None, None, None, None
+    erin = fresh_corpus.add_candidate("erin", ["e0"], rng.normal(size=(1, 16)), "erin.pdf")
+    assert fresh_corpus._candidate_num(erin) == 4
+
+
+def test_ivf_migration_after_enough_vectors(fresh_corpus):
+    _add_candidates(fresh_corpus, 30)
+    expected = "ivf" if corpus.CORPUS_INDEX_TYPE == "ivf" else "hnsw"
+    assert fresh_corpus.stats()["index_type"] == expected
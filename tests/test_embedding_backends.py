@@ -0,0 +1,212 @@
+"""
+Embedding backend benchmark + retrieval-quality check.
+
+Each backend runs in its own subprocess (fair cold start and peak RSS). Reports model load time,
+ingest throughput, query-encoding latency, and how far the candidate's retrieval agrees with the
+reference: recall@k of the reference top-k chunks and top-1 agreement, per resume and question.
+
+    python tests/test_embedding_backends.py --reference huggingface --candidate onnx --resumes 20
+    python tests/test_embedding_backends.py --candidate onnx --min-recall 0.9   # exit code 1 below that
+
+Under pytest: unit tests for the ONNX pooling/batching (no model download) and a smoke run on the hashing backend.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(ROOT)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from test_metrics import QUESTIONS, make_resume_text, percentiles
+
+
+def _rss_mb():
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def measure(resumes: int, runs: int, vectors_out: str):
+    """Runs inside the backend's subprocess (EMBEDDING_BACKEND already set). Returns the timing dict."""
+    from backend import config
+    from backend.core.database import VectorDBManager
+    from backend.core.registry import IndexRegistry
+
+    chunks, bounds = [], []
+    for seed in range(resumes):
+        pieces = VectorDBManager.split_text(make_resume_text(seed))
+        bounds.append([len(chunks), len(chunks) + len(pieces)])
+        chunks.extend(pieces)
+
+    rss_before = _rss_mb()
+    t0 = time.perf_counter()
+    embeddings = IndexRegistry.get_embeddings()
+    embeddings.embed_query("warm up")
+    load_seconds = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    chunk_vectors = np.array(embeddings.embed_documents(chunks), dtype=np.float32)
+    ingest_seconds = time.perf_counter() - t0
+
+    latencies, question_vectors = [], []
+    for i in range(max(runs, len(QUESTIONS))):
+        t0 = time.perf_counter()
+        vector = embeddings.embed_query(QUESTIONS[i % len(QUESTIONS)])
+        latencies.append(time.perf_counter() - t0)
+        if i < len(QUESTIONS):
+            question_vectors.append(vector)
+
+    np.savez(vectors_out, chunks=chunk_vectors, questions=np.array(question_vectors, dtype=np.float32),
+             bounds=np.array(bounds))
+    return {
+        "backend": config.EMBEDDING_BACKEND,
+        "batch_size": config.EMBEDDING_BATCH_SIZE,
+        "threads": config.EMBEDDING_THREADS,
+        "load_seconds": round(load_seconds, 3),
+        "rss_model_mb": round(_rss_mb() - rss_before, 1),
+        "rss_peak_mb": _rss_mb(),
+        "chunks": len(chunks),
+        "ingest_chunks_per_sec": round(len(chunks) / ingest_seconds, 1),
+        "query": percentiles(latencies),
+    }
+
+
+def _unit(rows):
+    return rows / np.clip(np.linalg.norm(rows, axis=1, keepdims=True), 1e-12, None)
+
+
+def retrieval_agreement(reference, candidate, k: int):
+    """recall@k of the reference top-k (per resume, per question) and top-1 agreement."""
+    recalls, top1 = [], []
+    ref_chunks, cand_chunks = _unit(reference["chunks"]), _unit(candidate["chunks"])
+    ref_questions, cand_questions = _unit(reference["questions"]), _unit(candidate["questions"])
+    for start, end in reference["bounds"]:
+        depth = min(k, end - start)
+        for q in range(len(ref_questions)):
+            ref_top = np.argsort(-(ref_chunks[start:end] @ ref_questions[q]), kind="stable")[:depth]
+            cand_top = np.argsort(-(cand_chunks[start:end] @ cand_questions[q]), kind="stable")[:depth]
+            recalls.append(len(set(ref_top) & set(cand_top)) / depth)
+            top1.append(float(ref_top[0] == cand_top[0]))
+    result = {"recall_at_k": round(float(np.mean(recalls)), 4), "top1_agreement": round(float(np.mean(top1)), 4),
+              "k": k, "pairs": len(recalls)}
+    if ref_chunks.shape == cand_chunks.shape:
+        # Same model and dimension: how close the vectors themselves are
+        result["mean_cosine"] = round(float(np.mean(np.sum(ref_chunks * cand_chunks, axis=1))), 4)
+    return result
+
+
+def _run_backend(role: str, backend: str, args, work_dir: str):
+    vectors_out = os.path.join(work_dir, f"{role}_{backend}.npz")
+    env = dict(os.environ, EMBEDDING_BACKEND=backend, PRIA_DATA_DIR=work_dir)
+    cmd = [sys.executable, os.path.abspath(__file__), "--measure", "--resumes", str(args.resumes),
+           "--runs", str(args.runs), "--vectors-out", vectors_out]
+    completed = subprocess.run(cmd, check=True, capture_output=True, text=True, env=env, cwd=ROOT)
+    timing = json.loads(completed.stdout.strip().splitlines()[-1])
+    with np.load(vectors_out) as data:
+        vectors = {name: data[name] for name in data.files}
+    return timing, vectors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare embedding backends: speed, memory and retrieval agreement.")
+    parser.add_argument("--reference", default="huggingface", help="Backend treated as ground truth")
+    parser.add_argument("--candidate", default="onnx", help="Backend under test")
+    parser.add_argument("--resumes", type=int, default=10, help="Synthetic resumes to embed")
+    parser.add_argument("--runs", type=int, default=50, help="Query encodings to time")
+    parser.add_argument("--k", type=int, default=4, help="Top-k compared for recall")
+    parser.add_argument("--min-recall", type=float, default=0.9, help="Fail below this recall@k")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.resumes, args.runs, args.vectors_out)))
+        return 0
+
+    work_dir = tempfile.mkdtemp(prefix="pria_embed_bench_")
+    ref_timing, ref_vectors = _run_backend("reference", args.reference, args, work_dir)
+    cand_timing, cand_vectors = _run_backend("candidate", args.candidate, args, work_dir)
+    results = {
+        "reference": ref_timing,
+        "candidate": cand_timing,
+        "speedup": {
+            "load": round(ref_timing["load_seconds"] / max(cand_timing["load_seconds"], 1e-9), 2),
+            "ingest": round(cand_timing["ingest_chunks_per_sec"] / max(ref_timing["ingest_chunks_per_sec"], 1e-9), 2),
+            "query_p50": round(ref_timing["query"]["p50_ms"] / max(cand_timing["query"]["p50_ms"], 1e-6), 2),
+        },
+        "quality": retrieval_agreement(ref_vectors, cand_vectors, args.k),
+    }
+    results["passed"] = results["quality"]["recall_at_k"] >= args.min_recall
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0 if results["passed"] else 1
+
+
+class FakeOnnxSession:
+    """Stands in for onnxruntime.InferenceSession: token vectors are one-hot rows of the vocabulary."""
+
+    def __init__(self, vocab_size):
+        self.vocab_size = vocab_size
+        self.batch_shapes = []
+
+    def get_inputs(self):
+        return [SimpleNamespace(name=name) for name in ("input_ids", "attention_mask", "token_type_ids")]
+
+    def run(self, output_names, feeds):
+        assert feeds["input_ids"].dtype == np.int64 and feeds["token_type_ids"].shape == feeds["input_ids"].shape
+        self.batch_shapes.append(feeds["input_ids"].shape)
+        return [np.eye(self.vocab_size, dtype=np.float32)[feeds["input_ids"]]]
+
+
+def test_onnx_embeddings_pool_real_tokens_and_keep_order():
+    from tokenizers import Tokenizer, models, pre_tokenizers
+    from backend.utils.onnx_embeddings import OnnxEmbeddings
+
+    words = ["[PAD]", "[UNK]", "python", "go", "react", "built", "services", "with", "and"]
+    tokenizer = Tokenizer(models.WordLevel({w: i for i, w in enumerate(words)}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    session = FakeOnnxSession(len(words))
+    embeddings = OnnxEmbeddings(session, tokenizer, batch_size=2, max_tokens=16)
+
+    python = embeddings.embed_query("python")
+    assert np.allclose(python, np.eye(len(words))[2])
+
+    texts = ["python", "built services with react and go " * 3, "go go", "react"]
+    vectors = embeddings.embed_documents(texts)
+    # Order is restored after length-sorted batching, and padding never leaks into the mean
+    assert np.allclose(vectors[0], python)
+    assert np.allclose(vectors[2], np.eye(len(words))[3])
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    # Short texts were batched together; the long one was truncated to max_tokens
+    assert session.batch_shapes[1:] == [(2, 2), (2, 16)]
+
+
+def test_backend_comparison_smoke(tmp_path):
+    """Same backend on both sides: identical retrieval, so recall must be 1.0."""
+    out = tmp_path / "embed_bench.json"
+    cmd = [sys.executable, os.path.abspath(__file__), "--reference", "hashing", "--candidate", "hashing",
+           "--resumes", "2", "--runs", "3", "--output", str(out)]
+    subprocess.run(cmd, check=True, capture_output=True, timeout=300, cwd=ROOT)
+
+    results = json.loads(out.read_text())
+    assert results["passed"]
+    assert results["quality"]["recall_at_k"] == 1.0 and results["quality"]["mean_cosine"] == 1.0
+    assert results["candidate"]["ingest_chunks_per_sec"] > 0 and results["candidate"]["query"]["n"] == 8
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+import sys
+import os
+import time
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.utils.embedding_cache as embedding_cache
+from backend.utils.embedding_cache import EmbeddingCache
+from backend.utils.offline_models import HashingEmbeddings
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_PATH", str(tmp_path / "embedding_cache.db"))
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_CACHE_MAX_ENTRIES", 4)
+    monkeypatch.setattr(EmbeddingCache, "_conn", None)
+    cache = EmbeddingCache(HashingEmbeddings(), model_name="hashing")
+    try:
+        assert cache.embed_documents_with_stats(["a", "b", "c"])[1:] == (0, 3)
+        time.sleep(0.01)
+        assert cache.embed_documents_with_stats(["a"])[1:] == (1, 0)  # "a" is now the most recent
+        time.sleep(0.01)
+        cache.embed_documents_with_stats(["d", "e"])
+
+        assert EmbeddingCache.stats()["stored"] == 4
+        assert cache.embed_documents_with_stats(["a", "c", "d", "e"])[1:] == (4, 0)
+        assert cache.embed_documents_with_stats(["b"])[1:] == (0, 1)  # The oldest one went
+    finally:
+        EmbeddingCache._conn.close()
+        EmbeddingCache._conn = None
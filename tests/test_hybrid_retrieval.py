@@ -0,0 +1,72 @@
+import sys
+import os
+import time
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from backend.config import HYBRID_RETRIEVAL_K
+from backend.core.agent import RAGPipeline
+from backend.core.registry import LoadedIndex
+from backend.utils.lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from backend.utils.vector_store import MappedVectorStore
+
+CHUNKS = [
+    "Jane Doe, Senior Engineer. jane@example.com. Bengaluru, India.",
+    "Built payment services in Java and Spring Boot for 3 million users.",
+    "Led a team of five engineers; mentoring, hiring and sprint planning.",
+    "Deployed microservices on Kubernetes with Helm and Terraform on AWS.",
+    "Frontend work in React and TypeScript; migrated a Node.js monolith.",
+    "Databases: PostgreSQL, MongoDB and Redis. Data pipelines in Spark.",
+    "B.Tech in Computer Science, NIT Trichy. AWS Solutions Architect.",
+]
+
+
+def test_tokenizer_keeps_tech_names_and_drops_question_words():
+    assert tokenize("Does the candidate have experience with C++, C#, Node.js or CI/CD?") == \
+        ["experience", "c++", "c#", "node.js", "ci/cd"]
+
+
+def test_bm25_ranks_the_chunk_naming_the_term_first(tmp_path):
+    index = BM25Index.build(CHUNKS)
+    assert index.search("Does the candidate know Kubernetes?", 3)[0][0] == 3
+    assert [doc for doc, _ in index.search("Which databases? MongoDB?", 1)] == [5]
+    assert index.search("Haskell", 3) == []
+
+    path = str(tmp_path / "bm25.json")
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("react typescript", 2) == index.search("react typescript", 2)
+    assert BM25Index.load(str(tmp_path / "missing.json")) is None
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        index.search("experience with React", 10)
+    assert (time.perf_counter() - started) / 1000 < 0.001
+
+
+def test_rrf_prefers_ids_ranked_by_both():
+    assert reciprocal_rank_fusion([[1, 2, 3], [3, 4]])[0] == 3
+    assert reciprocal_rank_fusion([[1, 2], [5, 6]])[:2] == [1, 5]
+
+
+def test_hybrid_retrieve_recovers_keyword_chunk_missed_by_vectors(tmp_path):
+    # Random fake embeddings: the vector ranking alone is noise, so any hit on the keyword chunk comes from BM25
+    embeddings = DeterministicFakeEmbedding(size=32)
+    MappedVectorStore.build(str(tmp_path), CHUNKS, embeddings.embed_documents(CHUNKS),
+                            metadatas=[{"chunk": i} for i in range(len(CHUNKS))])
+    vector_db = MappedVectorStore.open(str(tmp_path))
+    loaded = LoadedIndex(vector_db, "", "fp", None, BM25Index.build(CHUNKS))
+
+    for question, expected in [("Does the candidate have experience with React?", 4),
+                               ("Has she used Kubernetes?", 3),
+                               ("Which databases is the candidate familiar with? PostgreSQL?", 5)]:
+        docs = RAGPipeline.retrieve(loaded, question, embeddings.embed_query(question))
+        assert len(docs) == HYBRID_RETRIEVAL_K
+        assert CHUNKS[expected] in [doc.page_content for doc in docs]
+
+    # Indexes built before hybrid search have no BM25 sidecar: plain vector search still works
+    legacy = loaded._replace(lexical=None)
+    assert RAGPipeline.retrieve(legacy, "React?", embeddings.embed_query("React?"))
@@ -0,0 +1,131 @@
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.core import registry
+from backend.core.database import VectorDBManager
+from backend.core.ingest_job import IngestJob
+from backend.core.registry import IndexRegistry, active_directory
+from backend.utils.cache_manager import ResponseCache, SemanticCache
+from backend.utils.offline_models import HashingEmbeddings
+from backend.utils.vector_store import MappedVectorStore
+from test_metrics import SyntheticUpload
+
+
+class GatedEmbeddings:
+    """Ingest embedder that can be held mid-build (or made to fail) by the test."""
+
+    def __init__(self):
+        self.model = HashingEmbeddings()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.fail = False
+
+    def embed_documents_with_stats(self, texts):
+        self.gate.wait(30)
+        if self.fail:
+            raise RuntimeError("embedding backend down")
+        return self.model.embed_documents(texts), 0, len(texts)
+
+
+@pytest.fixture
+def index_dir(tmp_path, monkeypatch):
+    embedder = GatedEmbeddings()
+    monkeypatch.setattr(registry, "FAISS_DB_PATH", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(registry, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(IndexRegistry, "_entry", None)
+    monkeypatch.setattr(IndexRegistry, "get_ingest_embeddings", classmethod(lambda cls: embedder))
+    return tmp_path / "faiss_index", embedder
+
+
+def _wait_for_stage(stage, timeout=30):
+    deadline = time.time() + timeout
+    while IngestJob.progress()["stage"] != stage:
+        assert time.time() < deadline, IngestJob.progress()
+        time.sleep(0.01)
+
+
+def test_rebuild_publishes_atomically_while_old_index_keeps_serving(index_dir):
+    path, embedder = index_dir
+    assert VectorDBManager.process_file_and_create_db(SyntheticUpload(0)) == 1
+    old = IndexRegistry.get()
+    query = embedder.model.embed_query("Which cloud platforms has the candidate used?")
+
+    embedder.gate.clear()
+    job = IngestJob.start(SyntheticUpload(1))
+    assert job is not None
+    assert IngestJob.start(SyntheticUpload(2)) is None  # One upload at a time
+    _wait_for_stage("embed")
+    # Mid-build, viewers still get the previous resume
+    assert IndexRegistry.get().generation == 1 and VectorDBManager.has_index()
+    assert VectorDBManager.load_db().similarity_search_by_vector(query, k=2)
+
+    embedder.gate.set()
+    assert IngestJob.wait(timeout=30)
+    progress = IngestJob.progress()
+    assert progress["job"] == job and progress["status"] == "done" and progress["result"] == 2
+    current = IndexRegistry.get()
+    assert current.generation == 2 and current.fingerprint != old.fingerprint
+    assert VectorDBManager.ingest_stats()["generation"] == 2
+    # A query that started on the old index finishes on it
+    assert old.vector_db.similarity_search_by_vector(query, k=2)
+
+    assert VectorDBManager.process_file_and_create_db(SyntheticUpload(2)) == 3
+    assert sorted(os.listdir(path)) == ["CURRENT", "gen-000002", "gen-000003"]
+
+
+def test_failed_build_leaves_live_index_untouched(index_dir):
+    path, embedder = index_dir
+    # An index from before generations is served as generation 0
+    MappedVectorStore.build(str(path), ["Jane Doe, engineer"], embedder.model.embed_documents(["Jane Doe, engineer"]))
+    assert active_directory() == (0, str(path))
+    assert IndexRegistry.get().generation == 0
+
+    embedder.fail = True
+    IngestJob.start(SyntheticUpload(3))
+    assert IngestJob.wait(timeout=30)
+    assert IngestJob.progress()["status"] == "failed"
+    assert "embedding backend down" in IngestJob.progress()["error"]
+    assert IndexRegistry.get().generation == 0
+    assert not [name for name in os.listdir(path) if name.startswith(registry.STAGING_PREFIX)]
+
+    embedder.fail = False
+    assert VectorDBManager.process_file_and_create_db(SyntheticUpload(3)) == 1
+    assert sorted(os.listdir(path)) == ["CURRENT", "gen-000001"]  # Flat files replaced
+
+    IndexRegistry.unpublish()
+    assert not VectorDBManager.has_index() and IndexRegistry.get() is None
+
+
+
+def test_deleting_the_index_mid_build_keeps_the_staging_directory(index_dir, monkeypatch):
+    path, embedder = index_dir
+    monkeypatch.setattr(ResponseCache, "clear", classmethod(lambda cls: None))
+    monkeypatch.setattr(SemanticCache, "clear", classmethod(lambda cls: None))
+    assert VectorDBManager.process_file_and_create_db(SyntheticUpload(0)) == 1
+
+    # Hold the build while it writes into its staging directory
+    writing, release, build = threading.Event(), threading.Event(), MappedVectorStore.build
+    def gated_build(*args, **kwargs):
+        writing.set()
+        release.wait(30)
+        return build(*args, **kwargs)
+    monkeypatch.setattr(MappedVectorStore, "build", staticmethod(gated_build))
+
+    IngestJob.start(SyntheticUpload(1))
+    assert writing.wait(30)
+    VectorDBManager.delete_db()
+    assert not VectorDBManager.has_index()
+    assert [name for name in os.listdir(path) if name.startswith(registry.STAGING_PREFIX)]
+
+    release.set()
+    assert IngestJob.wait(timeout=30)
+    assert IngestJob.progress()["status"] == "done", IngestJob.progress()
+    assert IndexRegistry.get().generation == 1 and sorted(os.listdir(path)) == ["CURRENT", "gen-000001"]
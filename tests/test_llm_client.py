@@ -0,0 +1,189 @@
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.exceptions.custom_exceptions import LLMConnectionError, LLMTimeoutError
+from backend.utils import llm_client
+from backend.utils.llm_client import LLMClient, OpenAICompatibleBackend
+from backend.utils.rate_limiter import RateLimiter
+
+MESSAGES = [{"role": "system", "content": "Be brief."}, {"role": "user", "content": "Name?"}]
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    """
+    Local OpenAI-compatible /chat/completions endpoint. `script` holds one entry per request:
+    an int status code to fail with, or ("ok", seconds before the first token).
+    """
+
+    daemon_threads = True
+
+    def __init__(self, script):
+        super().__init__(("127.0.0.1", 0), FakeLLMHandler)
+        self.script = list(script)
+        self.requests = 0
+        self.client_ports = set()
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert body["stream"] is True and body["messages"] == MESSAGES
+        with self.server.lock:
+            step = self.server.script.pop(0) if self.server.script else ("ok", 0)
+            self.server.requests += 1
+            self.server.client_ports.add(self.client_address[1])
+
+        if isinstance(step, int):
+            payload = b'{"error": "busy"}'
+            self.send_response(step)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            if step == 429:
+                self.send_header("Retry-After", "0")
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        time.sleep(step[1])
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for piece in ("Jane", " Doe"):
+            self._chunk(f'data: {json.dumps({"choices": [{"delta": {"content": piece}}]})}\n\n')
+        self._chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(script=()):
+        server = FakeLLMServer(script)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def make_client(server, **kwargs):
+    backend = OpenAICompatibleBackend(base_url=server.url, api_key="test", model="fake-model")
+    kwargs.setdefault("retry_base_delay", 0.01)
+    return LLMClient(backend, **kwargs)
+
+
+def test_streams_over_one_keep_alive_connection(fake_server):
+    server = fake_server()
+    client = make_client(server)
+
+    answers = ["".join(client.stream(MESSAGES)) for _ in range(5)]
+
+    assert answers == ["Jane Doe"] * 5
+    assert server.requests == 5
+    assert len(server.client_ports) == 1
+    client.close()
+
+
+def test_retries_rate_limits_and_server_errors(fake_server):
+    server = fake_server([429, 503, 500])
+    client = make_client(server, max_retries=3)
+
+    assert "".join(client.stream(MESSAGES)) == "Jane Doe"
+    assert client.stats()["retries"] == 3
+    client.close()
+
+
+def test_gives_up_after_max_retries(fake_server):
+    server = fake_server([502, 502, 502])
+    client = make_client(server, max_retries=2)
+
+    with pytest.raises(LLMConnectionError):
+        "".join(client.stream(MESSAGES))
+    assert server.requests == 3
+    assert client.stats()["failures"] == 1
+    client.close()
+
+
+def test_deadline_bounds_a_slow_upstream(fake_server):
+    server = fake_server([("ok", 1.0)])
+    client = make_client(server, max_retries=0)
+
+    started = time.monotonic()
+    with pytest.raises(LLMTimeoutError):
+        "".join(client.stream(MESSAGES, deadline=0.2))
+    assert time.monotonic() - started < 0.9
+    assert client.stats()["timeouts"] == 1
+    client.close()
+
+
+def test_hedged_request_wins_when_first_is_slow(fake_server):
+    server = fake_server([("ok", 1.5), ("ok", 0)])
+    client = make_client(server, hedge=True, hedge_default_delay=0.1)
+
+    started = time.monotonic()
+    assert "".join(client.stream(MESSAGES)) == "Jane Doe"
+
+    assert time.monotonic() - started < 1.0
+    stats = client.stats()
+    assert stats["hedges"] == 1 and stats["hedge_wins"] == 1
+    client.close()
+
+
+def test_no_hedge_when_first_token_is_quick(fake_server):
+    server = fake_server()
+    client = make_client(server, hedge=True, hedge_default_delay=0.5)
+
+    assert "".join(client.stream(MESSAGES)) == "Jane Doe"
+    assert client.stats()["hedges"] == 0
+    assert server.requests == 1
+    client.close()
+
+
+def test_every_request_is_booked_against_the_budget(fake_server, monkeypatch):
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=0)
+    client = make_client(fake_server([429, ("ok", 0)]), limiter=limiter)
+    assert "".join(client.stream(MESSAGES)) == "Jane Doe"
+    assert limiter.stats()["reserved"] == 2  # The first request and its retry
+    client.close()
+
+    # A hedge is optional: it is skipped when the budget has no room for it
+    limiter = RateLimiter(requests_per_minute=1, tokens_per_minute=0)
+    client = make_client(fake_server([("ok", 0.5)]), limiter=limiter, hedge=True, hedge_default_delay=0.1)
+    assert "".join(client.stream(MESSAGES)) == "Jane Doe"
+    assert client.stats()["hedges"] == 0 and limiter.stats()["reserved"] == 1
+    client.close()
+
+    # Chat, FAQ precompute and batches all use the shared client, and so the shared budget
+    monkeypatch.setattr(llm_client, "LLM_BACKEND", "groq")
+    monkeypatch.setattr(LLMClient, "_shared", None)
+    assert LLMClient.shared().limiter is RateLimiter.shared()
+    LLMClient.shared().close()
@@ -1,83 +1,368 @@
-import time
-import sys
+"""
+Offline benchmark suite for the RAG pipeline.
+
+Runs against synthetic resumes, the hashing embedder and a stub chat model that streams
+tokens with configurable latency, so no Groq key, model download or pre-built index is needed.
+
+    python tests/test_metrics.py --runs 50 --concurrency 1,4,8 --output bench.json
+    python tests/test_metrics.py --baseline bench_baseline.json       # exit code 1 on regressions
+    python tests/test_metrics.py --output bench_baseline.json         # save a new baseline
+    python tests/test_metrics.py --service-url http://127.0.0.1:8600  # also load-test a running query service
+
+Under pytest only the quick smoke run executes (it keeps the suite from bit-rotting).
+"""
+import argparse
+import io
+import json
 import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 # Add the parent directory to the Python path so we can import 'backend'
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-from backend.core.agent import RAGPipeline
-from backend.core.database import VectorDBManager
-from backend.config import FAISS_DB_PATH
-
-def run_performance_test(question: str):
-    """Measures the latency of the RAG pipeline for a given question."""
-    
-    print(f"\n[{'-'*40}]")
-    print(f"Test Query: '{question}'")
-    print(f"[{'-'*40}]")
-
-    # 1. Validation Check
-    if not os.path.exists(FAISS_DB_PATH):
-        print("❌ Error: No FAISS database found. Please upload a resume via the Streamlit app first.")
-        return
-
-    # 2. Total Execution Time Start
-    start_time_total = time.time()
-
-    try:
-        # Request stream generator from backend
-        pipeline_start = time.time()
-        streamer, docs = RAGPipeline.answer_query(question)
-        pipeline_end = time.time()
-        
-        if streamer is None:
-            # Error / Fallback message
-            print(f"Fallback/Error Response: {docs}")
-            return
-            
-        print(f"✅ RAG Initialization & Document Retrieval Time: {(pipeline_end - pipeline_start):.3f} seconds")
-        print(f"✅ Context Retrieved: {len(docs)} chunks.\n")
-        
-        print("Streaming Answer:")
-        
-        # 3. LLM Token Generation Time Start
-        first_token_time = None
-        chars_generated = 0
-        
-        for chunk in streamer:
-            if first_token_time is None:
-                first_token_time = time.time()
-            chars_generated += len(chunk)
-            print(chunk, end="", flush=True)
-
-        print("\n")
-        
-        end_time_total = time.time()
-        
-        # 4. Final Metrics Calculation
-        if first_token_time:
-            time_to_first_token = first_token_time - pipeline_end
-            gen_time = end_time_total - first_token_time
-            print(f"[{' METRICS ':=^30}]")
-            print(f"⏱️ Time to First Token (TTFT): {time_to_first_token:.3f} s")
-            print(f"⏱️ Generation Time (Streaming): {gen_time:.3f} s")
-            print(f"⏱️ Total Response Latency     : {(end_time_total - start_time_total):.3f} s")
-            print(f"📊 Approximate Length         : {chars_generated} characters")
-            print(f"[{'='*32}]\n")
-
-    except Exception as e:
-        print(f"\n❌ Error during testing: {e}")
+sys.path.append(ROOT)
 
-if __name__ == "__main__":
-    print("🚀 Starting PRIA Metrics & Latency Tester 🚀\n")
-    
-    # Standard questions to benchmark 1B model retrieval and speed
-    test_questions = [
-        "What is the candidate's name?",
-        "How many years of experience does the candidate have?",
-        "What are the main programming languages known?"
+QUESTIONS = [
+    "What is the candidate's full name?",
+    "What is the candidate's email address?",
+    "What are the candidate's core skills?",
+    "Does the candidate have experience with Python?",
+    "Does the candidate have experience with React?",
+    "What are the candidate's educational qualifications?",
+    "Which databases is the candidate familiar with?",
+    "What cloud platforms does the candidate know?",
+]
+
+FIRST_NAMES = ["Asha", "Ravi", "Meera", "John", "Li", "Sofia", "Omar", "Priya"]
+LAST_NAMES = ["Kumar", "Iyer", "Smith", "Chen", "Garcia", "Haddad", "Nair", "Brown"]
+SKILLS = ["Python", "React", "PostgreSQL", "AWS", "Docker", "Kubernetes", "Java", "Go", "MongoDB",
+          "Azure", "GCP", "TypeScript", "Django", "FastAPI", "Redis", "Terraform", "Spark", "Kafka"]
+COMPANIES = ["Infosys", "TCS", "Acme Corp", "Globex", "Initech", "Umbrella Labs", "Hooli", "Stark Industries"]
+DEGREES = ["B.Tech in Computer Science", "M.Sc in Data Science", "B.E. in Electronics", "MBA"]
+
+
+def make_resume_text(seed: int, experience_entries: int = 6) -> str:
+    """Deterministic synthetic resume with the usual sections."""
+    rnd = random.Random(seed)
+    name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)}"
+    skills = rnd.sample(SKILLS, 8)
+    lines = [
+        name,
+        f"{name.split()[0].lower()}.{seed}@example.com | +91 98{seed:08d} | linkedin.com/in/candidate{seed}",
+        "Bengaluru, India",
+        "",
+        "PROFESSIONAL SUMMARY",
+        f"Software engineer with {rnd.randint(2, 15)} years of experience building {skills[0]} and {skills[1]} systems.",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+        "",
+        "EXPERIENCE",
     ]
+    for i in range(experience_entries):
+        company = rnd.choice(COMPANIES)
+        lines.append(f"Senior Engineer, {company} ({2010 + i}-{2011 + i})")
+        for _ in range(4):
+            lines.append(f"- Built services with {rnd.choice(skills)} and {rnd.choice(skills)}, "
+                         f"improving latency by {rnd.randint(10, 60)}% for {rnd.randint(1, 50)}k users.")
+    lines += ["", "EDUCATION", f"{rnd.choice(DEGREES)}, {rnd.choice(['IIT Madras', 'NIT Trichy', 'Anna University'])}",
+              "", "CERTIFICATIONS", f"{rnd.choice(['AWS Solutions Architect', 'CKA', 'Azure Fundamentals'])}"]
+    return "\n".join(lines)
+
+
+class SyntheticUpload(io.BytesIO):
+    """Looks like a Streamlit UploadedFile: a named in-memory DOCX."""
+
+    def __init__(self, seed: int):
+        from docx import Document
+
+        doc = Document()
+        for line in make_resume_text(seed).split("\n"):
+            doc.add_paragraph(line)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        super().__init__(buffer.getvalue())
+        self.name = f"synthetic_resume_{seed}.docx"
+
+
+def percentiles(samples):
+    """Seconds in, milliseconds out (nearest-rank percentiles)."""
+    if not samples:
+        return {"n": 0}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(rank(50), 3),
+        "p95_ms": round(rank(95), 3),
+        "p99_ms": round(rank(99), 3),
+    }
+
+
+def bench_ingest(docs: int):
+    from backend.core.database import VectorDBManager
+    from backend.utils.embedding_cache import EmbeddingCache
+
+    # Measure real embedding work, not cache hits from a previous document
+    EmbeddingCache.clear()
+    per_doc, chunks = [], 0
+    started = time.perf_counter()
+    for seed in range(docs):
+        upload = SyntheticUpload(seed)
+        t0 = time.perf_counter()
+        VectorDBManager.process_file_and_create_db(upload)
+        per_doc.append(time.perf_counter() - t0)
+        chunks += VectorDBManager.ingest_stats().get("chunks", 0)
+    wall = time.perf_counter() - started
+    return {
+        "docs_per_sec": round(docs / wall, 3),
+        "chunks_per_sec": round(chunks / wall, 3),
+        "per_doc": percentiles(per_doc),
+    }
+
+
+def bench_load_db(runs: int):
+    from backend.core.database import VectorDBManager
+    from backend.core.registry import IndexRegistry
+
+    cold, warm = [], []
+    for _ in range(runs):
+        IndexRegistry.invalidate()
+        t0 = time.perf_counter()
+        VectorDBManager.load_db()
+        cold.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        VectorDBManager.load_db()
+        warm.append(time.perf_counter() - t0)
+    return {"cold": percentiles(cold), "warm": percentiles(warm)}
+
+
+def bench_retrieval(runs: int):
+    from backend.config import RETRIEVAL_K
+    from backend.core.agent import RAGPipeline
+    from backend.core.database import VectorDBManager
+
+    vector_db = VectorDBManager.load_db()
+    embed, search = [], []
+    for i in range(runs):
+        question = QUESTIONS[i % len(QUESTIONS)]
+        t0 = time.perf_counter()
+        vector = RAGPipeline.embed_query(question)
+        t1 = time.perf_counter()
+        vector_db.similarity_search_by_vector(vector, k=RETRIEVAL_K)
+        t2 = time.perf_counter()
+        embed.append(t1 - t0)
+        search.append(t2 - t1)
+    return {"embed": percentiles(embed), "search": percentiles(search)}
+
+
+# Modules the first paint must not import (they belong to the warm-up / first question)
+HEAVY_MODULES = ("torch", "sentence_transformers", "transformers", "faiss", "onnxruntime", "langchain_huggingface",
+                 "langchain_community", "langchain_text_splitters", "langchain_core", "httpx", "pdfplumber", "docx",
+                 "supabase")
+
+COLD_START_PROBE = """
+import json, runpy, sys, time
+started = time.perf_counter()
+import streamlit
+streamlit_seconds = time.perf_counter() - started
+started = time.perf_counter()
+runpy.run_path(sys.argv[1], run_name="pria_app")  # Top of app.py only; main() is not called
+app_seconds = time.perf_counter() - started
+from backend.utils.startup import StartupTimer
+print(json.dumps({"streamlit_ms": streamlit_seconds * 1000, "app_import_ms": app_seconds * 1000,
+                  "phases": StartupTimer.report(), "heavy_modules": [m for m in sys.argv[2:] if m in sys.modules]}))
+"""
+
 
-    for q in test_questions:
-        run_performance_test(q)
-        time.sleep(1) # Small pause between questions
+def cold_start_probe():
+    """Imports frontend/app.py in a fresh interpreter, the way `streamlit run` does before the first paint."""
+    cmd = [sys.executable, "-c", COLD_START_PROBE, os.path.join(ROOT, "frontend", "app.py"), *HEAVY_MODULES]
+    completed = subprocess.run(cmd, check=True, capture_output=True, text=True, timeout=120, cwd=ROOT)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def bench_cold_start(runs: int):
+    probes = [cold_start_probe() for _ in range(runs)]
+    return {
+        "streamlit": percentiles([p["streamlit_ms"] / 1000 for p in probes]),
+        "app_import": percentiles([p["app_import_ms"] / 1000 for p in probes]),
+        "heavy_modules_at_first_paint": len(probes[-1]["heavy_modules"]),
+    }
+
+
+def _one_question(question):
+    from backend.core.agent import RAGPipeline
+
+    t0 = time.perf_counter()
+    streamer, _ = RAGPipeline.answer_query(question)
+    ttft = None
+    for _ in streamer:
+        if ttft is None:
+            ttft = time.perf_counter() - t0
+    return ttft, time.perf_counter() - t0
+
+
+def bench_end_to_end(runs: int, concurrency: int):
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(runs)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(_one_question, questions))
+    wall = time.perf_counter() - started
+    return {
+        "ttft": percentiles([r[0] for r in results if r[0] is not None]),
+        "e2e": percentiles([r[1] for r in results]),
+        "throughput_qps": round(runs / wall, 3),
+    }
+
+
+def _one_service_question(args):
+    import httpx
+
+    client, url, question = args
+    t0 = time.perf_counter()
+    ttft = None
+    with client.stream("POST", f"{url}/ask", json={"question": question}) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if ttft is None and line == "event: token":
+                ttft = time.perf_counter() - t0
+    return ttft, time.perf_counter() - t0
+
+
+def bench_service(url: str, runs: int, concurrency: int):
+    """End-to-end over HTTP/SSE against a running `python -m backend.server` (sharing this data dir)."""
+    import httpx
+
+    questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(runs)]
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    with httpx.Client(timeout=120, limits=limits) as client:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(_one_service_question, [(client, url.rstrip("/"), q) for q in questions]))
+        wall = time.perf_counter() - started
+    return {
+        "ttft": percentiles([r[0] for r in results if r[0] is not None]),
+        "e2e": percentiles([r[1] for r in results]),
+        "throughput_qps": round(runs / wall, 3),
+    }
+
+
+def run_suite(runs: int, concurrency_levels, ingest_docs: int, service_url: str = None):
+    from backend import config
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "llm_backend": config.LLM_BACKEND,
+            "embedding_backend": config.EMBEDDING_BACKEND,
+            "stub_ttft_ms": config.STUB_LLM_TTFT_MS,
+            "stub_token_ms": config.STUB_LLM_TOKEN_MS,
+            "runs": runs,
+        },
+        "metrics": {},
+    }
+    metrics = results["metrics"]
+    metrics["cold_start"] = bench_cold_start(3)
+    metrics["ingest"] = bench_ingest(ingest_docs)
+    metrics["load_db"] = bench_load_db(max(5, runs // 5))
+    metrics["retrieval"] = bench_retrieval(runs)
+    metrics["end_to_end"] = {f"c{c}": bench_end_to_end(runs, c) for c in concurrency_levels}
+    if service_url:
+        metrics["service"] = {f"c{c}": bench_service(service_url, runs, c) for c in concurrency_levels}
+    return results
+
+
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        elif isinstance(value, (int, float)):
+            yield path, value
+
+
+def compare(current, baseline, tolerance: float = 0.2, noise_floor_ms: float = 1.0):
+    """Lists metrics that got worse by more than `tolerance` (latencies up, throughput down)."""
+    base = dict(_flatten(baseline.get("metrics", {})))
+    regressions = []
+    for path, value in _flatten(current.get("metrics", {})):
+        if path not in base or path.endswith(".n"):
+            continue
+        old = base[path]
+        if path.endswith("_ms") and value > old * (1 + tolerance) and value - old > noise_floor_ms:
+            regressions.append({"metric": path, "baseline": old, "current": value})
+        elif (path.endswith("_per_sec") or path.endswith("_qps")) and value < old * (1 - tolerance):
+            regressions.append({"metric": path, "baseline": old, "current": value})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline RAG pipeline benchmarks.")
+    parser.add_argument("--runs", type=int, default=50, help="Questions per measurement")
+    parser.add_argument("--concurrency", default="1,4,8", help="Comma-separated concurrency levels")
+    parser.add_argument("--ingest-docs", type=int, default=10, help="Synthetic resumes to ingest")
+    parser.add_argument("--ttft-ms", type=float, default=200, help="Stub LLM time to first token")
+    parser.add_argument("--token-ms", type=float, default=5, help="Stub LLM delay between tokens")
+    parser.add_argument("--live", action="store_true", help="Use the configured real LLM and embedder")
+    parser.add_argument("--service-url", help="Also measure a running query service over HTTP/SSE")
+    parser.add_argument("--data-dir", help="Data dir to index into (point the service at the same one)")
+    parser.add_argument("--output", help="Write results JSON here (e.g. to save a baseline)")
+    parser.add_argument("--baseline", help="Compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    # Must happen before anything from backend is imported
+    data_dir = args.data_dir or tempfile.mkdtemp(prefix="pria_bench_")
+    os.environ["PRIA_DATA_DIR"] = data_dir
+    if not args.live:
+        os.environ["LLM_BACKEND"] = "stub"
+        os.environ["EMBEDDING_BACKEND"] = "hashing"
+        os.environ["STUB_LLM_TTFT_MS"] = str(args.ttft_ms)
+        os.environ["STUB_LLM_TOKEN_MS"] = str(args.token_ms)
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    results = run_suite(args.runs, levels, args.ingest_docs, args.service_url)
+    results["meta"]["data_dir"] = data_dir
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            results["regressions"] = compare(results, json.load(f), args.tolerance)
+        exit_code = 1 if results["regressions"] else 0
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return exit_code
+
+
+def test_benchmark_suite_smoke(tmp_path):
+    """Quick offline run in a subprocess (fresh env vars + temp data dir); output must be comparable."""
+    out = tmp_path / "bench.json"
+    cmd = [sys.executable, os.path.abspath(__file__), "--runs", "4", "--concurrency", "1,2",
+           "--ingest-docs", "2", "--ttft-ms", "5", "--token-ms", "0", "--output", str(out)]
+    subprocess.run(cmd, check=True, capture_output=True, timeout=300, cwd=ROOT)
+
+    results = json.loads(out.read_text())
+    metrics = results["metrics"]
+    assert metrics["ingest"]["docs_per_sec"] > 0
+    assert metrics["end_to_end"]["c2"]["ttft"]["n"] == 4
+    assert metrics["end_to_end"]["c1"]["e2e"]["p50_ms"] >= metrics["end_to_end"]["c1"]["ttft"]["p50_ms"]
+    assert compare(results, results) == []
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,64 @@
+import sys
+import os
+import io
+import multiprocessing
+import time
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.utils.parsers as parsers
+from backend.utils.parsers import iter_pdf_pages
+
+
+def make_pdf(pages):
+    """Minimal PDF with one line of Helvetica text per page."""
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out, offsets = b"%PDF-1.4\n", []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return out
+
+
+PAGES = [f"Page {i} of the resume" for i in range(10)]
+
+
+def _stuck_on_first_block(start, end):
+    if start == 0:
+        time.sleep(60)
+    return [f"Page {i} of the resume" for i in range(start, end)]
+
+
+def test_parallel_extraction_matches_serial_for_uploads_and_paths(tmp_path):
+    data = make_pdf(PAGES)
+    path = tmp_path / "resume.pdf"
+    path.write_bytes(data)
+
+    assert list(iter_pdf_pages(io.BytesIO(data), workers=1)) == PAGES
+    assert list(iter_pdf_pages(io.BytesIO(data), workers=2)) == PAGES  # Upload: bytes go to the workers
+    assert list(iter_pdf_pages(str(path), workers=2)) == PAGES
+    assert list(iter_pdf_pages(str(path), workers=2, max_pages=3)) == PAGES[:3]
+    assert not multiprocessing.active_children()
+
+
+def test_stuck_page_block_is_skipped_and_its_worker_killed(monkeypatch):
+    monkeypatch.setattr(parsers, "_extract_page_range", _stuck_on_first_block)
+    started = time.perf_counter()
+    pages = list(iter_pdf_pages(io.BytesIO(make_pdf(PAGES)), workers=2, page_timeout=0.2))
+    assert pages == PAGES[parsers.PAGES_PER_TASK:]
+    assert time.perf_counter() - started < 10
+    assert not multiprocessing.active_children()  # The sleeping worker was terminated, not left behind
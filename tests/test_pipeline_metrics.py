@@ -0,0 +1,55 @@
+import sys
+import os
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.metrics import Metrics
+
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    Metrics.reset()
+    yield
+    Metrics.reset()
+
+
+def test_spans_feed_histograms_and_error_counter():
+    with Metrics.span("faiss_search"):
+        pass
+    with pytest.raises(ValueError):
+        with Metrics.span("faiss_search"):
+            raise ValueError("boom")
+
+    rows = {row["metric"]: row for row in Metrics.summary()}
+    assert rows['pria_stage_seconds{stage="faiss_search"}']["count"] == 2
+    assert Metrics.counters() == {'pria_stage_errors_total{stage="faiss_search"}': 1}
+
+
+def test_timed_stream_records_ttft_stream_and_tokens():
+    tokens = list(Metrics.timed_stream(iter(["a", "b", "c"])))
+
+    assert tokens == ["a", "b", "c"]
+    stages = {row["metric"] for row in Metrics.summary()}
+    assert {'pria_stage_seconds{stage="llm_ttft"}', 'pria_stage_seconds{stage="llm_stream"}'} <= stages
+    assert Metrics.counters()["pria_llm_tokens_total"] == 3
+
+
+def test_prometheus_text_is_cumulative_and_includes_collectors():
+    Metrics.observe("pria_question_seconds", 0.003, source="live")
+    Metrics.observe("pria_question_seconds", 0.2, source="live")
+    Metrics.inc("pria_cache_lookups_total", result="cache")
+    Metrics.register_collector("pria_test", lambda: {"hits": 7, "enabled": True, "name": "skipped"})
+
+    text = Metrics.prometheus_text()
+
+    assert "# TYPE pria_question_seconds histogram" in text
+    assert 'pria_question_seconds_bucket{source="live",le="0.005"} 1' in text
+    assert 'pria_question_seconds_bucket{source="live",le="+Inf"} 2' in text
+    assert 'pria_question_seconds_count{source="live"} 2' in text
+    assert 'pria_cache_lookups_total{result="cache"} 1' in text
+    assert "pria_test_hits 7" in text and "pria_test_enabled 1" in text
+    assert "pria_test_name" not in text
+    Metrics._collectors.pop("pria_test", None)
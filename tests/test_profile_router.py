@@ -0,0 +1,107 @@
+import sys
+import os
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.database import VectorDBManager
+from backend.core.router import ProfileRouter
+from backend.utils.profile_extractor import ProfileExtractor, extract_profile
+
+RESUME = """JANE DOE
+Senior Backend Engineer
+Bengaluru, India
+jane.doe@example.com | +91 98765 43210 | linkedin.com/in/janedoe | https://github.com/janedoe
+
+PROFESSIONAL SUMMARY
+Engineer with 8 years of experience; cut p99 latency from 1200 ms to 300 ms in 2021.
+
+TECHNICAL SKILLS
+Languages: Python, Java, Go
+Tools - Kubernetes, Terraform; Docker
+• PostgreSQL • Redis
+
+EXPERIENCE
+Built payment services handling 3000000 requests per day.
+
+Languages
+English, Hindi
+"""
+
+
+def test_extracts_contact_fields_and_skills():
+    profile = extract_profile(RESUME)
+
+    assert profile["name"] == "Jane Doe"
+    assert profile["email"] == "jane.doe@example.com"
+    assert profile["phone"] == "+91 98765 43210"
+    assert profile["phones"] == ["+91 98765 43210"]  # Years, latencies and counts are not phone numbers
+    assert profile["location"] == "Bengaluru, India"
+    assert profile["linkedin"] == "linkedin.com/in/janedoe"
+    assert profile["github"] == "https://github.com/janedoe"
+    assert profile["skills"] == ["Python", "Java", "Go", "Kubernetes", "Terraform", "Docker", "PostgreSQL", "Redis"]
+    assert profile["languages"] == ["English", "Hindi"]
+    assert profile["headings"] == ["PROFESSIONAL SUMMARY", "TECHNICAL SKILLS", "EXPERIENCE", "Languages"]
+
+
+def test_streamed_pages_give_the_same_profile():
+    extractor = ProfileExtractor()
+    pages = [RESUME[:37], RESUME[37:150], RESUME[150:]]  # Page breaks mid-line
+    assert list(extractor.tap(pages)) == pages
+    assert extractor.result() == extract_profile("\n".join(pages))
+
+
+def test_router_answers_contact_questions_and_falls_through_otherwise():
+    profile = extract_profile(RESUME)
+
+    assert ProfileRouter.route("What is the candidate's email?", profile) == \
+        "The candidate's email address is jane.doe@example.com."
+    assert "+91 98765 43210" in ProfileRouter.route("phone number?", profile)
+    assert ProfileRouter.route("Where is she located?", profile) == "The candidate is located in Bengaluru, India."
+    assert ProfileRouter.route("What is the candidate's full name?", profile) == "The candidate's full name is Jane Doe."
+    assert "LinkedIn: linkedin.com/in/janedoe" in ProfileRouter.route("How can I contact her?", profile)
+
+    assert ProfileRouter.route("What is the candidate's current location?", profile) == \
+        "The candidate is located in Bengaluru, India."
+
+    for question in ["Does she have experience with email marketing?", "What are her skills?",
+                     "Which projects did she build?", "Is the candidate willing to relocate to another location?",
+                     "Is the candidate based in India?"]:
+        assert ProfileRouter.route(question, profile) is None
+    assert ProfileRouter.route("What is her email?", None) is None
+    assert ProfileRouter.route("What is her GitHub?", {"github": ""}) is None
+
+
+def test_profile_field_api(monkeypatch):
+    monkeypatch.setattr(VectorDBManager, "get_profile", staticmethod(lambda candidate_id=None: extract_profile(RESUME)))
+    assert VectorDBManager.get_profile_field("email") == "jane.doe@example.com"
+    assert VectorDBManager.get_profile_field("certifications") == []
+    with pytest.raises(KeyError):
+        VectorDBManager.get_profile_field("salary")
+
+
+def test_title_company_lines_are_not_locations():
+    header = "JANE DOE\nSenior Data Engineer, Acme Corp\njane.doe@example.com | +91 98765 43210\n"
+    assert extract_profile(header)["location"] == ""
+    assert extract_profile(header + "Austin, TX, USA\n")["location"] == "Austin, TX, USA"
+    # No location in the profile, so the question goes to the LLM
+    assert ProfileRouter.route("Where is she located?", extract_profile(header)) is None
+
+
+def test_router_answers_only_single_field_questions():
+    profile = extract_profile(RESUME)
+    for question in ["What is the candidate's name and current role?", "What is her email and phone?",
+                     "Where is she based? What is her LinkedIn?", "Name, email?"]:
+        assert ProfileRouter.match(question) is None
+        assert ProfileRouter.route(question, profile) is None
+    assert ProfileRouter.match("What is the contact number?") == "phone"
+
+
+def test_document_and_job_titles_are_not_names():
+    assert extract_profile("Curriculum Vitae\nJane Doe\n")["name"] == "Jane Doe"
+    assert extract_profile("Senior Software Engineer\nJane Doe\n")["name"] == "Jane Doe"
+    profile = extract_profile("RESUME\nSenior Data Analyst\njane.doe@example.com\n")
+    assert profile["name"] == ""
+    assert ProfileRouter.route("What is the candidate's full name?", profile) is None
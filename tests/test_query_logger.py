@@ -0,0 +1,145 @@
+import sys
+import os
+import threading
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import backend.utils.query_logger as query_logger
+from backend.utils.query_logger import QueryLogger
+
+
+class FakeTable:
+    """Local stand-in for the Supabase `query_logs` table (only the calls QueryLogger makes)."""
+
+    def __init__(self, fail=False, gate=None):
+        self.rows = []
+        self.insert_calls = 0
+        self.fail = fail
+        self.gate = gate
+        self._pending = None
+
+    def insert(self, rows):
+        self._pending = rows
+        return self
+
+    def execute(self):
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("supabase unreachable")
+        self.insert_calls += 1
+        self.rows.extend(self._pending)
+        return self
+
+
+class FakeClient:
+    def __init__(self, table):
+        self._table = table
+
+    def table(self, name):
+        assert name == "query_logs"
+        return self._table
+
+
+@pytest.fixture
+def logger_env(tmp_path, monkeypatch):
+    """Fresh spool file, fast flush interval, no remote backoff left over from other tests."""
+    _close_spool()
+    monkeypatch.setattr(query_logger, "QUERY_LOG_SPOOL_PATH", str(tmp_path / "spool.db"))
+    monkeypatch.setattr(query_logger, "QUERY_LOG_FLUSH_SECONDS", 0.05)
+    monkeypatch.setattr(QueryLogger, "_backoff_until", 0.0)
+    QueryLogger.flush()
+    yield monkeypatch
+    QueryLogger.flush()
+    _close_spool()  # The next user reopens the (restored) spool path
+
+
+def _close_spool():
+    with QueryLogger._spool_lock:
+        if QueryLogger._spool_conn is not None:
+            QueryLogger._spool_conn.close()
+            QueryLogger._spool_conn = None
+
+
+def _use_client(monkeypatch, client):
+    monkeypatch.setattr(query_logger, "_get_supabase_client", lambda: client)
+
+
+def test_logs_are_batched_into_few_inserts(logger_env):
+    table = FakeTable()
+    _use_client(logger_env, FakeClient(table))
+    before = QueryLogger.stats()["sent"]
+
+    for i in range(20):
+        QueryLogger.log(f"question {i}", "answer")
+    assert QueryLogger.flush()
+
+    assert len(table.rows) == 20
+    assert table.insert_calls < 20
+    assert QueryLogger.stats()["sent"] - before == 20
+
+
+def test_unconfigured_remote_spools_then_replays(logger_env):
+    _use_client(logger_env, None)
+    for i in range(3):
+        QueryLogger.log(f"offline {i}", "answer")
+    assert QueryLogger.flush()
+    assert QueryLogger.stats()["spool_depth"] == 3
+    assert [row["question"] for row in QueryLogger.get_all()] == ["offline 2", "offline 1", "offline 0"]
+
+    table = FakeTable()
+    _use_client(logger_env, FakeClient(table))
+    QueryLogger.log("online", "answer")
+    assert QueryLogger.flush()
+
+    questions = [row["question"] for row in table.rows]
+    assert "online" in questions and {"offline 0", "offline 1", "offline 2"} <= set(questions)
+    assert all("spool_id" not in row for row in table.rows)
+    assert QueryLogger.stats()["spool_depth"] == 0
+
+
+def test_failing_remote_spools_and_pauses(logger_env):
+    _use_client(logger_env, FakeClient(FakeTable(fail=True)))
+    before = QueryLogger.stats()["remote_errors"]
+
+    QueryLogger.log("lost?", "no, spooled")
+    assert QueryLogger.flush()
+
+    stats = QueryLogger.stats()
+    assert stats["remote_errors"] == before + 1
+    assert stats["spool_depth"] == 1
+    assert stats["remote_paused"] is True
+
+
+def test_full_queue_drops_instead_of_blocking(logger_env):
+    gate = threading.Event()
+    _use_client(logger_env, FakeClient(FakeTable(gate=gate)))
+    logger_env.setattr(QueryLogger, "_queue", query_logger.queue.Queue(maxsize=2))
+    before = QueryLogger.stats()["dropped"]
+
+    for i in range(50):
+        QueryLogger.log(f"burst {i}", "answer")
+    dropped = QueryLogger.stats()["dropped"] - before
+    gate.set()
+    assert QueryLogger.flush()
+
+    assert dropped > 0
+
+
+def test_spool_is_capped_and_reuses_one_connection(logger_env):
+    _use_client(logger_env, None)
+    logger_env.setattr(query_logger, "QUERY_LOG_SPOOL_MAX_ROWS", 5)
+    before = QueryLogger.stats()["spool_dropped"]
+    for i in range(12):
+        QueryLogger.log(f"offline {i}", "answer")
+    assert QueryLogger.flush()
+
+    stats = QueryLogger.stats()
+    assert stats["spool_depth"] == 5 and stats["spool_dropped"] - before == 7
+    assert [row["question"] for row in QueryLogger.get_all()] == [f"offline {i}" for i in range(11, 6, -1)]
+    connection = QueryLogger._spool_connection()
+    QueryLogger.stats()
+    assert QueryLogger._spool_connection() is connection
@@ -0,0 +1,135 @@
+import sys
+import os
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+from starlette.testclient import TestClient
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.core.query_service import QueryService, RAGPipeline, VectorDBManager, QueryLogger
+from backend.exceptions.custom_exceptions import ServiceOverloadedError
+from backend.server import create_app
+
+
+class FakePipeline:
+    """Counts LLM calls; each answer streams a few tokens slowly enough for requests to overlap."""
+
+    def __init__(self, monkeypatch, token_delay=0.02, gate=None):
+        self.llm_calls = 0
+        self.remembered = []
+        self.token_delay = token_delay
+        self.gate = gate
+        self._lock = threading.Lock()
+        monkeypatch.setattr(VectorDBManager, "current_fingerprint", staticmethod(lambda candidate_id=None: "fp-1"))
+        monkeypatch.setattr(RAGPipeline, "lookup_cache", staticmethod(lambda q, fp="", candidate_id=None: (None, "live", None)))
+        monkeypatch.setattr(RAGPipeline, "answer_query", staticmethod(self.answer_query))
+        monkeypatch.setattr(RAGPipeline, "remember_answer", staticmethod(
+            lambda q, a, fp="", evidence="", query_vector=None: self.remembered.append((q, a))))
+        monkeypatch.setattr(QueryLogger, "log", staticmethod(lambda *a, **k: None))
+
+    def answer_query(self, question, query_vector=None, candidate_id=None):
+        with self._lock:
+            self.llm_calls += 1
+
+        def tokens():
+            if self.gate is not None:
+                self.gate.wait(5)
+            for word in ("Answer", " to", " it"):
+                time.sleep(self.token_delay)
+                yield word
+        return tokens(), []
+
+
+def test_identical_questions_share_one_llm_call(monkeypatch):
+    fake = FakePipeline(monkeypatch)
+
+    async def scenario():
+        service = QueryService(max_concurrent=4, max_pending=8)
+        try:
+            async def one():
+                flight, coalesced = await service.ask("What is the candidate's name?")
+                return "".join([t async for t in flight.stream()]), coalesced
+
+            results = await asyncio.gather(*[one() for _ in range(50)])
+            return results, service.stats()
+        finally:
+            service.close()
+
+    results, stats = asyncio.run(scenario())
+
+    assert fake.llm_calls == 1
+    assert {answer for answer, _ in results} == {"Answer to it"}
+    assert sum(coalesced for _, coalesced in results) == 49
+    assert stats["coalesced"] == 49 and stats["in_flight"] == 0
+    assert fake.remembered == [("What is the candidate's name?", "Answer to it")]
+
+
+def test_distinct_questions_beyond_pending_limit_are_rejected(monkeypatch):
+    gate = threading.Event()
+    fake = FakePipeline(monkeypatch, gate=gate)
+
+    async def scenario():
+        service = QueryService(max_concurrent=1, max_pending=2)
+        try:
+            flights = [(await service.ask(f"question {i}"))[0] for i in range(3)]  # 1 running + 2 waiting
+            await asyncio.sleep(0.05)
+            with pytest.raises(ServiceOverloadedError):
+                await service.ask("question 3")
+            # A duplicate of an in-flight question is still served
+            _, coalesced = await service.ask("question 1")
+            assert coalesced
+            gate.set()
+            for flight in flights:
+                async for _ in flight.stream():
+                    pass
+            return service.stats()
+        finally:
+            gate.set()
+            service.close()
+
+    stats = asyncio.run(scenario())
+    assert stats["rejected"] == 1
+    assert stats["completed"] == 3
+    assert fake.llm_calls == 3
+
+
+def test_sse_endpoint_streams_tokens_then_done(monkeypatch):
+    FakePipeline(monkeypatch, token_delay=0)
+
+    with TestClient(create_app(QueryService(max_concurrent=2))) as client:
+        with client.stream("POST", "/ask", json={"question": "Skills?"}) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            events = [line for line in response.iter_lines() if line.startswith(("event:", "data:"))]
+
+        assert events[0] == "event: meta"
+        assert [line for line in events if line.startswith("event:")][-1] == "event: done"
+        tokens = [json.loads(events[i + 1][5:])["token"] for i, line in enumerate(events) if line == "event: token"]
+        assert "".join(tokens) == "Answer to it"
+
+        body = client.post("/ask", json={"question": "Skills?", "stream": False}).json()
+        assert body["answer"] == "Answer to it"
+        assert client.post("/ask", json={}).status_code == 400
+        assert "pria_service_requests_total" in client.get("/metrics").text
+
+
+def test_refusals_are_returned_but_not_cached(monkeypatch):
+    fake = FakePipeline(monkeypatch)
+    monkeypatch.setattr(RAGPipeline, "answer_query", staticmethod(
+        lambda q, query_vector=None, candidate_id=None: (None, "Error: No resume index found.")))
+
+    async def scenario():
+        service = QueryService(max_concurrent=1)
+        try:
+            flight, _ = await service.ask("Skills?")
+            return "".join([t async for t in flight.stream()])
+        finally:
+            service.close()
+
+    assert asyncio.run(scenario()) == "Error: No resume index found."
+    assert fake.remembered == []
@@ -0,0 +1,82 @@
+import sys
+import os
+
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.core import registry
+from backend.core.agent import RAGPipeline
+from backend.core.database import VectorDBManager
+from backend.core.registry import IndexRegistry
+from backend.utils.cache_manager import QueryEmbeddingCache, RetrievalCache
+from backend.utils.offline_models import HashingEmbeddings
+from test_metrics import SyntheticUpload
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.queries = 0
+        self.documents = 0
+
+    def embed_query(self, text):
+        self.queries += 1
+        return super().embed_query(text)
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.fixture
+def embeddings(tmp_path, monkeypatch):
+    model = CountingEmbeddings()
+    monkeypatch.setattr(registry, "FAISS_DB_PATH", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(registry, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(IndexRegistry, "_entry", None)
+    monkeypatch.setattr(IndexRegistry, "_embeddings", model)
+    monkeypatch.setattr(IndexRegistry, "get_ingest_embeddings", classmethod(
+        lambda cls: type("Ingest", (), {"embed_documents_with_stats": lambda self, texts: (
+            HashingEmbeddings().embed_documents(texts), 0, len(texts))})()))
+    QueryEmbeddingCache.clear()
+    RetrievalCache.clear()
+    yield model
+    QueryEmbeddingCache.clear()
+    RetrievalCache.clear()
+
+
+def test_repeated_questions_skip_the_encoder(embeddings):
+    first = RAGPipeline.embed_query("What are the candidate's skills?")
+    assert RAGPipeline.embed_query("  what are the CANDIDATE'S skills? ") == first
+    assert embeddings.queries == 1
+
+    vectors = RAGPipeline.embed_queries(["What are the candidate's skills?", "Where did they study?"])
+    assert vectors[0] == first and embeddings.documents == 1  # Only the new question was encoded
+    assert QueryEmbeddingCache.stats()["hits"] == 2
+
+
+def test_ranking_is_cached_per_index_generation(embeddings, monkeypatch):
+    VectorDBManager.process_file_and_create_db(SyntheticUpload(0))
+    loaded = IndexRegistry.get()
+    searches = []
+    search_ids = loaded.vector_db.search_ids
+    monkeypatch.setattr(loaded.vector_db, "search_ids", lambda *a, **k: searches.append(1) or search_ids(*a, **k))
+
+    question = "Which cloud platforms has the candidate used?"
+    docs = RAGPipeline.retrieve(loaded, question)
+    again = RAGPipeline.retrieve(loaded, question.upper())
+    assert [d.page_content for d in again] == [d.page_content for d in docs]
+    assert len(searches) == 1 and embeddings.queries == 1
+    ranking = RetrievalCache.get(loaded.generation, loaded.fingerprint, question, RAGPipeline.retrieval_k(loaded))
+    assert [chunk for chunk, _ in ranking] == [d.metadata["chunk"] for d in docs]
+
+    # A rebuild clears the cache; the new generation is searched afresh (the query vector is still reused)
+    VectorDBManager.process_file_and_create_db(SyntheticUpload(1))
+    assert RetrievalCache.stats()["entries"] == 0
+    rebuilt = IndexRegistry.get()
+    assert rebuilt.generation == 2
+    assert [d.page_content for d in RAGPipeline.retrieve(rebuilt, question)] != [d.page_content for d in docs]
+    assert embeddings.queries == 1
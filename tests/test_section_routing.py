@@ -0,0 +1,156 @@
+"""
+Recall@k of blind vs section-aware chunking on synthetic resumes.
+
+    python tests/test_section_routing.py --resumes 20 --output section_eval.json
+
+blind:     RecursiveCharacterTextSplitter over the whole text, every question searches every chunk
+sectioned: chunks split at section headings and tagged, questions routed to their sections (SectionRouter)
+
+Each labeled question's answer is one line of a known section (the degree, the certification...);
+a hit is a retrieved chunk containing that line. Uses the offline hashing embedder, so no model is needed.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.config import SECTION_RETRIEVAL_K
+from backend.core.agent import RAGPipeline
+from backend.core.database import VectorDBManager
+from backend.core.registry import LoadedIndex
+from backend.core.router import SectionRouter
+from backend.utils.context_builder import build_context
+from backend.utils.lexical_index import BM25Index
+from backend.utils.offline_models import HashingEmbeddings
+from backend.utils.profile_extractor import heading_section
+from backend.utils.vector_store import MappedVectorStore
+from test_metrics import make_resume_text
+
+MAX_K = 4
+# (question, section whose first line answers it)
+LABELED = [
+    ("What are the candidate's educational qualifications?", "education"),
+    ("Which university did the candidate graduate from?", "education"),
+    ("What degree does the candidate hold?", "education"),
+    ("Does the candidate hold any certifications?", "certifications"),
+    ("Which certifications has the candidate earned?", "certifications"),
+]
+
+
+def make_eval_resume(seed: int):
+    """A synthetic resume, with Education/Certifications moved above Experience on odd seeds."""
+    lines = make_resume_text(seed, experience_entries=random.Random(seed).randint(3, 8)).split("\n")
+    if seed % 2:
+        start, end = lines.index("EXPERIENCE"), lines.index("EDUCATION")
+        lines = lines[:start] + lines[end:] + [""] + lines[start:end]
+    answers = {}
+    for i, line in enumerate(lines):
+        section = heading_section(line)
+        if section and i + 1 < len(lines):
+            answers[section] = lines[i + 1]
+    return "\n".join(lines), answers
+
+
+def build_index(directory: str, text: str, sectioned: bool, embeddings):
+    if sectioned:
+        chunks, sections, start_text, fingerprint = VectorDBManager.split_stream(text.split("\n"))
+        metadatas = [{"chunk": i, "section": s} for i, s in enumerate(sections)]
+    else:
+        chunks = VectorDBManager.split_text(text)
+        start_text, fingerprint = text[:1000], "blind"
+        metadatas = [{"chunk": i} for i in range(len(chunks))]
+    MappedVectorStore.build(directory, chunks, embeddings.embed_documents(chunks), metadatas=metadatas)
+    return LoadedIndex(MappedVectorStore.open(directory), start_text, fingerprint, None, BM25Index.build(chunks))
+
+
+def evaluate(resumes: int = 10):
+    embeddings = HashingEmbeddings()
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("blind", "sectioned"):
+            hits, searched, tokens, chunks_sent, questions = [0] * (MAX_K + 1), 0, 0, 0, 0
+            for seed in range(resumes):
+                text, answers = make_eval_resume(seed)
+                loaded = build_index(os.path.join(tmp, f"{mode}-{seed}"), text, mode == "sectioned", embeddings)
+                for question, section in LABELED:
+                    vector = embeddings.embed_query(question)
+                    ranking = RAGPipeline.rank_chunks(loaded, question, vector, k=MAX_K)
+                    texts = [doc.page_content for doc in loaded.vector_db.get_chunks([c for c, _ in ranking])]
+                    first = next((rank for rank, chunk in enumerate(texts, 1) if answers[section] in chunk), None)
+                    for k in range(1, MAX_K + 1):
+                        hits[k] += first is not None and first <= k
+                    # What production sends: the default ranking size, plus the start block if not routed away
+                    sections = RAGPipeline.route_sections(loaded, question)
+                    searched += len(loaded.vector_db.section_ids(sections)) if sections else len(loaded.vector_db)
+                    docs = loaded.vector_db.get_chunks(
+                        [c for c, _ in RAGPipeline.rank_chunks(loaded, question, vector)])
+                    tokens += build_context(docs, RAGPipeline.start_text_for(loaded, question))[1]["tokens_sent"]
+                    chunks_sent += len(docs)
+                    questions += 1
+                loaded.vector_db.close()
+            results[mode] = {
+                "recall_at_k": {k: round(hits[k] / questions, 3) for k in range(1, MAX_K + 1)},
+                "chunks_searched": round(searched / questions, 2),
+                "chunks_sent": round(chunks_sent / questions, 2),
+                "context_tokens": round(tokens / questions, 1),
+            }
+    results["resumes"], results["questions"] = resumes, resumes * len(LABELED)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recall@k of blind vs section-aware chunking and routing.")
+    parser.add_argument("--resumes", type=int, default=20, help="Synthetic resumes to evaluate")
+    parser.add_argument("--output", help="Write the results JSON here as well as to stdout")
+    args = parser.parse_args(argv)
+
+    text = json.dumps(evaluate(args.resumes), indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return 0
+
+
+def test_chunks_never_cross_a_heading():
+    text, _ = make_eval_resume(1)
+    chunks, sections, start_text, _ = VectorDBManager.split_stream(text.split("\n"))
+    assert sections[0] == "header" and start_text.startswith(text.split("\n")[0])
+    assert {"summary", "skills", "experience", "education", "certifications"} <= set(sections)
+    for chunk, section in zip(chunks, sections):
+        headings = [heading_section(line) for line in chunk.split("\n") if heading_section(line)]
+        assert headings in ([], [section])  # At most its own heading, as the first line
+    assert len(chunks) == len(sections)
+
+
+def test_router_targets_sections_only_on_clear_intent():
+    assert SectionRouter.route("Where did the candidate study? Which university?") == ("education",)
+    assert SectionRouter.route("Where did she study?") == ("education",)
+    assert SectionRouter.route("Does she hold an AWS certification?")[0] == "certifications"
+    assert SectionRouter.route("What languages does the candidate speak?") == ("languages",)
+    assert SectionRouter.route("Tell me about their side projects") == ("projects", "experience")
+    for question in ["Does the candidate have experience with Python?", "Would they be a good fit?",
+                     "What programming languages do they know?", "Is she a scrum master?",
+                     "Has the candidate led a case study?",
+                     "What did he do before he chose to study design?"]:
+        assert SectionRouter.route(question) is None
+
+
+def test_routed_search_finds_answers_at_smaller_k():
+    results = evaluate(resumes=6)
+    blind, sectioned = results["blind"], results["sectioned"]
+    assert sectioned["recall_at_k"][SECTION_RETRIEVAL_K] == 1.0
+    assert sectioned["recall_at_k"][1] >= blind["recall_at_k"][1]
+    assert sectioned["recall_at_k"][SECTION_RETRIEVAL_K] >= blind["recall_at_k"][MAX_K]
+    assert sectioned["chunks_searched"] < blind["chunks_searched"] / 2
+    assert sectioned["context_tokens"] < blind["context_tokens"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
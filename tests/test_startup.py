@@ -0,0 +1,63 @@
+import sys
+import os
+import threading
+import time
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from backend.config import COLD_START_BUDGET_SECONDS
+from backend.core.registry import IndexRegistry
+from backend.core.warmup import Warmup
+from backend.utils.llm_client import LLMClient
+from backend.utils.metrics import Metrics
+from backend.utils.offline_models import HashingEmbeddings
+from backend.utils.startup import StartupTimer
+from test_metrics import cold_start_probe
+
+
+def test_first_paint_imports_no_heavy_modules():
+    probe = cold_start_probe()
+    # langchain / faiss / torch / httpx / parsers load in the warm-up thread or on the first question
+    assert probe["heavy_modules"] == []
+    assert [p["phase"] for p in probe["phases"]] == ["import:ui_modules"]
+    assert probe["phases"][0]["ms"] < COLD_START_BUDGET_SECONDS * 1000
+
+
+def test_budget_check_reports_slow_phases(monkeypatch):
+    StartupTimer.reset()
+    Metrics.reset()
+    with StartupTimer.phase("import:slow"):
+        time.sleep(0.05)
+    with StartupTimer.phase("import:slow"):
+        time.sleep(0.2)  # Only the first run of a phase counts
+    with StartupTimer.phase("warmup:model", critical=False):
+        time.sleep(0.05)
+
+    assert [p["phase"] for p in StartupTimer.report()] == ["import:slow", "warmup:model"]
+    assert 0.05 <= StartupTimer.critical_seconds() < 0.2
+    assert not StartupTimer.check_budget(budget=0.01)
+    assert StartupTimer.check_budget(budget=1.0)
+    assert Metrics.counters()["pria_startup_budget_exceeded_total"] == 1
+    StartupTimer.reset()
+
+
+def test_warmup_runs_once_in_the_background(monkeypatch):
+    StartupTimer.reset()
+    monkeypatch.setattr(IndexRegistry, "_embeddings", HashingEmbeddings())
+    monkeypatch.setattr(LLMClient, "_shared", object())
+    monkeypatch.setattr(Warmup, "_thread", None)
+    monkeypatch.setattr(Warmup, "_done", threading.Event())
+
+    assert Warmup.start()
+    assert not Warmup.start()
+    assert Warmup.wait(timeout=60)
+
+    status = Warmup.status()
+    assert status["status"] == "done", status
+    assert status["steps"] == ["import_pipeline", "embedding_model", "index", "llm_client"]
+    phases = {p["phase"]: p for p in StartupTimer.report()}
+    assert phases["warmup:embedding_model"]["thread"] == "warmup"
+    assert not phases["warmup:embedding_model"]["critical"]
+    StartupTimer.reset()
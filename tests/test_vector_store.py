@@ -0,0 +1,79 @@
+import sys
+import os
+import threading
+
+import numpy as np
+import pytest
+
+# Add the parent directory to the Python path so we can import 'backend'
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.utils.offline_models import HashingEmbeddings
+from backend.utils.vector_store import MappedVectorStore, VECTORS_FILE, CHUNKS_FILE
+
+CHUNKS = [
+    "Jane Doe, Senior Engineer. jane@example.com. Bengaluru, India.",
+    "Built payment services in Java and Spring Boot for 3 million users.",
+    "Deployed microservices on Kubernetes with Helm and Terraform on AWS.",
+    "Frontend work in React and TypeScript; migrated a Node.js monolith.",
+    "Databases: PostgreSQL, MongoDB and Redis. Data pipelines in Spark.",
+]
+
+
+def build(directory, quantization="flat"):
+    embeddings = HashingEmbeddings()
+    MappedVectorStore.build(str(directory), CHUNKS, embeddings.embed_documents(CHUNKS),
+                            metadatas=[{"chunk": i} for i in range(len(CHUNKS))], quantization=quantization)
+    return embeddings, MappedVectorStore.open(str(directory))
+
+
+@pytest.mark.parametrize("quantization", ["flat", "sq8"])
+def test_search_returns_chunks_with_metadata(tmp_path, quantization):
+    embeddings, store = build(tmp_path, quantization)
+
+    docs = store.similarity_search_by_vector(embeddings.embed_query("Kubernetes Helm Terraform"), k=2)
+    assert docs[0].page_content == CHUNKS[2] and docs[0].metadata == {"chunk": 2}
+    assert len(docs) == 2
+    assert store.get_chunk(4).page_content == CHUNKS[4]
+    assert store.get_chunk(99) is None
+    assert len(store) == len(CHUNKS)
+    # Native files only: nothing pickled
+    assert sorted(os.listdir(tmp_path)) == sorted([VECTORS_FILE, CHUNKS_FILE])
+
+
+def test_quantized_files_are_smaller_and_pq_needs_enough_vectors(tmp_path):
+    build(tmp_path / "flat", "flat")
+    build(tmp_path / "sq8", "sq8")
+    assert os.path.getsize(tmp_path / "sq8" / VECTORS_FILE) < os.path.getsize(tmp_path / "flat" / VECTORS_FILE)
+
+    # Too few vectors to train PQ codebooks: falls back to scalar quantization and still works
+    embeddings, store = build(tmp_path / "pq_small", "pq")
+    assert store.similarity_search_by_vector(embeddings.embed_query("React TypeScript"), k=1)[0].page_content == CHUNKS[3]
+
+    rng = np.random.default_rng(0)
+    vectors = rng.random((1000, 384), dtype=np.float32)
+    MappedVectorStore.build(str(tmp_path / "pq"), [f"chunk {i}" for i in range(1000)], vectors, quantization="pq")
+    store = MappedVectorStore.open(str(tmp_path / "pq"))
+    assert store.similarity_search_by_vector(vectors[7], k=1)[0].page_content == "chunk 7"
+    assert os.path.getsize(tmp_path / "pq" / VECTORS_FILE) < vectors.nbytes / 3  # 48 bytes/vector + codebooks
+
+
+def test_concurrent_readers_share_one_store(tmp_path):
+    embeddings, store = build(tmp_path)
+    query = embeddings.embed_query("PostgreSQL Redis")
+    results, errors = [], []
+
+    def search():
+        try:
+            for _ in range(50):
+                results.append(store.similarity_search_by_vector(query, k=1)[0].page_content)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=search) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors and set(results) == {CHUNKS[4]} and len(results) == 400
+    assert MappedVectorStore.open(str(tmp_path / "missing")) is None